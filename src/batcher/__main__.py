@@ -24,11 +24,21 @@
 
 import logging
 import os
+import signal
 import threading
-from time import sleep
 
+from . import log
 from .batch import BatchManager
+from .cfs import components
+from .client import log_call_stats, log_limiter_stats
+from .clock import WALL_CLOCK
+from .introspection import IntrospectionServer
+from . import metrics
 from .liveness.timestamp import Timestamp
+from .profiler import profiler
+from .shard import ShardManager
+from .standby import Replica
+from .sweeper import SessionSweeper
 
 from .cfs.options import options
 
@@ -38,7 +48,7 @@ LOGGER = logging.getLogger(__name__)
 MAIN_THREAD = threading.current_thread()
 
 
-def monotonic_liveliness_heartbeat():
+def monotonic_liveliness_heartbeat(clock=WALL_CLOCK):
     """
     Periodically add a timestamp to disk; this allows for reporting of basic
     health at a minimum rate. This prevents the pod being marked as dead if
@@ -49,15 +59,16 @@ def monotonic_liveliness_heartbeat():
         if not MAIN_THREAD.is_alive():
             # All hope abandon ye who enter here
             return
-        Timestamp()
-        sleep(10)
+        Timestamp(clock=clock)
+        clock.sleep(10)
 
 
 def setup_logging():
-    log_format = "%(asctime)-15s - %(process)d - %(thread)d - %(levelname)-7s - %(name)s - %(message)s"
     requested_log_level = os.environ.get('STARTING_CFS_LOG_LEVEL', DEFAULT_LOG_LEVEL)
     log_level = logging.getLevelName(requested_log_level)
-    logging.basicConfig(level=log_level, format=log_format)
+    handler = logging.StreamHandler()
+    handler.setFormatter(log.get_formatter(os.environ.get('BATCHER_LOG_FORMAT', 'text')))
+    logging.basicConfig(level=log_level, handlers=[handler])
 
 
 def _update_log_level() -> None:
@@ -78,24 +89,78 @@ def _update_log_level() -> None:
         LOGGER.error('Error updating logging level: {}'.format(e))
 
 
-def main():
+def run_cycle(manager, introspection=None):
+    """A single pass of the main loop, after the check interval has passed"""
+    cycle_start = manager.clock.time()
+    options.update()
+    _update_log_level()
+    log.set_trace(options.trace)
+    profiler.update(options.profile_duration)
+    manager.update_shards()
+    phases = [manager.check_status]
+    if not options.disable:
+        phases += [manager.update_batches, manager.send_batches]
+    # Each phase is bounded by its work budget.  See batcher.budget
+    durations = {}
+    for phase in phases:
+        phase_start = manager.clock.time()
+        phase()
+        durations[phase.__name__] = manager.clock.time() - phase_start
+    durations['total'] = manager.clock.time() - cycle_start
+    metrics.latency.record_cycle(durations)
+    log_limiter_stats()
+    log_call_stats()
+    components.log_stats()
+    metrics.latency.export_if_due()
+    if introspection:
+        introspection.publish(manager.snapshot())
+
+
+def main(clock=WALL_CLOCK):
     # Create a liveness thread to indicate overall health of the pod
-    heartbeat = threading.Thread(target=monotonic_liveliness_heartbeat, args=())
+    heartbeat = threading.Thread(target=monotonic_liveliness_heartbeat, args=(clock,))
     heartbeat.start()
+    # SIGUSR1 profiles all threads.  See batcher.profiler
+    profiler.install_signal_handler(signal.SIGUSR1)
 
-    manager = BatchManager()
+    # With standby replicas, only the active replica runs the main loop.  See batcher.standby
+    replica = Replica.from_environment(clock=clock)
+    restore_state = replica.wait_for_leadership() if replica else None
+
+    introspection = IntrospectionServer.from_environment()
+    SessionSweeper(clock=clock).start()
+    while True:
+        # Leases are renewed in the background as well as each cycle.  See batcher.lease
+        shard = ShardManager.from_environment()
+        if shard:
+            shard.renewer.start()
+        if replica:
+            replica.renewer.start()
+        manager = BatchManager(shard=shard, background_rebuild=True, clock=clock,
+                               restore_state=restore_state, replica=replica)
+        if introspection:
+            introspection.publish(manager.snapshot())
+        run_active(manager, introspection, clock)
+        LOGGER.warning('The leader lease was lost.  Returning to standby')
+        replica.renewer.stop()
+        if shard:
+            shard.renewer.stop()
+        restore_state = replica.wait_for_leadership()
+
+
+def run_active(manager, introspection, clock):
+    """Runs the main loop, until the leader lease is lost if there is a standby replica"""
     while True:
         try:
-            sleep(options.batcher_check_interval)
-            options.update()
-            _update_log_level()
-            manager.check_status()
-            if not options.disable:
-                manager.update_batches()
-                manager.send_batches()
+            clock.sleep(options.batcher_check_interval)
+            if manager.replica and not manager.replica.renew():
+                return
+            run_cycle(manager, introspection)
+            if manager.replica:
+                manager.replica.publish(manager.export_state())
         except Exception as e:
             LOGGER.exception('Unexpected error occurred')
-            sleep(5)  # Arbitrary sleep to prevent recurring errors from hammering other services.
+            clock.sleep(5)  # Arbitrary sleep to prevent recurring errors from hammering other services.
 
 
 if __name__ == '__main__':
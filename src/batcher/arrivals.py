@@ -0,0 +1,83 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Estimates of the rate at which pending components arrive for each batch key.
+
+Each discovery pass reports how many new components it found for each batch
+key.  The rate is an exponentially weighted moving average (EWMA) of the
+arrivals per second.  The batcher uses the batch window as the time constant,
+so that the estimate covers about as long as a batch can wait.  Because an
+EWMA is slow to notice that arrivals have stopped, the estimate is also capped
+by the reciprocal of the time since the last arrival: after a quiet period of
+s seconds, at most about one component per s seconds is expected.
+
+These estimates drive the predictive dispatch policy.  See
+BatchManager._dispatch_early.
+"""
+import math
+
+DEFAULT_TIME_CONSTANT = 60
+# Keys whose rate falls below this, with no recent arrivals, are forgotten
+MIN_RATE = 1e-4
+
+
+class ArrivalRates(object):
+    def __init__(self):
+        self.rates = {}  # batch_key -> arrivals per second
+        self.last_arrival = {}  # batch_key -> time of the last pass with arrivals
+        self.last_pass = None
+
+    def observe(self, arrivals, now, time_constant=DEFAULT_TIME_CONSTANT):
+        """Records a discovery pass, given a dictionary of the new components found per batch key"""
+        time_constant = max(1, time_constant)
+        # The first pass has no previous pass to measure from, so its arrivals are treated as
+        # having been spread over the time constant
+        interval = now - self.last_pass if self.last_pass is not None else time_constant
+        if interval <= 0:
+            return
+        alpha = 1 - math.exp(-interval / time_constant)
+        for key in set(self.rates) | set(arrivals):
+            count = arrivals.get(key, 0)
+            self.rates[key] = alpha * count / interval + (1 - alpha) * self.rates.get(key, 0.0)
+            if count:
+                self.last_arrival[key] = now
+            elif self.rates[key] < MIN_RATE:
+                del self.rates[key]
+                self.last_arrival.pop(key, None)
+        self.last_pass = now
+
+    def rate(self, key, now):
+        """The estimated arrivals per second for the key"""
+        rate = self.rates.get(key, 0.0)
+        last_arrival = self.last_arrival.get(key)
+        if last_arrival is not None and now > last_arrival:
+            rate = min(rate, 1 / (now - last_arrival))
+        return rate
+
+    def expected(self, key, now, seconds):
+        """The number of components expected to arrive for the key in the next number of seconds"""
+        return self.rate(key, now) * max(0, seconds)
+
+    def snapshot(self, now):
+        return {str(key): self.rate(key, now) for key in self.rates}
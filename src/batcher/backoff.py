@@ -0,0 +1,114 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Backoffs are intended to help avoid runaway configuration attempts in cases where
+configuration will never succeed, such as invalid desired configuration with an
+unlimited number of retries.
+
+A Backoff tracks the results of recent sessions.  When every recent session has
+failed, session creation is halted for an exponentially increasing period of
+time, until a session succeeds again.
+
+A Backoff covering several keys, such as the global backoff covering every
+configuration, only starts when the failures are spread across keys.  A single
+broken configuration is left to its own backoff rather than halting the others.
+"""
+from collections import Counter, deque
+import logging
+
+from .cfs.options import options
+from .clock import WALL_CLOCK
+
+LOGGER = logging.getLogger(__name__)
+
+RECENT_SESSIONS_SIZE = 20
+STARTING_BACKOFF = 60
+
+
+class Backoff(object):
+    def __init__(self, description, size=RECENT_SESSIONS_SIZE, min_keys=1, clock=None):
+        """
+        description is used in log messages to describe the sessions being tracked.
+        min_keys is the number of distinct keys that must be among the recent failures for the
+        backoff to start.  This allows a backoff covering all configurations to only start when
+        more than one configuration is failing.  When min_keys is more than one, no single key may
+        account for most of the failures either.
+        clock is used to time the backoff.  See batcher.clock.
+        """
+        self.clock = clock or WALL_CLOCK
+        self.description = description
+        self.size = size
+        self.min_keys = min_keys
+        self.recent_sessions = deque([(None, True)] * size, size)
+        self.current_backoff = 0
+        self.backoff_start = 0
+
+    def record(self, success, key=None):
+        self.recent_sessions.append((key, success))
+
+    @property
+    def healthy(self):
+        """True if the most recent session succeeded and there is no backoff in effect"""
+        return self.recent_sessions[-1][1] and not self.active()
+
+    def update(self, ignored_keys=()):
+        """
+        Starts, extends or ends the backoff based on the recent sessions.  Failures for ignored_keys,
+        such as keys already backing off on their own, do not count towards min_keys.
+        """
+        if any(success for _, success in self.recent_sessions):  # At least one session succeeded
+            if self.current_backoff != 0:
+                self.current_backoff = 0
+                LOGGER.info('A session for {} has succeeded.  Resuming normal operations'.format(
+                    self.description))
+            return
+        failures = Counter(key for key, _ in self.recent_sessions if key not in ignored_keys)
+        if len(failures) < self.min_keys:
+            return
+        if self.min_keys > 1 and failures.most_common(1)[0][1] * 2 > sum(failures.values()):
+            return  # Most failures are from one key, which has its own backoff
+
+        if self.clock.time() - self.backoff_start >= self.current_backoff:  # The previous backoff expired
+            if self.current_backoff == 0:
+                self.current_backoff = min(options.max_backoff, STARTING_BACKOFF)
+            else:
+                self.current_backoff = min(options.max_backoff, self.current_backoff * 2)
+            LOGGER.warning('The {} most recent configuration sessions for {} have failed. Halting session '
+                           'creation for {} seconds'.format(self.size, self.description,
+                                                            self.current_backoff))
+            self.backoff_start = self.clock.time()
+
+    def snapshot(self, now):
+        remaining = max(0, self.backoff_start + self.current_backoff - now)
+        return {
+            'active': remaining > 0,
+            'remaining': remaining,
+            'current_backoff': self.current_backoff,
+            'recent_failures': len([success for _, success in self.recent_sessions if not success]),
+        }
+
+    def active(self):
+        if self.clock.time() - self.backoff_start < self.current_backoff:
+            return True
+        return False
@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2024 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2024, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -21,22 +21,36 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 #
-from collections import defaultdict, deque
-from functools import partial
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import queue
 from requests.exceptions import HTTPError
-import time
+import threading
 
+from .arrivals import ArrivalRates
+from .backoff import Backoff
+from .budget import Budget, Cursor
 from .cfs.options import options
 from .cfs import sessions
 from .cfs import components
-from .component import Component
+from .client import CALL_DEADLINE
+from .clock import WALL_CLOCK
+from .cost import CostModel
+from .columnar import ComponentTable
+from .component import Component, is_pending
+from . import log
+from . import metrics
 
 LOGGER = logging.getLogger(__name__)
 
-RECENT_SESSIONS_SIZE = 20
-STARTING_BACKOFF = 60
 MAX_PENDING_WAIT = 300
+# The number of finished batches for which component data is fetched concurrently
+COMPLETION_WORKERS = 8
+# The maximum number of sessions created concurrently.  Creation is also rate limited by CFS_CREATE_RATE
+SESSION_CREATION_WORKERS = 8
+# CFS calls made in a phase with a time budget have at least this long, since a budget always allows one item
+MIN_CALL_DEADLINE = 5
 
 """
 The combination of batch manager and batch ensure that a desired
@@ -57,39 +71,117 @@ Application nodes set as the desired state for a Compute node)
 class BatchManager(object):
     """Manages multiple Batch objects"""
 
-    def __init__(self):
+    def __init__(self, shard=None, background_rebuild=False, clock=None, restore_state=None, replica=None):
+        # All timing uses self.clock, so that the batcher can be run on a virtual clock.  See batcher.clock
+        self.clock = clock or WALL_CLOCK
+        # When sharding is enabled, only components in the shards owned by this
+        # replica are handled.  See batcher.shard for details.
+        self.shard = shard
         # self.batches is a dict where the key is a desired configuration, and
         # the value is a list of Batch objects
         self.batches = defaultdict(list)
         # self.components is a set of all components currently in batches,
         # either waiting on configuration, or being configured
         self.components = set()
-        # The following are used to track failures and provide backoffs
-        self.recent_sessions = deque([True] * RECENT_SESSIONS_SIZE, RECENT_SESSIONS_SIZE)
-        self.current_backoff = 0
-        self.backoff_start = 0
-        # If the batcher is restarted, state will need to be rebuilt.
-        while True:
-            try:
-                self._rebuild_state()
-                break
-            except:
-                LOGGER.warning("Rebuilding state was interrupted. Trying again...")
+        # self.tracked_ids holds the ids of self.components, so that component data for
+        # tracked components can be skipped without being parsed
+        self.tracked_ids = set()
+        # The following are used to track failures and provide backoffs.
+        # Each configuration (or batch_key, depending on batcher_backoff_scope) has its own backoff,
+        # so that one broken configuration does not halt all configuration.  Session creation is
+        # only halted globally when the recent failures span multiple configurations.
+        self.global_backoff = Backoff('all configurations', min_keys=2, clock=self.clock)
+        self.backoffs = {}
+        # Used by the predictive dispatch policy.  See _dispatch_early
+        self.arrival_rates = ArrivalRates()
+        # Used to split failing batches.  See _bisect
+        self.capacity_limits = {}
+        self.isolated_ids = set()
+        # Each phase of a cycle has a work budget, and discovery passes can span several cycles.
+        # See batcher.budget
+        self.discovery = Cursor(lambda: components.iter_components(enabled=True, status='pending',
+                                                                   deadline=self._deadline()),
+                                clock=self.clock)
+        self.pass_arrivals = defaultdict(int)  # New components per batch_key in the current pass
+        # Weighs components when batches are formed.  See batcher.cost
+        self.costs = CostModel()
+        # With a standby replica, state is published for the standby, and dispatches are recorded
+        # before sessions are created.  See batcher.standby
+        self.replica = replica
+        if self.shard:
+            self.shard.update()
+        # If the batcher is restarted, state will need to be rebuilt.  With background_rebuild, this
+        # happens in another thread while new components are discovered and batched:
+        #  1. The in-flight sessions are listed, and their components are held back from discovery.
+        #     No sessions are created until this is done, so components are never sent twice.
+        #  2. Batches are rebuilt for the in-flight sessions, and folded in as they become available.
+        # Results are passed back through self.rebuilt and applied by _reconcile_rebuild().
+        self.started = self.clock.time()
+        self.first_dispatch = None
+        self.rebuilding_ids = None  # Components of in-flight sessions that have not been rebuilt yet
+        self.rebuilding = True
+        self.rebuilt = queue.Queue()
+        if restore_state is not None:
+            # A standby taking over restores the state published by the previous active replica instead
+            self._restore(restore_state)
+        elif background_rebuild:
+            threading.Thread(target=self._rebuild_worker, name='rebuild', daemon=True).start()
+        else:
+            self._rebuild_worker()
+            self._reconcile_rebuild()
 
     def check_status(self):
         """Remove batches for which the sessions have been completed"""
         LOGGER.debug('Checking batch session status')
+        self._reconcile_rebuild()
+        statuses = {}
+        in_flight = []
+        for batches in self.batches.values():
+            for batch in batches:
+                if batch.session_name:
+                    in_flight.append(batch)
+                else:
+                    statuses[batch] = 'new'
+        # Sessions that were checked least recently go first, so that every session is checked in turn
+        in_flight.sort(key=lambda batch: batch.status_checked)
+        budget = self._budget(options.status_budget)
+        n_checked = 0
+        for batch in budget.take(in_flight):
+            statuses[batch] = batch.safe_get_status(deadline=self._deadline(budget))
+            batch.status_checked = self.clock.time()
+            n_checked += 1
+            if statuses[batch] in ('complete', 'failed'):
+                budget.spend(len(batch.components))  # Finishing a session can patch each component
+        if n_checked < len(in_flight):
+            LOGGER.debug('Status budget was spent.  %d sessions will be checked next cycle',
+                         len(in_flight) - n_checked)
+        current_components = self._fetch_finished_components(
+            [batch for batch, status in statuses.items() if status in ('complete', 'failed')],
+            deadline=self._deadline(budget))
         finished_keys = []
+        timed_out_sessions = []
         n_complete = 0
         for key, batches in self.batches.items():
             remaining_batches = []
             for batch in batches:
-                complete, success = batch.check_complete()
+                status = statuses.get(batch)
+                if status is None:
+                    remaining_batches.append(batch)  # Not checked this cycle
+                    continue
+                if status in ('complete', 'failed') and batch not in current_components:
+                    # Component data could not be retrieved.  Try again next time.
+                    complete, success = False, False
+                else:
+                    complete, success = batch.check_complete(
+                        status=status, current_components=current_components.get(batch),
+                        deadline=self._deadline(budget))
                 if complete:
-                    self.recent_sessions.append(success)
-                    self.components = self.components.difference(
-                        batch.components)
+                    self._record_session(key, batch, success)
+                    self._bisect(batch, status)
+                    self._untrack(batch.components)
                     n_complete += 1
+                    if batch.timed_out:
+                        timed_out_sessions.append(batch.session_name)
                 else:
                     remaining_batches.append(batch)
             # Remove completed batches, and remove the key
@@ -100,121 +192,619 @@ class BatchManager(object):
                 self.batches[key] = remaining_batches
         for key in finished_keys:
             del self.batches[key]
+        sessions.delete_sessions(timed_out_sessions, deadline=self._deadline(budget))
         if n_complete:
             LOGGER.info('{} batches/sessions have completed'.format(
                 n_complete))
             self.update_backoff()
 
+    @staticmethod
+    def _fetch_finished_components(finished_batches, deadline=None):
+        """
+        Fetches the current component data for each finished batch, querying for several batches
+        at a time.  Batches for which the data could not be retrieved are left out of the result.
+        """
+        if not finished_batches:
+            return {}
+        current_components = {}
+        with ThreadPoolExecutor(max_workers=min(COMPLETION_WORKERS, len(finished_batches))) as executor:
+            futures = {batch: executor.submit(batch.fetch_components, deadline=deadline)
+                       for batch in finished_batches}
+            for batch, future in futures.items():
+                try:
+                    current_components[batch] = future.result()
+                except Exception as e:
+                    LOGGER.warning('Unable to retrieve components for session {}: {}'.format(
+                        batch.session_name, e))
+        return current_components
+
+    def _budget(self, items):
+        return Budget(items, options.phase_time_budget, clock=self.clock)
+
+    @staticmethod
+    def _deadline(budget=None):
+        """
+        The deadline of each CFS call made in a phase: the time left in the phase's budget if it has a time
+        limit, otherwise CALL_DEADLINE.  See batcher.client
+        """
+        remaining = budget.remaining_time if budget is not None else None
+        if remaining is None:
+            return CALL_DEADLINE
+        return max(MIN_CALL_DEADLINE, remaining)
+
     def update_batches(self):
         LOGGER.debug('Checking components for new configuration states')
-        i = 0
-        for component_data in components.iter_components(enabled=True, status='pending'):
+        now = self.clock.time()
+        budget = self._budget(options.discovery_budget)
+        if options.columnar_ingest:
+            self._update_batches_columnar(budget, now)
+        else:
+            self._update_batches_rows(budget, now)
+        if budget.spent:
+            LOGGER.debug('Found %d components that need updates', budget.spent)
+        if self.discovery.pass_complete:
+            self.arrival_rates.observe(self.pass_arrivals, self.discovery.pass_start,
+                                       time_constant=options.batch_window)
+            self.pass_arrivals = defaultdict(int)
+        elif budget.exhausted:
+            LOGGER.debug('Discovery budget was spent.  The pass will resume next cycle')
+
+    def _update_batches_rows(self, budget, now):
+        """Adds pending components to batches one at a time"""
+        for component_data in self.discovery.take(budget):
+            if component_data['id'] in self.tracked_ids:
+                # Tracked components are already batched or being configured, so building a
+                # Component would be wasted work.  See add().
+                continue
+            if self.rebuilding_ids and component_data['id'] in self.rebuilding_ids:
+                continue
+            if self.shard and not self.shard.owns_data(component_data):
+                continue
             component = Component(component_data)
+            component.first_seen = now
             self.add(component)
-            i += 1
-        if i:
-            LOGGER.debug('Found {} components that need updates'.format(i))
+            self.pass_arrivals[component.batch_key] += 1
+
+    def _update_batches_columnar(self, budget, now):
+        """
+        Adds pending components to batches using a columnar table of the discovery pass.
+        This has the same result as calling add() for each component.  See batcher.columnar.
+        """
+        table = ComponentTable.load(self.discovery.take(budget), shard=self.shard)
+        tracked_ids = self.tracked_ids | self.rebuilding_ids if self.rebuilding_ids else self.tracked_ids
+        rows = table.untracked_rows(tracked_ids, owned_shards=self.shard.owned if self.shard else None)
+        for batch_key, shard, group in table.groups(rows):
+            shard = shard if self.shard else None
+            new_components = [Component(table.data[row]) for row in group]
+            for component in new_components:
+                component.first_seen = now
+            self.pass_arrivals[batch_key] += len(new_components)
+            if self.isolated_ids:
+                for component in new_components:
+                    if component.id in self.isolated_ids:
+                        self.add(component)
+                new_components = [component for component in new_components
+                                  if component.id not in self.isolated_ids]
+                if not new_components:
+                    continue
+            capacity = self.capacity_limits.get(self._retry_key(new_components[0]))
+            cost = self.costs.cost(new_components[0], options.cost_model)
+            self._track(new_components)
+            start = 0
+            for batch in self.batches[batch_key]:
+                if start == len(new_components):
+                    break
+                if batch.shard == shard:
+                    end = start + batch.remaining_capacity
+                    batch.add_components(new_components[start:end])
+                    start = min(end, len(new_components))
+            while start < len(new_components):
+                new_batch = Batch(new_components[start], shard=shard, clock=self.clock, capacity=capacity,
+                                  cost=cost)
+                end = start + new_batch.remaining_capacity + 1
+                new_batch.add_components(new_components[start + 1:end])
+                self.batches[batch_key].append(new_batch)
+                start = end
+
+    def _track(self, components):
+        self.components.update(components)
+        self.tracked_ids.update(component.id for component in components)
+
+    def _untrack(self, components):
+        self.components.difference_update(components)
+        self.tracked_ids.difference_update(component.id for component in components)
 
     def add(self, component):
         """Adds a component to the appropriate batch"""
         if component in self.components:
             return
-        self.components.add(component)
-        for batch in self.batches[component.batch_key]:
-            if batch.try_add(component):
-                break
+        self._track([component])
+        shard = self.shard.shard_of_component(component) if self.shard else None
+        if component.id in self.isolated_ids:
+            capacity = 1
         else:
-            new_batch = Batch(component)
-            self.batches[component.batch_key].append(new_batch)
+            capacity = self.capacity_limits.get(self._retry_key(component))
+            for batch in self.batches[component.batch_key]:
+                # Batches never span shards, so that shards can be handed off cleanly
+                if batch.shard == shard and batch.try_add(component):
+                    return
+        new_batch = Batch(component, shard=shard, clock=self.clock, capacity=capacity,
+                          cost=self.costs.cost(component, options.cost_model))
+        self.batches[component.batch_key].append(new_batch)
+
+    """
+    Bisection of failing batches
+    When a session fails, components that Ansible recorded as failed are isolated in batches of their
+    own for their next attempt, if they are a minority of the batch.  When most or all of a batch fails,
+    the cause is more likely the configuration than the components, and the batch is kept together.
+    If the failure cannot be attributed to components (for example, an
+    inventory failure caused by one node), the maximum size of batches for the same configuration and
+    layers is halved, so that a component that breaks sessions holds back fewer healthy components on
+    each retry.  Each successful session doubles the limit again, until it reaches batch_size.
+    Limits are kept per configuration and layers, rather than per batch_key, because components retry
+    with a new latest status and so a new batch_key.
+    """
+
+    @staticmethod
+    def _retry_key(component):
+        return component.config_name + ':' + (component.config_limit or '')
+
+    def _bisect(self, batch, status):
+        """Updates the isolated components and batch size limits once a batch has finished"""
+        self.isolated_ids.difference_update(batch.component_ids)
+        key = self._retry_key(batch)
+        if status == 'complete':
+            limit = self.capacity_limits.get(key)
+            # Only batches created under the current limit count, so that batches from before a failure
+            # don't undo it
+            if limit and batch.capacity == limit:
+                if limit * 2 >= options.batch_size:
+                    del self.capacity_limits[key]
+                else:
+                    self.capacity_limits[key] = limit * 2
+        elif status == 'failed':
+            if batch.failed_ids and len(batch.failed_ids) * 2 < len(batch.components):
+                LOGGER.info('Isolating %d failed components from session %s in their own batches',
+                            len(batch.failed_ids), batch.session_name)
+                self.isolated_ids.update(batch.failed_ids)
+            elif batch.failed_ids:
+                LOGGER.info('Most components failed in session %s.  Keeping the batch together',
+                            batch.session_name)
+            elif len(batch.components) > 1:
+                limit = max(1, len(batch.components) // 2)
+                self.capacity_limits[key] = min(limit, self.capacity_limits.get(key, limit))
+                LOGGER.info('Session %s failed.  Limiting batches for %s to %d components',
+                            batch.session_name, key, self.capacity_limits[key])
 
     def send_batches(self):
         """Sends any batches that are ready"""
         LOGGER.debug('Sending completed batches')
+        self._reconcile_rebuild()
+        if self.rebuilding_ids is None:
+            LOGGER.debug('Waiting for in-flight sessions to be found before sending batches')
+            return
         if self.backoff():
             return
-        n_complete = 0
+        ready_batches = []
         for key, batches in self.batches.items():
-
-            for batch in batches:
-                if batch.try_send():
-                    n_complete += 1
+            backoff = self.backoffs.get(self._backoff_key(key, batches[0]))
+            if backoff and backoff.active():
+                continue
+            ready_batches.extend(batch for batch in batches
+                                 if batch.ready or self._dispatch_early(key, batch))
+        if not ready_batches:
+            return
+        # Sessions are created concurrently, so only the number of sessions is budgeted.  See batcher.budget
+        n_ready = len(ready_batches)
+        ready_batches.sort(key=lambda batch: batch.batch_window_start)
+        ready_batches = list(Budget(options.dispatch_budget, clock=self.clock).take(ready_batches))
+        if len(ready_batches) < n_ready:
+            LOGGER.debug('Dispatch budget was spent.  %d ready batches will be sent next cycle',
+                         n_ready - len(ready_batches))
+        # Names are assigned up front so that they follow the batch order, however the requests finish.
+        # A batch whose session may have been created by a failed attempt keeps the name of that session.
+        session_names = [batch.attempted_session_name or sessions.new_session_name()
+                         for batch in ready_batches]
+        if self.replica and not self.replica.record_dispatch(self.export_state(
+                dispatching=dict(zip(ready_batches, session_names)))):
+            LOGGER.warning('No longer the active replica.  Not sending batches')
+            return
+        max_workers = min(SESSION_CREATION_WORKERS, len(ready_batches))
+        deadline = self._deadline()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(batch.create_session, session_name, deadline=deadline)
+                       for batch, session_name in zip(ready_batches, session_names)]
+        n_complete = 0
+        for batch, session_name, future in zip(ready_batches, session_names, futures):
+            # One failed create must not lose the results of the others, or their sessions would be
+            # created again under new names
+            try:
+                success = future.result()
+            except Exception as e:
+                LOGGER.error('Unexpected exception creating session {}: {}'.format(session_name, e))
+                success = False
+            if not success:
+                batch.attempted_session_name = session_name
+            else:
+                metrics.latency.record_dispatch(
+                    'full' if batch.full else 'window' if batch.overdue else 'early')
+                batch.sent(session_name)
+                n_complete += 1
         if n_complete:
             msg = 'Successfully submitted {} batches for configuration'
             LOGGER.info(msg.format(n_complete))
+            if self.first_dispatch is None:
+                self.first_dispatch = self.clock.time()
+                LOGGER.info('First sessions were created %.1f seconds after startup',
+                            self.first_dispatch - self.started)
+
+    def _dispatch_early(self, key, batch):
+        """
+        With the predictive dispatch policy, a batch that is neither full nor overdue is sent once
+        fewer than dispatch_min_gain more components are expected to arrive for it before its window
+        expires, since waiting would add latency without saving sessions.  See batcher.arrivals.
+        """
+        if options.dispatch_policy != 'predictive' or batch.session_name:
+            return False
+        last_pass = self.arrival_rates.last_pass
+        if last_pass is None or last_pass <= batch.batch_window_start:
+            return False  # No discovery pass has run since the batch was started
+        now = self.clock.time()
+        window_end = batch.batch_window_start + options.batch_window
+        expected = self.arrival_rates.expected(key, now, window_end - now)
+        return expected < min(options.dispatch_min_gain, batch.remaining_capacity)
+
+    def update_shards(self):
+        """Renews shard leases, dropping batches for released shards and rebuilding acquired shards"""
+        if not self.shard:
+            return
+        acquired, released = self.shard.update()
+        if released:
+            self._drop_shards(released)
+        if acquired:
+            self._rebuild_state(shards=acquired)
+
+    def _drop_shards(self, shards):
+        """
+        Stops tracking all batches in the given shards.  Sessions that are in progress are picked
+        up by the new owner of the shard when it rebuilds its state.
+        """
+        n = 0
+        for key in list(self.batches.keys()):
+            remaining_batches = []
+            for batch in self.batches[key]:
+                if batch.shard in shards:
+                    self._untrack(batch.components)
+                    n += 1
+                else:
+                    remaining_batches.append(batch)
+            if remaining_batches:
+                self.batches[key] = remaining_batches
+            else:
+                del self.batches[key]
+        if n:
+            LOGGER.info('Handed off {} batches for shards {}'.format(n, sorted(shards)))
+
+    def snapshot(self):
+        """
+        Returns a copy of the current state for reporting, built from new objects so that it can be
+        read from other threads while the manager continues to change.  See batcher.introspection.
+        """
+        now = self.clock.time()
+        batches = []
+        component_index = {}
+        for key, key_batches in self.batches.items():
+            for batch in key_batches:
+                batch_data = batch.snapshot(now)
+                batch_data['batch_key'] = key
+                batches.append(batch_data)
+                for component_id in batch_data['component_ids']:
+                    component_index[component_id] = {
+                        'batch_key': key,
+                        'session_name': batch.session_name or None,
+                        'status': 'in_flight' if batch.session_name else 'waiting',
+                    }
+        return {
+            'generated_at': now,
+            'open_batches': [batch for batch in batches if not batch['session_name']],
+            'in_flight_sessions': [batch for batch in batches if batch['session_name']],
+            'tracked_components': len(self.tracked_ids),
+            'backoff': {
+                'global': self.global_backoff.snapshot(now),
+                'configurations': {key: backoff.snapshot(now) for key, backoff in self.backoffs.items()},
+            },
+            'shards': sorted(self.shard.owned) if self.shard else None,
+            'options': dict(options.options),
+            'latency': metrics.latency.report(),
+            'arrival_rates': self.arrival_rates.snapshot(now),
+            'startup': {
+                'rebuilding': self.rebuilding,
+                'time_to_first_dispatch': self.first_dispatch - self.started if self.first_dispatch else None,
+            },
+            'component_index': component_index,
+        }
 
     """
     Backoff functions
-    This is intended to help avoid runaway configuration attempts in cases where configuration
-    will never succeed, such as invalid desired configuration with an unlimited number of
-    retires.
+    See batcher.backoff for details.
     """
 
-    def update_backoff(self):
-        if any(self.recent_sessions):  # At least one session succeeded
-            if self.current_backoff != 0:
-                self.current_backoff = 0
-                LOGGER.info('A session has succeeded.  Resuming normal operations')
-            return
+    @staticmethod
+    def _backoff_key(key, batch):
+        if options.backoff_scope == 'batch_key':
+            return key
+        return batch.config_name
 
-        if time.time() - self.backoff_start >= self.current_backoff:  # The previous backoff expired
-            if self.current_backoff == 0:
-                self.current_backoff = min(options.max_backoff, STARTING_BACKOFF)
-            else:
-                self.current_backoff = min(options.max_backoff, self.current_backoff * 2)
-            LOGGER.warning('The {} most recent configuration sessions have failed. Halting session '
-                           'creation for {} seconds'.format(RECENT_SESSIONS_SIZE,
-                                                            self.current_backoff))
-            self.backoff_start = time.time()
+    def _record_session(self, key, batch, success):
+        if success and any(component.first_seen is not None for component in batch.components):
+            # Rebuilt batches were started by a previous batcher, so their runtime is not known
+            self.costs.record(batch.config_name, batch.config_limit, self.clock.time() - batch.batch_start)
+        backoff_key = self._backoff_key(key, batch)
+        self.global_backoff.record(success, key=backoff_key)
+        if backoff_key not in self.backoffs:
+            if success:
+                return
+            self.backoffs[backoff_key] = Backoff('configuration {}'.format(backoff_key), clock=self.clock)
+        self.backoffs[backoff_key].record(success)
+
+    def update_backoff(self):
+        for backoff_key in list(self.backoffs.keys()):
+            backoff = self.backoffs[backoff_key]
+            backoff.update()
+            if backoff.healthy:
+                # A new backoff behaves the same as one whose most recent session succeeded
+                del self.backoffs[backoff_key]
+        # Configurations that are already backing off must not also halt the others
+        self.global_backoff.update(ignored_keys={backoff_key for backoff_key, backoff in self.backoffs.items()
+                                                 if backoff.active()})
 
     def backoff(self):
-        if time.time() - self.backoff_start < self.current_backoff:
-            return True
-        return False
+        return self.global_backoff.active()
 
-    def _rebuild_state(self):
-        sessions_data = sessions.get_sessions(parameters={"limit":1})
+    def _tracked_sessions(self):
+        return set(batch.session_name for batches in self.batches.values() for batch in batches)
+
+    def _find_in_flight_sessions(self, shards=None, tracked_sessions=()):
+        """
+        Returns (session, shard) for each incomplete batcher session that is not already tracked.
+        If shards is given, only sessions in those shards are included, otherwise all sessions in the
+        shards owned by this replica are included.
+        """
+        if self.shard and shards is None:
+            shards = self.shard.owned
+        sessions_data = sessions.get_sessions(parameters={"limit":1}, deadline=self._deadline())
         while sessions_data is None:
             LOGGER.info('Waiting for CFS to become available')
-            sessions_data = sessions.get_sessions(parameters={"limit":1})
-            time.sleep(1)
-        n = 0
-        for session in sessions.iter_sessions():
+            sessions_data = sessions.get_sessions(parameters={"limit":1}, deadline=self._deadline())
+            self.clock.sleep(1)
+        in_flight = []
+        for session in sessions.iter_sessions(deadline=self._deadline()):
             status = session.get('status', {}).get('session', {}).get('status', '')
             if 'batcher' in session.get('name', '') and status != 'complete':
-                batch = Batch.rebuild_from_session(session)
-                if batch.components:
-                    batch_key = next(iter(batch.components)).batch_key
-                    self.batches[batch_key].append(batch)
-                    n += 1
+                if session.get('name') in tracked_sessions:
+                    continue
+                shard = None
+                if self.shard:
+                    shard = self.shard.shard_of_session(session)
+                    if shard not in shards:
+                        continue
+                in_flight.append((session, shard))
+        return in_flight
+
+    def _rebuild_state(self, shards=None):
+        """
+        Rebuilds batches for incomplete batcher sessions.
+        If shards is given, only sessions in those shards are rebuilt, otherwise all sessions in the
+        shards owned by this replica are rebuilt.
+        """
+        n = 0
+        for session, shard in self._find_in_flight_sessions(shards, self._tracked_sessions()):
+            batch = Batch.rebuild_from_session(session, clock=self.clock, deadline=self._deadline())
+            batch.shard = shard
+            if self._add_rebuilt(batch):
+                n += 1
         if n:
             LOGGER.info('Rebuilt previous state.  Found {} incomplete sessions/batches.'.format(n))
 
+    def export_state(self, dispatching=None):
+        """
+        Returns the batches and batching limits as a JSON serializable dictionary, for a standby replica.
+        dispatching maps batches to the names of sessions that are about to be created for them.
+        """
+        dispatching = dispatching or {}
+        batches = []
+        for key_batches in self.batches.values():
+            for batch in key_batches:
+                batch_state = batch.state()
+                if batch in dispatching:
+                    batch_state['session_name'] = dispatching[batch]
+                    batch_state['batch_start'] = self.clock.time()
+                batches.append(batch_state)
+        return {
+            'batches': batches,
+            'dispatching': sorted(dispatching.values()),
+            'capacity_limits': dict(self.capacity_limits),
+            'isolated_ids': sorted(self.isolated_ids),
+        }
+
+    def _restore(self, state):
+        """
+        Restores the state from export_state().  Sessions that were being created when the state was
+        exported are kept if they exist, and otherwise their batches are reopened to be sent again.
+        """
+        dispatching = set(state.get('dispatching', []))
+        n_sessions = 0
+        for batch_state in state['batches']:
+            batch = Batch.from_state(batch_state, clock=self.clock)
+            if batch.session_name in dispatching and not self._session_exists(batch.session_name):
+                batch.session_name = ''
+                batch.batch_start = None
+            if self._add_rebuilt(batch) and batch.session_name:
+                n_sessions += 1
+        self.capacity_limits = dict(state.get('capacity_limits', {}))
+        self.isolated_ids = set(state.get('isolated_ids', []))
+        self.rebuilding = False
+        self.rebuilding_ids = set()
+        LOGGER.info('Restored state with %d batches and %d in-flight sessions',
+                    len(state['batches']), n_sessions)
+
+    @staticmethod
+    def _session_exists(session_name):
+        """False only if CFS reports that the session does not exist"""
+        try:
+            sessions.get_session(session_name, deadline=BatchManager._deadline())
+        except HTTPError as e:
+            if e.response.status_code == 404:
+                return False
+        return True
+
+    def _add_rebuilt(self, batch):
+        if not batch.components:
+            return False
+        batch_key = next(iter(batch.components)).batch_key
+        self.batches[batch_key].append(batch)
+        self._track(batch.components)
+        return True
+
+    def _rebuild_worker(self):
+        """
+        Finds the in-flight sessions and then rebuilds their batches, passing the results to
+        _reconcile_rebuild() through self.rebuilt.  Runs in a background thread with background_rebuild.
+        """
+        while True:
+            try:
+                in_flight = self._find_in_flight_sessions()
+                break
+            except Exception:
+                LOGGER.warning("Finding in-flight sessions was interrupted. Trying again...")
+                self.clock.sleep(1)
+        self.rebuilt.put(set(component_id for session, _ in in_flight
+                             for component_id in (session['ansible'].get('limit') or '').split(',')
+                             if component_id))
+        for session, shard in in_flight:
+            while True:
+                try:
+                    batch = Batch.rebuild_from_session(session, clock=self.clock, deadline=self._deadline())
+                    break
+                except Exception:
+                    LOGGER.warning("Rebuilding session %s was interrupted. Trying again...",
+                                   session.get('name'))
+                    self.clock.sleep(1)
+            batch.shard = shard
+            self.rebuilt.put(batch)
+        self.rebuilt.put(None)
+
+    def _reconcile_rebuild(self):
+        """Applies the results of _rebuild_worker() that are available so far"""
+        while self.rebuilding:
+            try:
+                result = self.rebuilt.get_nowait()
+            except queue.Empty:
+                return
+            if result is None:
+                self.rebuilding = False
+                self.rebuilding_ids = set()
+                n = sum(1 for batches in self.batches.values() for batch in batches if batch.session_name)
+                LOGGER.info('Rebuilt previous state after %.1f seconds.  Tracking %d incomplete '
+                            'sessions/batches.', self.clock.time() - self.started, n)
+            elif isinstance(result, set):
+                self.rebuilding_ids = result
+                self._release_in_flight(result)
+            elif result.session_name not in self._tracked_sessions() and \
+                    (not self.shard or result.shard in self.shard.owned):
+                self._add_rebuilt(result)
+                self.rebuilding_ids.difference_update(result.component_ids)
+
+    def _release_in_flight(self, component_ids):
+        """Removes components that turned out to be in in-flight sessions from unsent batches"""
+        n = 0
+        for key in list(self.batches.keys()):
+            remaining_batches = []
+            for batch in self.batches[key]:
+                if not batch.session_name:
+                    in_flight = [component for component in batch.components if component.id in component_ids]
+                    if in_flight:
+                        batch.components.difference_update(in_flight)
+                        self._untrack(in_flight)
+                        n += len(in_flight)
+                if batch.components:
+                    remaining_batches.append(batch)
+            if remaining_batches:
+                self.batches[key] = remaining_batches
+            else:
+                del self.batches[key]
+        if n:
+            LOGGER.info('Removed {} components that are already being configured from new batches'.format(n))
+
 
 class Batch(object):
     """Manages a collection of similar components"""
 
-    def __init__(self, component):
+    def __init__(self, component, shard=None, clock=None, capacity=None, cost=1):
+        self.clock = clock or WALL_CLOCK
+        self.capacity = capacity  # Limits the batch to fewer than batch_size components
+        self.cost = cost  # The cost of each component in the batch.  See batcher.cost
         self.components = set()
         self.components.add(component)
+        self.shard = shard
         self.config_name = component.config_name
         self.config_limit = component.config_limit
         self.session_name = ''
         self.batch_start = None  # Starts when the session is sent/loaded
-        self.batch_window_start = time.time()
+        self.batch_window_start = self.clock.time()
+        self.full_time = None  # When the batch filled up, if it has
+        self.timed_out = False  # True if the session was stuck in pending for too long
+        self.failed_ids = set()  # Components with a newly recorded failure when the session failed
+        self.status_checked = 0  # When the session status was last checked.  See BatchManager.check_status
+        # The name of a session that may have been created by a failed attempt.  See create_session
+        self.attempted_session_name = ''
 
     @classmethod
-    def rebuild_from_session(cls, session):
+    def rebuild_from_session(cls, session, clock=None, deadline=None):
         batch = object.__new__(cls)
+        batch.clock = clock or WALL_CLOCK
         batch.components = set()
+        batch.shard = None
         batch.session_name = session.get('name', '')
-        batch.batch_start = time.time()
+        batch.batch_start = batch.clock.time()
+        batch.batch_window_start = batch.batch_start
+        batch.full_time = None
+        batch.timed_out = False
+        batch.capacity = None
+        batch.cost = 1
+        batch.failed_ids = set()
+        batch.status_checked = 0
+        batch.attempted_session_name = ''
         config_data = session['configuration']
         batch.config_name = config_data.get('name')
         batch.config_limit = config_data.get('limit')
         ansible_data = session['ansible']
         component_ids = ansible_data.get('limit').split(',')
-        for component_id in component_ids:
-            batch.components.add(Component(components.get_component(component_id)))
+        for component_data in components.get_components_by_id(component_ids, deadline=deadline):
+            batch.components.add(Component(component_data))
+        return batch
+
+    STATE_FIELDS = ('session_name', 'shard', 'config_name', 'config_limit', 'batch_start',
+                    'batch_window_start', 'full_time', 'timed_out', 'capacity', 'cost')
+
+    def state(self):
+        """Returns the batch as a JSON serializable dictionary for a standby replica.  See batcher.standby"""
+        state = {field: getattr(self, field) for field in self.STATE_FIELDS}
+        state['components'] = [component.state() for component in self.components]
+        state['attempted_session_name'] = self.attempted_session_name
+        return state
+
+    @classmethod
+    def from_state(cls, state, clock=None):
+        """Restores a batch from state()"""
+        batch = object.__new__(cls)
+        batch.clock = clock or WALL_CLOCK
+        for field in cls.STATE_FIELDS:
+            setattr(batch, field, state[field])
+        batch.components = set(Component.from_state(component) for component in state['components'])
+        batch.failed_ids = set()
+        batch.status_checked = 0
+        batch.attempted_session_name = state.get('attempted_session_name', '')
         return batch
 
     @property
@@ -225,88 +815,177 @@ class Batch(object):
         """Add a component if possible"""
         if component in self.components:
             return True  # The component is already in this batch
-        if len(self.components) < options.batch_size and not self.session_name:
-            self.components.add(component)
+        if self.remaining_capacity > 0:
+            self.add_components([component])
             return True
         return False
 
+    def add_components(self, components):
+        """Adds components, without checking the batch's capacity"""
+        self.components.update(components)
+        if self.full_time is None and self.full:
+            self.full_time = self.clock.time()
+
+    @property
+    def ready_time(self):
+        """When the batch became ready to send, either by filling up or by its window expiring"""
+        window_end = self.batch_window_start + options.batch_window
+        if self.full_time is not None:
+            return min(self.full_time, window_end)
+        return window_end
+
+    @property
+    def remaining_capacity(self):
+        """The number of components that can still be added to the batch"""
+        if self.session_name or self.attempted_session_name:
+            return 0  # The session may already have been created with the current components
+        return max(0, self.size_limit - len(self.components))
+
+    @property
+    def size_limit(self):
+        """
+        The maximum number of components in the batch.  With a cost model other than count, this is
+        the number of components that fit in max_batch_cost.  See batcher.cost
+        """
+        limit = options.batch_size
+        if options.cost_model != 'count':
+            limit = max(1, int(options.max_batch_cost // self.cost))
+        if self.capacity:
+            return min(self.capacity, limit)
+        return limit
+
+    @property
+    def ready(self):
+        """True if the batch has no session yet and is full or overdue"""
+        return not self.session_name and (self.full or self.overdue)
+
     def try_send(self):
         """Create a config session for the batch if needed and possible"""
-        if not self.session_name and (self.full or self.overdue):
-            tags = self._get_tags()
-            success, session_name = sessions.create_session(
-                config=self.config_name,
-                config_limit=self.config_limit,
-                components=self.component_ids,
-                tags=tags)
+        if self.ready:
+            session_name = self.attempted_session_name or sessions.new_session_name()
+            success = self.create_session(session_name)
             if success:
-                self.session_name = session_name
-                self.batch_start = time.time()
+                self.sent(session_name)
+            else:
+                self.attempted_session_name = session_name
             return success
         return False
 
-    def check_complete(self):
-        """Cleanup the batch/session if the CFS session is complete"""
+    def create_session(self, session_name, deadline=None):
+        """
+        Creates the CFS session for the batch, without updating the batch.  This is safe to call
+        from a worker thread; the caller applies a successful result with sent().
+        A failed attempt may still have created the session, for example when the response timed out, so
+        when the attempted name is retried the session is only created if CFS reports that it does not exist.
+        """
+        if session_name == self.attempted_session_name:
+            try:
+                if not sessions.get_session(session_name, deadline=deadline):
+                    return False  # Unknown, so try again later
+                LOGGER.info('Session %s was created by an earlier attempt', session_name)
+                return True
+            except HTTPError:
+                pass  # The session does not exist
+        success, _ = sessions.create_session(
+            config=self.config_name,
+            config_limit=self.config_limit,
+            components=self.component_ids,
+            tags=self._get_tags(),
+            name=session_name,
+            deadline=deadline)
+        return success
+
+    def sent(self, session_name):
+        """Records that the batch's session was created"""
+        self.session_name = session_name
+        self.attempted_session_name = ''
+        self.batch_start = self.clock.time()
+        # Batches sent early by the predictive dispatch policy were ready when they were sent
+        metrics.latency.record_session(self.config_name, self.components,
+                                       ready=min(self.ready_time, self.batch_start), created=self.batch_start)
+
+    def check_complete(self, status=None, current_components=None, deadline=None):
+        """
+        Cleanup the batch/session if the CFS session is complete
+        The session status and current component data can be provided if they were already retrieved.
+        """
         complete = False
         success = False
         try:
-            status = self.get_status()
+            if status is None:
+                status = self.get_status(deadline=deadline)
             if status == 'complete' or status == 'failed':
-                self._handle_incomplete_components(status)
+                self._handle_incomplete_components(status, current_components, deadline=deadline)
                 complete = True
+                metrics.latency.record_session(self.config_name, self.components, ready=self.ready_time,
+                                               created=self.batch_start, finished=self.clock.time())
                 if status == 'complete':
                     success = True
             elif status == 'deleted':
-                LOGGER.info('Session {} no longer exists'.format(self.session_name))
+                LOGGER.info('Session %s no longer exists', self.session_name)
                 complete = True
-            elif status == 'pending' and (time.time() - self.batch_start > options.pending_timeout):
+            elif status == 'pending' and (self.clock.time() - self.batch_start > options.pending_timeout):
                 LOGGER.warning('Session {} is stuck in pending and will be deleted.'.format(
                     self.session_name))
-                sessions.delete_session(self.session_name)
+                self.timed_out = True  # The manager deletes timed out sessions together
                 complete = True
         except Exception as e:
             LOGGER.warning('Unexpected exception checking session status: {}'.format(e))
             complete = False
         return complete, success
 
-    def _handle_incomplete_components(self, session_status: str) -> None:
+    def fetch_components(self, deadline=None):
+        """
+        Returns the current data for all components in the batch.
+        A single query is shared by all of the checks made when the batch finishes.
+        """
+        return components.get_components_by_id(self.component_ids, deadline=deadline)
+
+    def _handle_incomplete_components(self, session_status: str, current_components=None,
+                                      deadline=None) -> None:
         """
         This handles two cases where Ansible doesn't update component status.
         1) Ansible was successful but doesn't target the component in question.
         2) Ansible or the pod encounter a failure before tasks can run, such as in inventory.
         """
-        if session_status == 'failed':
-            self.ansible_failure = self._check_ansible_failure()
-        elif session_status != 'complete':
+        if session_status not in ('complete', 'failed'):
             return
+        if current_components is None:
+            current_components = self.fetch_components(deadline=deadline)
+        if session_status == 'failed':
+            self.ansible_failure = self._check_ansible_failure(current_components)
         starting_components_map = {c.id: c for c in self.components}
-        for current_component_data in components.iter_components(ids=','.join(self.component_ids), status='pending'):
+        for current_component_data in current_components:
+            if not is_pending(current_component_data):
+                continue
             # Desired state may be needed to record skipped layers
             current_component = Component(current_component_data, retain_desired_state=True)
             starting_component = starting_components_map[current_component.id]
-            self._check_component_complete(starting_component, current_component, session_status)
+            self._check_component_complete(starting_component, current_component, session_status, deadline)
 
-    def _check_ansible_failure(self) -> bool:
+    def _check_ansible_failure(self, current_components) -> bool:
         """
         Checks if was the cause of the failure.
         In this case at least one component will new have a newly recorded "failed" status
+        The components that failed are recorded in self.failed_ids.
         """
         starting_components_map = {c.id: c for c in self.components}
-        for current_component_data in components.iter_components(ids=','.join(self.component_ids)):
+        for current_component_data in current_components:
             current_component = Component(current_component_data)
             starting_component = starting_components_map[current_component.id]
             if current_component.latest_status == 'failed' and \
                     (not starting_component.latest_timestamp or
                      current_component.latest_timestamp != starting_component.latest_timestamp):
-                return True
-        return False
+                self.failed_ids.add(current_component.id)
+        return bool(self.failed_ids)
 
-    def _check_component_complete(self, component, current_component, session_status):
-        LOGGER.debug('Checking incomplete component {}'.format(component.id))
+    def _check_component_complete(self, component, current_component, session_status, deadline=None):
+        log.debug(LOGGER, 'Checking incomplete component %s', component.id, component_id=component.id)
         if component.desired_state_hash != current_component.desired_state_hash:
             # The component is in a new pending state because the desired config changed
             # Let CFS rerun and sort this case out
-            LOGGER.debug('Desired config changed for component {}'.format(component.id))
+            log.debug(LOGGER, 'Desired config changed for component %s', component.id,
+                      component_id=component.id)
             return
 
         if session_status == 'complete':
@@ -314,19 +993,18 @@ class Batch(object):
             #   component, so Ansible does not report any status for the component
             # This may be true of any number of layers, but because the session is complete
             #   (and successful), we know all skipped layers were intentional on Ansible's part.
-            LOGGER.debug('Updating component {} for skipped layers (session success)'.format(
-                component.id))
-            current_component.set_status('skipped', session_name=self.session_name)
+            log.debug(LOGGER, 'Updating component %s for skipped layers (session success)', component.id,
+                      component_id=component.id)
+            current_component.set_status('skipped', session_name=self.session_name, deadline=deadline)
             return
 
         if session_status == 'failed':
             if not self.ansible_failure:
                 # If session failure was not due to an Ansible component failure, the failure is
                 #   outside Ansible, such as an invalid desired configuration.
-                LOGGER.debug(
-                    'Incrementing error count for component {} due to session failure'.format(
-                        component.id))
-                current_component.increment_error_count(session_name=self.session_name)
+                log.debug(LOGGER, 'Incrementing error count for component %s due to session failure',
+                          component.id, component_id=component.id)
+                current_component.increment_error_count(session_name=self.session_name, deadline=deadline)
                 return
             # else:
             #   It is possible in this case that some layers were skipped before a failure.
@@ -337,34 +1015,56 @@ class Batch(object):
             #       I am not specifically handling this case both to save time in component checking
             #       and to reduce complexity that can cause unexpected behaviors.
 
-        LOGGER.debug('Component {} requires additional configuration'.format(component.id))
+        log.debug(LOGGER, 'Component %s requires additional configuration', component.id,
+                  component_id=component.id)
+
+    def snapshot(self, now):
+        component_ids = sorted(self.component_ids)
+        return {
+            'session_name': self.session_name or None,
+            'config_name': self.config_name,
+            'config_limit': self.config_limit,
+            'shard': self.shard,
+            'age': now - self.batch_window_start,
+            'elapsed': now - self.batch_start if self.batch_start else None,
+            'fill': len(component_ids) / self.size_limit,
+            'cost': len(component_ids) * self.cost,
+            'component_ids': component_ids,
+        }
 
     @property
     def full(self):
         """True if the batch is full"""
-        if len(self.components) >= options.batch_size:
+        if len(self.components) >= self.size_limit:
             return True
         return False
 
     @property
     def overdue(self):
         """True if the batch has been waiting too long"""
-        if (time.time() - self.batch_window_start) > options.batch_window:
+        if (self.clock.time() - self.batch_window_start) > options.batch_window:
             return True
         return False
 
-    def get_status(self):
+    def safe_get_status(self, deadline=None):
+        """Returns the session status, or 'unknown' if the status could not be determined"""
+        try:
+            return self.get_status(deadline=deadline)
+        except Exception as e:
+            LOGGER.warning('Unexpected exception checking session status: {}'.format(e))
+            return 'unknown'
+
+    def get_status(self, deadline=None):
         if self.session_name:
             try:
-                status, succeeded = sessions.get_session_status(self.session_name)
+                status, succeeded = sessions.get_session_status(self.session_name, deadline=deadline)
             except HTTPError as e:
                 if e.response.status_code == 404:
                     return 'deleted'
                 else:
                     return 'unknown'
-            LOGGER.debug(
-                'Session status for {} is status:{} completed:{}'.format(
-                    self.session_name, status, succeeded))
+            log.debug(LOGGER, 'Session status for %s is status:%s completed:%s', self.session_name, status,
+                      succeeded, session_name=self.session_name)
             if succeeded == 'false':
                 return 'failed'
             if succeeded == 'unknown':
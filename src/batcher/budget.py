@@ -0,0 +1,110 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Per-cycle work budgets, so that no phase of the main loop can starve the others.
+
+During a flood, such as a mass reboot, a single discovery pass can read tens of
+thousands of components, and a single status check can finish thousands of
+sessions.  Each phase of a cycle (status checks, discovery and dispatch) is
+given its own Budget of work items and wall time.  When a budget runs out, the
+phase stops and the rest of its work carries over to the next cycle:
+  - Discovery keeps its place in the component listing with a Cursor, and
+    resumes from there rather than starting the listing again.
+  - Status checks start with the sessions that were checked least recently, so
+    every session is checked in turn.
+  - Dispatch sends the batches that have waited longest first.  Sessions are
+    created concurrently, so dispatch is only limited by the number of sessions.
+A budget always allows at least one item, so every phase makes progress in
+every cycle.  A limit of 0 means unlimited.
+"""
+from .clock import WALL_CLOCK
+
+
+class Budget(object):
+    def __init__(self, items=0, seconds=0, clock=None):
+        self.clock = clock or WALL_CLOCK
+        self.items = items
+        self.seconds = seconds
+        self.start = self.clock.time()
+        self.spent = 0
+
+    def spend(self, items=1):
+        self.spent += items
+
+    @property
+    def remaining_time(self):
+        """Seconds left before the time limit, or None if there is no time limit"""
+        if not self.seconds:
+            return None
+        return self.seconds - (self.clock.time() - self.start)
+
+    @property
+    def exhausted(self):
+        if not self.spent:
+            return False
+        if self.items and self.spent >= self.items:
+            return True
+        if self.seconds and self.clock.time() - self.start >= self.seconds:
+            return True
+        return False
+
+    def take(self, iterator):
+        """Yields items from the iterator, one budget item each, until the budget is exhausted"""
+        iterator = iter(iterator)
+        while not self.exhausted:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.spend()
+            yield item
+
+
+class Cursor(object):
+    """
+    Iterates over a listing across cycles, resuming where the previous cycle's budget ran out.
+    source is called to start each new pass over the listing.
+    """
+
+    def __init__(self, source, clock=None):
+        self.clock = clock or WALL_CLOCK
+        self.source = source
+        self.iterator = None
+        self.pass_start = None  # When the current pass started
+        self.pass_complete = False  # True once take() has reached the end of a pass
+
+    def take(self, budget):
+        if self.iterator is None:
+            self.iterator = iter(self.source())
+            self.pass_start = self.clock.time()
+        self.pass_complete = False
+        while not budget.exhausted:
+            try:
+                item = next(self.iterator)
+            except StopIteration:
+                self.iterator = None
+                self.pass_complete = True
+                return
+            budget.spend()
+            yield item
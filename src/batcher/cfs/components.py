@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -21,43 +21,166 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 #
+from concurrent.futures import ThreadPoolExecutor
 import ujson as json
 import logging
+import os
+import threading
+import time
 from requests.exceptions import HTTPError, ConnectionError
 from urllib3.exceptions import MaxRetryError
 
 from batcher.client import requests_retry_session
 from . import ENDPOINT as BASE_ENDPOINT
+from .paging import iter_pages
 
 
 LOGGER = logging.getLogger(__name__)
 ENDPOINT = "%s/%s" % (BASE_ENDPOINT, __name__.lower().split('.')[-1])
 
+"""
+Field projection
 
-def iter_components(**kwargs):
-    """Get information for all CFS sessions"""
-    kwargs['config_details'] = True
-    kwargs['state_details'] = True
-    next_parameters = kwargs
-    while True:
-        data = get_components(parameters=next_parameters)
+The batcher only uses a handful of fields from each component, but queries with
+config and state details return the whole state history and every desired
+layer.  CFS_FIELD_PROJECTION controls how components are trimmed to the fields
+listed in COMPONENT_FIELDS:
+  none   - Components are returned as CFS sent them
+  local  - Components are trimmed after they are decoded
+  server - CFS is also asked to return only the projected fields with the
+           fields query parameter, for CFS versions that support it
+"""
+PROJECTION = os.environ.get('CFS_FIELD_PROJECTION', 'none').lower()
+COMPONENT_FIELDS = ('id', 'enabled', 'error_count', 'tags', 'desired_config', 'configuration_status')
+LAYER_FIELDS = ('clone_url', 'commit', 'playbook', 'status')
+# Only the most recent state entry is used
+STATE_FIELDS = ('status', 'last_updated')
+FIELDS_PARAMETER = ','.join([*COMPONENT_FIELDS,
+                             *['desired_state.' + field for field in LAYER_FIELDS],
+                             *['state.' + field for field in STATE_FIELDS]])
+
+"""
+Lookups by id
+
+Queries for a list of component ids pass the ids in the query string, so long
+lists are split into chunks of at most ID_CHUNK_LENGTH characters to stay within
+URL length limits.  Up to ID_LOOKUP_WORKERS chunks are fetched at a time.
+"""
+ID_CHUNK_LENGTH = int(os.environ.get('CFS_ID_CHUNK_LENGTH', 4000))
+ID_LOOKUP_WORKERS = int(os.environ.get('CFS_ID_LOOKUP_WORKERS', 4))
+
+# Transfer and decoding statistics, reported once per cycle.  See pop_stats.
+_stats_lock = threading.Lock()
+_stats = {'requests': 0, 'bytes': 0, 'parse_time': 0.0}
+
+
+def project_component(data):
+    """Trims component data to the fields used by the batcher"""
+    projected = {field: data[field] for field in COMPONENT_FIELDS if field in data}
+    if 'desired_state' in data:
+        projected['desired_state'] = [{field: layer[field] for field in LAYER_FIELDS if field in layer}
+                                      for layer in data['desired_state']]
+    if data.get('state'):
+        recent_state = data['state'][-1]
+        projected['state'] = [{field: recent_state[field] for field in STATE_FIELDS if field in recent_state}]
+    return projected
+
+
+def _decode(response):
+    """Decodes a response body straight from bytes, recording the size and time taken"""
+    start = time.perf_counter()
+    data = json.loads(response.content)
+    parse_time = time.perf_counter() - start
+    with _stats_lock:
+        _stats['requests'] += 1
+        _stats['bytes'] += len(response.content)
+        _stats['parse_time'] += parse_time
+    return data
+
+
+def pop_stats():
+    """Returns and resets the number of component queries, bytes received and decoding time"""
+    with _stats_lock:
+        stats = dict(_stats)
+        _stats.update(requests=0, bytes=0, parse_time=0.0)
+    return stats
+
+
+def log_stats():
+    """Logs the component data transferred and decoded since the last report"""
+    stats = pop_stats()
+    if stats['requests']:
+        LOGGER.debug('Received {} bytes of component data in {} requests, decoded in {:.3f}s'.format(
+            stats['bytes'], stats['requests'], stats['parse_time']))
+
+
+def _add_detail_parameters(parameters):
+    parameters['config_details'] = True
+    parameters['state_details'] = True
+    if PROJECTION == 'server':
+        parameters['fields'] = FIELDS_PARAMETER
+    return parameters
+
+
+def iter_components(deadline=None, **kwargs):
+    """Get information for all CFS components.  The deadline applies to each page."""
+    def fetch(parameters):
+        return get_components(parameters=parameters, deadline=deadline)
+
+    _add_detail_parameters(kwargs)
+    for data in iter_pages(fetch, kwargs):
         for component in data["components"]:
             yield component
-        next_parameters = data["next"]
-        if not next_parameters:
-            break
 
 
-def get_components(parameters=None):
+def chunk_ids(ids, max_length=None):
+    """Splits a list of ids into comma-separated strings of at most max_length characters"""
+    if max_length is None:
+        max_length = ID_CHUNK_LENGTH
+    chunks = []
+    chunk = []
+    length = 0
+    for id in ids:
+        if chunk and length + 1 + len(id) > max_length:
+            chunks.append(','.join(chunk))
+            chunk = []
+            length = 0
+        length += len(id) + (1 if chunk else 0)
+        chunk.append(id)
+    if chunk:
+        chunks.append(','.join(chunk))
+    return chunks
+
+
+def get_components_by_id(ids, deadline=None, **kwargs):
+    """
+    Get information for the components with the given ids.  Ids that CFS does not know are left out.
+    The ids are queried in chunks, several at a time, and an exception is raised if any chunk fails.
+    """
+    def fetch(chunk):
+        return list(iter_components(ids=chunk, deadline=deadline, **kwargs))
+
+    chunks = chunk_ids(ids)
+    if len(chunks) <= 1:
+        return [component for chunk in chunks for component in fetch(chunk)]
+    with ThreadPoolExecutor(max_workers=min(ID_LOOKUP_WORKERS, len(chunks))) as executor:
+        futures = [executor.submit(fetch, chunk) for chunk in chunks]
+        return [component for future in futures for component in future.result()]
+
+
+def get_components(parameters=None, deadline=None):
     """Get components and state information stored in CFS"""
     if not parameters:
         parameters = {}
-    session = requests_retry_session()
+    session = requests_retry_session(deadline=deadline)
     try:
         response = session.get(ENDPOINT, params=parameters)
         response.raise_for_status()
-        components_data = json.loads(response.text)
-        LOGGER.debug('Received data for {} components'.format(len(components_data["components"])))
+        components_data = _decode(response)
+        if PROJECTION != 'none':
+            components_data['components'] = [project_component(component)
+                                             for component in components_data['components']]
+        LOGGER.debug('Received data for %d components', len(components_data["components"]))
         return components_data
     except (ConnectionError, MaxRetryError) as e:
         LOGGER.error("Unable to connect to CFS: {}".format(e))
@@ -68,17 +191,18 @@ def get_components(parameters=None):
     return None
 
 
-def get_component(id, **kwargs):
+def get_component(id, deadline=None, **kwargs):
     """Get state information for a single component stored in CFS"""
     url = ENDPOINT + '/' + id
     component = {}
-    kwargs['config_details'] = True
-    kwargs['state_details'] = True
-    session = requests_retry_session()
+    _add_detail_parameters(kwargs)
+    session = requests_retry_session(deadline=deadline)
     try:
         response = session.get(url, params=kwargs)
         response.raise_for_status()
-        component = json.loads(response.text)
+        component = _decode(response)
+        if PROJECTION != 'none':
+            component = project_component(component)
     except (ConnectionError, MaxRetryError) as e:
         LOGGER.error("Unable to connect to CFS: {}".format(e))
     except HTTPError as e:
@@ -88,11 +212,11 @@ def get_component(id, **kwargs):
     return component
 
 
-def patch_component(id, patch):
+def patch_component(id, patch, deadline=None):
     """Update the state information for a single Component"""
     success = False
     url = ENDPOINT + '/' + id
-    session = requests_retry_session()
+    session = requests_retry_session(deadline=deadline)
     try:
         response = session.patch(url, json=patch)
         response.raise_for_status()
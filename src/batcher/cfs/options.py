@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -43,6 +43,24 @@ DEFAULTS = {
     'logging_level': 'INFO'
 }
 
+# Options that are only used by the batcher.  These are read from CFS if they are set,
+# but the defaults are not written back to CFS.
+BATCHER_DEFAULTS = {
+    'batcher_backoff_scope': 'config',
+    'batcher_trace': '',
+    'batcher_columnar_ingest': False,
+    'batcher_dispatch_policy': 'window',
+    'batcher_dispatch_min_gain': 1,
+    'batcher_session_retention': 0,
+    'batcher_status_budget': 0,
+    'batcher_discovery_budget': 0,
+    'batcher_dispatch_budget': 0,
+    'batcher_phase_time_budget': 0,
+    'batcher_cost_model': 'count',
+    'batcher_max_batch_cost': 0,
+    'batcher_profile_duration': 0,
+}
+
 
 class Options():
     """
@@ -66,9 +84,9 @@ class Options():
                     patch[key] = value
             self._patch_options(patch)
 
-    def _read_options(self):
+    def _read_options(self, deadline=None):
         """Retrieves the current options from the CFS api"""
-        session = requests_retry_session()
+        session = requests_retry_session(deadline=deadline)
         try:
             response = session.get(ENDPOINT)
             response.raise_for_status()
@@ -81,9 +99,9 @@ class Options():
             LOGGER.error("Non-JSON response from CFS: {}".format(e))
         return {}
 
-    def _patch_options(self, obj):
+    def _patch_options(self, obj, deadline=None):
         """Add missing options to the CFS api"""
-        session = requests_retry_session()
+        session = requests_retry_session(deadline=deadline)
         try:
             response = session.patch(ENDPOINT, json=obj)
             response.raise_for_status()
@@ -93,6 +111,8 @@ class Options():
             LOGGER.error("Unexpected response from CFS: {}".format(e))
 
     def get_option(self, key, type):
+        if key not in self.options and key in BATCHER_DEFAULTS:
+            return type(BATCHER_DEFAULTS[key])
         return type(self.options[key])
 
     @property
@@ -131,5 +151,75 @@ class Options():
     def logging_level(self):
         return self.get_option('logging_level', str)
 
+    @property
+    def backoff_scope(self):
+        """Either 'config' or 'batch_key'.  Failures are tracked and backoffs applied separately for each."""
+        return self.get_option('batcher_backoff_scope', str)
+
+    @property
+    def trace(self):
+        """A comma-separated list of component ids and session names to log debug messages for"""
+        return self.get_option('batcher_trace', str)
+
+    @property
+    def columnar_ingest(self):
+        """If true, each discovery pass is batched as a whole using batcher.columnar"""
+        return self.get_option('batcher_columnar_ingest', bool)
+
+    @property
+    def dispatch_policy(self):
+        """
+        Either 'window' or 'predictive'.  With 'predictive', a batch is also sent before its window
+        expires when fewer than dispatch_min_gain more components are expected to arrive before then.
+        """
+        return self.get_option('batcher_dispatch_policy', str)
+
+    @property
+    def dispatch_min_gain(self):
+        return self.get_option('batcher_dispatch_min_gain', float)
+
+    @property
+    def session_retention(self):
+        """Seconds to keep completed batcher sessions for, or 0 to keep them.  See batcher.sweeper"""
+        return self.get_option('batcher_session_retention', int)
+
+    @property
+    def status_budget(self):
+        """
+        The maximum number of requests for checking and finishing sessions in each cycle, or 0 for no limit.
+        See batcher.budget for this and the other budgets.
+        """
+        return self.get_option('batcher_status_budget', int)
+
+    @property
+    def discovery_budget(self):
+        """The maximum number of pending components to read in each cycle, or 0 for no limit"""
+        return self.get_option('batcher_discovery_budget', int)
+
+    @property
+    def dispatch_budget(self):
+        """The maximum number of sessions to create in each cycle, or 0 for no limit"""
+        return self.get_option('batcher_dispatch_budget', int)
+
+    @property
+    def phase_time_budget(self):
+        """The maximum number of seconds for each phase of a cycle, or 0 for no limit"""
+        return self.get_option('batcher_phase_time_budget', float)
+
+    @property
+    def cost_model(self):
+        """Either 'count', 'layers' or 'runtime'.  How components are weighed in batches.  See batcher.cost"""
+        return self.get_option('batcher_cost_model', str)
+
+    @property
+    def max_batch_cost(self):
+        """The maximum total cost of a batch under the layers and runtime cost models, batch_size if 0"""
+        return self.get_option('batcher_max_batch_cost', float) or self.batch_size
+
+    @property
+    def profile_duration(self):
+        """Seconds to profile all threads for when this changes to a non-zero value.  See batcher.profiler"""
+        return self.get_option('batcher_profile_duration', float)
+
 
 options = Options()
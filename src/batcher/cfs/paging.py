@@ -0,0 +1,106 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Paging helpers for CFS list queries.
+
+iter_pages fetches the next page of a paged query in a background thread while
+the caller is still working through the current page, so that network latency
+overlaps with processing.  At most PREFETCH_DEPTH pages are held ahead of the
+caller.  A depth of 0, set with the CFS_PREFETCH_DEPTH environment variable,
+fetches pages synchronously.
+"""
+import os
+import queue
+import threading
+
+PREFETCH_DEPTH = int(os.environ.get('CFS_PREFETCH_DEPTH', 1))
+# How often a blocked background fetch checks whether the caller has stopped iterating
+POLL_INTERVAL = 1
+
+_PAGE = 'page'
+_ERROR = 'error'
+_END = 'end'
+
+
+def _produce(fetch, parameters):
+    """
+    Yields pages in order.  Iteration stops after an empty page or a page with no next parameters.
+    Empty pages are still yielded so that callers see the same data as a synchronous query.
+    """
+    while True:
+        data = fetch(parameters)
+        yield data
+        if not data:
+            return
+        parameters = data["next"]
+        if not parameters:
+            return
+
+
+def iter_pages(fetch, parameters, depth=None):
+    """
+    Yields the data for each page, where fetch(parameters) returns the data for a page and
+    data["next"] holds the parameters for the following page.
+    Exceptions raised while fetching are raised to the caller when it reaches the failed page.
+    """
+    if depth is None:
+        depth = PREFETCH_DEPTH
+    if depth <= 0:
+        yield from _produce(fetch, parameters)
+        return
+
+    pages = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def prefetch():
+        try:
+            for data in _produce(fetch, parameters):
+                if not put((_PAGE, data)):
+                    return
+        except Exception as e:
+            put((_ERROR, e))
+            return
+        put((_END, None))
+
+    thread = threading.Thread(target=prefetch, name='cfs-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = pages.get()
+            if kind == _END:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stopped.set()
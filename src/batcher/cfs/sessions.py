@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2024 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2024, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -21,25 +21,31 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 #
+from concurrent.futures import ThreadPoolExecutor
 import ujson as json
 import logging
+import os
 from requests.exceptions import HTTPError, ConnectionError
 from urllib3.exceptions import MaxRetryError
 from time import sleep
 import uuid
 
+from batcher import log
 from batcher.client import requests_retry_session
 from . import ENDPOINT as BASE_ENDPOINT
+from .paging import iter_pages
 
 
 LOGGER = logging.getLogger(__name__)
 ENDPOINT = "%s/%s" % (BASE_ENDPOINT, __name__.lower().split('.')[-1])
+# The maximum number of sessions deleted at a time.  Deletes are also rate limited by CFS_WRITE_RATE
+DELETE_WORKERS = int(os.environ.get('CFS_DELETE_WORKERS', 4))
 
 
-def get_session(name):
+def get_session(name, deadline=None):
     """Get a configuration (CFS) session"""
     url = ENDPOINT + '/' + name
-    session = requests_retry_session()
+    session = requests_retry_session(deadline=deadline)
     try:
         response = session.get(url)
         response.raise_for_status()
@@ -56,25 +62,27 @@ def get_session(name):
     return {}
 
 
-def iter_sessions():
-    """Get information for all CFS sessions"""
-    next_parameters = None
-    while True:
-        data = get_sessions(parameters=next_parameters)
-        if not data:
-            LOGGER.warning("Could not retrieve any session data. Retrying.")
-            sleep(1)
-            continue
+def iter_sessions(deadline=None, **filters):
+    """Get information for all CFS sessions, or for those matching CFS query filters such as status"""
+    for data in iter_pages(lambda parameters: _get_sessions_page(parameters, deadline=deadline),
+                           filters or None):
         for session in data["sessions"]:
             yield session
-        next_parameters = data["next"]
-        if not next_parameters:
-            break
 
 
-def get_sessions(parameters=None):
+def _get_sessions_page(parameters, deadline=None):
+    """Get a page of sessions, retrying until data is returned"""
+    while True:
+        data = get_sessions(parameters=parameters, deadline=deadline)
+        if data:
+            return data
+        LOGGER.warning("Could not retrieve any session data. Retrying.")
+        sleep(1)
+
+
+def get_sessions(parameters=None, deadline=None):
     """Get a configuration (CFS) session"""
-    session = requests_retry_session()
+    session = requests_retry_session(deadline=deadline)
     try:
         if not parameters:
             parameters = {}
@@ -93,10 +101,16 @@ def get_sessions(parameters=None):
     return None
 
 
-def create_session(config, config_limit='', components=[], tags=None):
-    """Create a configuration (CFS) session"""
+def new_session_name():
+    """Generates a name for a new batcher session"""
+    return 'batcher-' + str(uuid.uuid4())
+
+
+def create_session(config, config_limit='', components=[], tags=None, name=None, deadline=None):
+    """Create a configuration (CFS) session, optionally with a name from new_session_name()"""
     success = False
-    name = 'batcher-' + str(uuid.uuid4())
+    if name is None:
+        name = new_session_name()
     ansible_limit = ','.join(components)
     data = {'name': name,
             'configuration_name': config,
@@ -105,8 +119,8 @@ def create_session(config, config_limit='', components=[], tags=None):
             'target': {'definition': 'dynamic'}}
     if tags:
         data['tags'] = tags
-    LOGGER.debug('Submitting a session to CFS: {}'.format(data))
-    session = requests_retry_session()
+    log.debug(LOGGER, 'Submitting a session to CFS: %s', data, session_name=name)
+    session = requests_retry_session(deadline=deadline)
     try:
         response = session.post(ENDPOINT, json=data)
         response.raise_for_status()
@@ -118,10 +132,10 @@ def create_session(config, config_limit='', components=[], tags=None):
     return success, name
 
 
-def delete_session(name):
+def delete_session(name, deadline=None):
     """Create a configuration (CFS) session"""
     url = ENDPOINT + '/' + name
-    session = requests_retry_session()
+    session = requests_retry_session(deadline=deadline)
     try:
         response = session.delete(url)
         response.raise_for_status()
@@ -131,9 +145,17 @@ def delete_session(name):
         LOGGER.error("Unexpected response from CFS: {}".format(e))
 
 
-def get_session_status(name):
+def delete_sessions(names, deadline=None):
+    """Delete configuration (CFS) sessions, several at a time.  The deadline applies to each session."""
+    if not names:
+        return
+    with ThreadPoolExecutor(max_workers=min(DELETE_WORKERS, len(names))) as executor:
+        list(executor.map(lambda name: delete_session(name, deadline=deadline), names))
+
+
+def get_session_status(name, deadline=None):
     """Get the status for configuration (CFS) session"""
-    data = get_session(name)
+    data = get_session(name, deadline=deadline)
     session = data.get('status', {}).get('session', {})
     status = session.get('status', 'unknown')
     succeeded = session.get('succeeded', '')
@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2022, 2024 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2022, 2024, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -21,10 +21,387 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 #
-from functools import partial
+"""
+HTTP sessions used for all calls to CFS.
 
+Calls are throttled client side with token buckets, with separate budgets for
+reads, writes and session creation, so that the batcher does not pile more load
+onto CFS when it is degraded.  The rate of each bucket is tuned with additive
+increase/multiplicative decrease (AIMD): the rate is cut whenever CFS responds
+slowly, with 429 or with a 5xx error, and slowly grows again while responses are
+healthy.  Maximum rates can be set with the CFS_READ_RATE, CFS_WRITE_RATE and
+CFS_CREATE_RATE environment variables (calls per second, 0 to disable).
+
+Retries are made here rather than inside urllib3, following the retry policy
+of the session, so that each attempt takes a token and is observed, and a storm
+of errors is not multiplied by unthrottled retries.
+
+Each call also has a deadline that covers all of its retries (CFS_CALL_DEADLINE
+seconds by default, or the deadline given to requests_retry_session).  The read
+timeout of each attempt is cut short by the deadline, and no attempt is made,
+or backoff waited for, past it.  Idempotent calls are made in a worker thread,
+and DeadlineExceeded is raised if they have not finished by the deadline.  The
+worker makes no more attempts after that, and queued calls are cancelled.
+Other calls (creating sessions and patching) are made in the caller's thread,
+so that they are never sent after the caller has given up on them.  With
+CFS_HEDGE_READS, a GET that has not finished within the 95th percentile of
+recent GET latencies is hedged: a duplicate request is sent, and whichever
+response arrives first is used.  Deadline misses, hedges and hedge
+wins are counted for each kind of call and logged each cycle.
+"""
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.exceptions import ConnectionError, RequestException, Timeout
 from requests_retry_session import requests_retry_session as base_requests_retry_session
+from urllib3.util.retry import Retry
 
 from . import PROTOCOL
 
-requests_retry_session = partial(base_requests_retry_session, protocol=PROTOCOL)
+LOGGER = logging.getLogger(__name__)
+
+READ = 'read'
+WRITE = 'write'
+CREATE = 'create'
+BUDGETS = {
+    'GET': READ,
+    'HEAD': READ,
+    'PATCH': WRITE,
+    'PUT': WRITE,
+    'DELETE': WRITE,
+    'POST': CREATE,
+}
+DEFAULT_RATES = {
+    READ: 50,
+    WRITE: 20,
+    CREATE: 5,
+}
+# Rates never fall below this fraction of the maximum rate
+MIN_RATE_FRACTION = 0.05
+DECREASE_FACTOR = 0.5
+# The rate grows by roughly this many calls per second for each second of healthy calls
+INCREASE_STEP = 1.0
+# Rates are cut at most once per interval, so that a burst of errors only counts once
+DECREASE_INTERVAL = 1.0
+DEFAULT_TARGET_LATENCY = 2.0
+DEFAULT_CALL_DEADLINE = 120.0
+# Timeouts of each attempt, in seconds.  Both are cut short by the deadline of the call.
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 10
+# Calls with these methods are idempotent, so they can be left running in a worker after their deadline.
+# Other calls are made in the caller's thread.
+DETACHED_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+# The maximum number of calls in progress, including calls abandoned after their deadline
+CALL_WORKERS = int(os.environ.get('CFS_CALL_WORKERS', 32))
+HEDGE_PERCENTILE = 0.95
+# GETs are only hedged once this many latencies have been seen
+MIN_HEDGE_SAMPLES = 20
+MIN_HEDGE_DELAY = 0.05
+LATENCY_SAMPLES = 256
+
+
+class DeadlineExceeded(ConnectionError):
+    """Raised when a call to CFS, including its retries, does not finish by its deadline"""
+
+
+class TokenBucket(object):
+    """A thread-safe token bucket with an AIMD tuned rate"""
+
+    def __init__(self, name, max_rate, target_latency=DEFAULT_TARGET_LATENCY):
+        self.name = name
+        self.max_rate = float(max_rate)
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.rate = self.max_rate
+        self.target_latency = target_latency
+        # Allow a burst of up to one second of calls
+        self.tokens = self.max_rate
+        self.last_refill = time.monotonic()
+        self.last_decrease = 0
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    @property
+    def enabled(self):
+        return self.max_rate > 0
+
+    def acquire(self, end=None):
+        """
+        Takes a token, sleeping until one is available.  Returns the time spent waiting.
+        If end is given, as a time.monotonic() time, and no token is available by then, no token is
+        taken and None is returned without waiting.
+        """
+        if not self.enabled:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if end is not None and now + wait > end:
+                return None
+            # Tokens are reserved even when none are available, so concurrent callers queue in order
+            self.tokens -= 1
+            self.calls += 1
+            if wait:
+                self.waits += 1
+                self.wait_time += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def observe(self, latency, status_code=None):
+        """Tunes the rate based on the outcome of a call.  A status_code of None means the call failed."""
+        if not self.enabled:
+            return
+        healthy = status_code is not None and status_code != 429 and status_code < 500 and \
+            latency <= self.target_latency
+        with self.lock:
+            if healthy:
+                self.rate = min(self.max_rate, self.rate + INCREASE_STEP / self.rate)
+                return
+            now = time.monotonic()
+            if now - self.last_decrease < DECREASE_INTERVAL:
+                return
+            self.last_decrease = now
+            self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+        LOGGER.warning('CFS is degraded (status {}, {:.1f}s).  Reducing the {} rate limit to '
+                       '{:.1f} calls/s'.format(status_code, latency, self.name, self.rate))
+
+    def pop_stats(self):
+        """Returns and resets the number of calls, the number that waited, and the total wait time"""
+        with self.lock:
+            stats = (self.calls, self.waits, self.wait_time)
+            self.calls = 0
+            self.waits = 0
+            self.wait_time = 0.0
+        return stats
+
+
+class CallStats(object):
+    """Recent GET latencies, used for the hedging delay, and counts of deadline misses and hedges"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.counts = defaultdict(int)  # (counter, call) -> count
+
+    def record_latency(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+
+    def hedge_delay(self):
+        """Returns how long to wait before hedging a GET, or None if too few latencies have been seen"""
+        with self.lock:
+            if len(self.latencies) < MIN_HEDGE_SAMPLES:
+                return None
+            latencies = sorted(self.latencies)
+        return max(MIN_HEDGE_DELAY, latencies[int(HEDGE_PERCENTILE * (len(latencies) - 1))])
+
+    def count(self, counter, call):
+        with self.lock:
+            self.counts[(counter, call)] += 1
+
+    def pop_stats(self):
+        """Returns and resets the counts, as a dictionary of {call: {counter: count}}"""
+        with self.lock:
+            counts = self.counts
+            self.counts = defaultdict(int)
+        stats = defaultdict(dict)
+        for (counter, call), count in counts.items():
+            stats[call][counter] = count
+        return dict(stats)
+
+
+def _bucket_from_environment(budget):
+    max_rate = float(os.environ.get('CFS_{}_RATE'.format(budget.upper()), DEFAULT_RATES[budget]))
+    target_latency = float(os.environ.get('CFS_TARGET_LATENCY', DEFAULT_TARGET_LATENCY))
+    return TokenBucket(budget, max_rate, target_latency=target_latency)
+
+
+LIMITERS = {budget: _bucket_from_environment(budget) for budget in DEFAULT_RATES}
+CALL_STATS = CallStats()
+CALL_DEADLINE = float(os.environ.get('CFS_CALL_DEADLINE', DEFAULT_CALL_DEADLINE))
+HEDGE_READS = os.environ.get('CFS_HEDGE_READS', '').lower() in ('1', 'true', 'yes')
+_call_executor = ThreadPoolExecutor(max_workers=CALL_WORKERS, thread_name_prefix='cfs-call')
+
+
+def call_name(method, url):
+    """Identifies the kind of call for the call stats, e.g. GET sessions/* for a single session"""
+    segments = [segment for segment in urlparse(url).path.split('/') if segment][1:]  # Skip the API version
+    name = '/'.join(segments[:1] + ['*'] * len(segments[1:2]))
+    return '{} {}'.format(method.upper(), name)
+
+
+def _retry_policy(session):
+    """
+    Takes over the retries of the session's adapter, returning its retry policy.  Retries are then
+    made by _send, so that each attempt is throttled and observed, not just each call.
+    """
+    adapter = session.get_adapter('{}://'.format(PROTOCOL))
+    retry = adapter.max_retries
+    adapter.max_retries = Retry(0, read=False)
+    return retry
+
+
+def _cause(error):
+    """Returns the urllib3 error behind a requests exception, as the retry policy expects"""
+    cause = error.args[0] if error.args else None
+    cause = getattr(cause, 'reason', cause)
+    return cause if isinstance(cause, Exception) else None
+
+
+class Call(object):
+    """A call to CFS, shared by its attempts and its hedge"""
+
+    def __init__(self, method, url, deadline, read_timeout):
+        self.method = method.upper()
+        self.name = call_name(method, url)
+        self.limiter = LIMITERS[BUDGETS.get(self.method, READ)]
+        self.deadline = deadline
+        self.end = time.monotonic() + deadline
+        self.read_timeout = read_timeout
+        # Set when the caller stops waiting, so that no more attempts are made
+        self.abandoned = threading.Event()
+
+    def missed(self):
+        """Abandons the call, returning the error to raise.  Each call counts as one deadline miss."""
+        if not self.abandoned.is_set():
+            self.abandoned.set()
+            CALL_STATS.count('deadline_misses', self.name)
+        return DeadlineExceeded('{} did not finish within its {:g}s deadline'.format(
+            self.name, self.deadline))
+
+    def timeout(self):
+        """The connect and read timeouts for the next attempt, cut short by the deadline"""
+        remaining = self.end - time.monotonic()
+        if remaining <= 0 or self.abandoned.is_set():
+            raise self.missed()
+        return (min(CONNECT_TIMEOUT, remaining), min(self.read_timeout, remaining))
+
+
+def _send(call, request, retry, url, args, kwargs):
+    """
+    Makes the attempts of a call, retrying as the session's retry policy allows.  Each attempt takes a
+    token from the limiter and is observed by it.  No attempt is made after the deadline, and backoffs
+    or waits for a token that would end after the deadline are not waited for.
+    """
+    while True:
+        if call.limiter.acquire(call.end) is None:
+            raise call.missed()
+        timeout = call.timeout()
+        response = error = None
+        start = time.monotonic()
+        try:
+            response = request(call.method, url, *args, **dict(kwargs, timeout=timeout))
+        except RequestException as e:
+            error = e
+        latency = time.monotonic() - start
+        call.limiter.observe(latency, None if error else response.status_code)
+        if error is None:
+            if call.method == 'GET' and response.status_code < 500:
+                CALL_STATS.record_latency(latency)
+            retry_after = response.headers.get('Retry-After')
+            if not retry.is_retry(call.method, response.status_code, retry_after is not None):
+                return response
+        if error is not None and _cause(error) is None:
+            return _give_up(call, response, error)  # Not a network error, so it is not retried
+        try:
+            retry = retry.increment(call.method, url, error=_cause(error) if error else None)
+        except Exception:
+            return _give_up(call, response, error)
+        backoff = retry.get_backoff_time()
+        if error is None and retry_after is not None:
+            backoff = max(backoff, retry.parse_retry_after(retry_after))
+        if time.monotonic() + backoff >= call.end or call.abandoned.wait(backoff):
+            return _give_up(call, response, error)
+
+
+def _give_up(call, response, error):
+    """Returns the last response, or raises the last error as urllib3 does once retries are exhausted"""
+    if error is None:
+        return response
+    if isinstance(error, Timeout):
+        if time.monotonic() >= call.end:
+            raise call.missed() from error
+        if not isinstance(error, ConnectionError):
+            raise ConnectionError(error, request=error.request) from error
+    raise error
+
+
+def _first_response(call, attempts):
+    """Returns the first successful response of the attempts, or raises the error of the first attempt"""
+    pending = set(attempts)
+    while pending:
+        remaining = max(0, call.end - time.monotonic())
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            # Attempts that have not started are dropped, and those in progress make no more attempts
+            error = call.missed()
+            for attempt in pending:
+                attempt.cancel()
+            raise error
+        for attempt in done:
+            if attempt.exception() is None:
+                if attempt is not attempts[0]:
+                    CALL_STATS.count('hedge_wins', call.name)
+                    attempts[0].cancel()
+                call.abandoned.set()  # The other attempt's result is not needed
+                return attempt.result()
+    return attempts[0].result()
+
+
+def requests_retry_session(deadline=None, **kwargs):
+    """
+    Returns a requests session with retries, whose attempts are throttled by the shared limiters.
+    Each call, including its retries, must finish within deadline seconds.
+    """
+    session = base_requests_retry_session(protocol=PROTOCOL, **kwargs)
+    request = session.request
+    retry = _retry_policy(session)
+    deadline = deadline or CALL_DEADLINE
+    read_timeout = kwargs.get('read_timeout', READ_TIMEOUT)
+
+    def deadline_request(method, url, *args, **request_kwargs):
+        call = Call(method, url, deadline, read_timeout)
+        if call.method not in DETACHED_METHODS:
+            # Calls that are not idempotent are never left running after the caller has given up on them
+            return _send(call, request, retry, url, args, request_kwargs)
+        attempts = [_call_executor.submit(_send, call, request, retry, url, args, request_kwargs)]
+        hedge_delay = CALL_STATS.hedge_delay() if HEDGE_READS and call.method == 'GET' else None
+        if hedge_delay is not None and hedge_delay < call.end - time.monotonic():
+            done, _ = wait(attempts, timeout=hedge_delay)
+            if not done:
+                # Sessions are not shared across threads, so the hedge has its own
+                hedge_session = base_requests_retry_session(protocol=PROTOCOL, **kwargs)
+                hedge_retry = _retry_policy(hedge_session)
+                attempts.append(_call_executor.submit(_send, call, hedge_session.request, hedge_retry, url,
+                                                      args, request_kwargs))
+                CALL_STATS.count('hedges', call.name)
+        return _first_response(call, attempts)
+
+    session.request = deadline_request
+    return session
+
+
+def log_call_stats():
+    """Logs the calls that missed their deadlines or were hedged since the last report"""
+    for call, counts in sorted(CALL_STATS.pop_stats().items()):
+        LOGGER.info('CFS {} calls: {} deadline misses, {} hedged, {} won by the hedge'.format(
+            call, counts.get('deadline_misses', 0), counts.get('hedges', 0), counts.get('hedge_wins', 0)))
+
+
+def log_limiter_stats():
+    """Logs how long calls have spent waiting on the rate limiters since the last report"""
+    for budget, limiter in LIMITERS.items():
+        calls, waits, wait_time = limiter.pop_stats()
+        if waits:
+            LOGGER.info('{} of {} CFS {} calls waited on the rate limit for {:.1f}s in total '
+                        '(current limit {:.1f} calls/s)'.format(waits, calls, budget, wait_time,
+                                                                limiter.rate))
@@ -0,0 +1,137 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Columnar ingestion of a discovery pass.
+
+Rather than adding pending components to batches one at a time, the pass is
+loaded into a ComponentTable, which holds one column per attribute needed for
+batching, with batch keys interned to integer codes.  Filtering of already
+tracked and duplicate components, grouping by batch key and the assignment of
+components to batches are then done over whole columns.
+
+NumPy is used for the column operations when it is installed; otherwise the
+columns are held in array module buffers and grouped with the sort builtins.
+"""
+from array import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from .component import get_batch_key, get_config_limit, get_latest_state
+
+
+class Interner(object):
+    """Maps strings to small integer codes"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        try:
+            return self.codes[value]
+        except KeyError:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            return code
+
+
+class ComponentTable(object):
+    """A columnar snapshot of the component data found by one discovery pass"""
+
+    def __init__(self):
+        self.ids = []
+        # The raw data is kept so that Components only need to be built for components that are batched
+        self.data = []
+        self.key_codes = array('l')
+        self.shard_codes = array('l')
+        self.keys = Interner()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, component_data, shard=None):
+        """Builds a table from an iterable of component data, using shard to assign each row a shard code"""
+        table = cls()
+        for data in component_data:
+            table.append(data, shard.shard_of_data(data) if shard else 0)
+        return table
+
+    def append(self, data, shard_code=0):
+        latest_status, _ = get_latest_state(data)
+        self.ids.append(data['id'])
+        self.data.append(data)
+        self.key_codes.append(self.keys.code(
+            get_batch_key(data['desired_config'], get_config_limit(data), latest_status)))
+        self.shard_codes.append(shard_code)
+
+    def untracked_rows(self, tracked_ids, owned_shards=None):
+        """
+        Returns the indexes of rows that are not tracked, and are in the owned shards if given.
+        Only the first row of a component that appears more than once is returned, as adding
+        the component tracks it and so the later rows would be skipped by add().
+        """
+        rows = []
+        seen = set()
+        for row, component_id in enumerate(self.ids):
+            if component_id in tracked_ids or component_id in seen:
+                continue
+            if owned_shards is not None and self.shard_codes[row] not in owned_shards:
+                continue
+            seen.add(component_id)
+            rows.append(row)
+        if numpy is not None:
+            return numpy.array(rows, dtype=int)
+        return array('l', rows)
+
+    def groups(self, rows):
+        """
+        Groups rows by batch key and shard.  Yields the batch key, shard code and rows of each group,
+        with the rows of each group in their original order.
+        """
+        if not len(rows):
+            return
+        if numpy is not None:
+            key_codes = numpy.frombuffer(self.key_codes, dtype=self.key_codes.typecode)[rows]
+            shard_codes = numpy.frombuffer(self.shard_codes, dtype=self.shard_codes.typecode)[rows]
+            group_codes = key_codes * (int(shard_codes.max()) + 1) + shard_codes
+            order = numpy.argsort(group_codes, kind='stable')
+            sorted_rows = rows[order]
+            boundaries = numpy.flatnonzero(numpy.diff(group_codes[order])) + 1
+            for group in numpy.split(sorted_rows, boundaries):
+                first = int(group[0])
+                yield self.keys.values[self.key_codes[first]], self.shard_codes[first], group.tolist()
+            return
+        sorted_rows = sorted(rows, key=lambda row: (self.key_codes[row], self.shard_codes[row]))
+        start = 0
+        for i in range(1, len(sorted_rows) + 1):
+            if i == len(sorted_rows) or \
+                    (self.key_codes[sorted_rows[i]], self.shard_codes[sorted_rows[i]]) != \
+                    (self.key_codes[sorted_rows[start]], self.shard_codes[sorted_rows[start]]):
+                first = sorted_rows[start]
+                yield self.keys.values[self.key_codes[first]], self.shard_codes[first], sorted_rows[start:i]
+                start = i
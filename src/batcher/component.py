@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -22,6 +22,7 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #
 import logging
+import zlib
 
 from .cfs import components
 from .cfs.options import options
@@ -29,6 +30,44 @@ from .cfs.options import options
 LOGGER = logging.getLogger(__name__)
 
 
+def is_pending(data):
+    """
+    True if CFS considers the component data to be pending configuration.
+    This is equivalent to querying components with status=pending.
+    """
+    if 'configuration_status' in data:
+        return data['configuration_status'] == 'pending'
+    return any(layer.get('status', '').lower() == 'pending' for layer in data.get('desired_state', []))
+
+
+def get_config_limit(data):
+    """Returns a comma-delimited string listing the layers that still need to be configured"""
+    return ','.join([str(i) for i, layer in enumerate(data.get('desired_state', []))
+                     if layer.get('status', '').lower() == 'pending'])
+
+
+def get_latest_state(data):
+    """Returns the status and timestamp of the most recent state recorded for the component"""
+    state = data.get('state', [])
+    if len(state):
+        recent_state = state[-1]
+        return recent_state['status'], recent_state['last_updated']
+    return '', ''
+
+
+def get_desired_state_hash(data):
+    """
+    Returns a digest of the commits and playbooks of the desired state.  This is stable across processes,
+    unlike hash(), since it is compared with the digests in state restored by a standby replica.
+    """
+    return zlib.crc32(':'.join(
+        [f"{layer['commit']}{layer['playbook']}" for layer in data.get('desired_state', [])]).encode())
+
+
+def get_batch_key(config_name, config_limit, latest_status):
+    return config_name + ':' + config_limit + ':' + latest_status
+
+
 class Component(object):
     """Holds the data, including state, for a single component"""
 
@@ -38,21 +77,13 @@ class Component(object):
         self.tags = data.get('tags', {})
         self.config_name = data['desired_config']
         # config_limit - Comma-delimited string listing the layers that still need to be configured
-        self.config_limit = ','.join([str(i) for i, layer in enumerate(data.get('desired_state', []))
-                                     if layer.get('status', '').lower() == 'pending'])
+        self.config_limit = get_config_limit(data)
         # latest_status/timestamp - Identifies if the most recent config attempt was failed/incomplete
         #   and when the most recent state was recorded
-        self.latest_status = ''
-        self.latest_timestamp = ''
-        state = data.get('state', [])
-        if len(state):
-            recent_state = state[-1]
-            self.latest_status = recent_state['status']
-            self.latest_timestamp = recent_state['last_updated']
+        self.latest_status, self.latest_timestamp = get_latest_state(data)
         # desired_state_hash is to determine if the desired_state has changed without needing to store the whole
         #   desired state data in memory.
-        self.desired_state_hash = hash(':'.join(
-            [f"{layer['commit']}{layer['playbook']}" for layer in data.get('desired_state', [])]))
+        self.desired_state_hash = get_desired_state_hash(data)
         # Only retain desired state when it's actually going to be used
         # This should be reserved for iterating through components and not used for components stored in memory for an
         #   extended period of time to reduce memory consumption
@@ -61,7 +92,25 @@ class Component(object):
             self.desired_state = data.get('desired_state', [])
         # batch_key - Used to determine like components that can be configured together
         #   latest_status is used to separate batches for components that failed, and components that were incomplete
-        self.batch_key = self.config_name + ':' + self.config_limit + ':' + self.latest_status
+        self.batch_key = get_batch_key(self.config_name, self.config_limit, self.latest_status)
+        # first_seen - When discovery first found the component pending.  See batcher.metrics
+        self.first_seen = None
+
+    STATE_FIELDS = ('id', 'error_count', 'tags', 'config_name', 'config_limit', 'latest_status',
+                    'latest_timestamp', 'desired_state_hash', 'batch_key', 'first_seen')
+
+    def state(self):
+        """Returns the component as a JSON serializable dictionary for a standby replica"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    @classmethod
+    def from_state(cls, state):
+        """Restores a component from state()"""
+        component = object.__new__(cls)
+        for field in cls.STATE_FIELDS:
+            setattr(component, field, state[field])
+        component.desired_state = []
+        return component
 
     def __eq__(self, other):
         """Overrides the default implementation"""
@@ -76,7 +125,7 @@ class Component(object):
     def __hash__(self):
         return hash(self.id)
 
-    def set_status(self, status, session_name=None, error_count=None, all_layers=True):
+    def set_status(self, status, session_name=None, error_count=None, all_layers=True, deadline=None):
         for layer in self.desired_state:
             if layer.get('status', '').lower() == 'pending':
                 new_state = {
@@ -89,11 +138,11 @@ class Component(object):
                 patch = {'state_append': new_state}
                 if error_count is not None:
                     patch['error_count'] = error_count
-                components.patch_component(self.id, patch)
+                components.patch_component(self.id, patch, deadline=deadline)
                 if not all_layers:
                     return
 
-    def increment_error_count(self, session_name=None):
+    def increment_error_count(self, session_name=None, deadline=None):
         error_count = self.error_count + 1
         self.set_status('failed', session_name=session_name, error_count=error_count,
-                        all_layers=False)
+                        all_layers=False, deadline=deadline)
@@ -0,0 +1,80 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Cost models for batch formation.
+
+By default every component counts as 1 toward batch_size.  A component with
+many pending layers costs an Ansible session far more than one with a single
+layer, so the batcher_cost_model option can instead weigh components by:
+  count    1 per component (the default)
+  layers   1 per pending layer
+  runtime  the historical runtime of each pending layer, relative to the mean
+           runtime of all layers seen so far, so that an average layer costs 1.
+           Layers without history cost 1.
+With the layers and runtime models, batches are limited by their total cost,
+which may not exceed batcher_max_batch_cost (batch_size by default), rather
+than by batch_size.  Every batch can hold at least one component.
+
+All components in a batch share a batch key, and so the same pending layers,
+so each batch has a single cost per component.  See Batch.size_limit.
+"""
+COST_MODELS = ('count', 'layers', 'runtime')
+# The weight of each new session in the per-layer runtime averages
+RUNTIME_WEIGHT = 0.3
+
+
+def pending_layers(config_limit):
+    return [int(layer) for layer in config_limit.split(',')] if config_limit else []
+
+
+class CostModel(object):
+    def __init__(self):
+        self.layer_runtimes = {}  # (config_name, layer) -> moving average of seconds per layer
+
+    def record(self, config_name, config_limit, runtime):
+        """Records the runtime of a successful session, splitting it evenly across its layers"""
+        layers = pending_layers(config_limit)
+        if not layers or runtime <= 0:
+            return
+        per_layer = runtime / len(layers)
+        for layer in layers:
+            key = (config_name, layer)
+            previous = self.layer_runtimes.get(key)
+            if previous is None:
+                self.layer_runtimes[key] = per_layer
+            else:
+                self.layer_runtimes[key] = previous + RUNTIME_WEIGHT * (per_layer - previous)
+
+    def cost(self, component, model):
+        """The cost of a component under the given model"""
+        if model == 'layers':
+            return max(1, len(pending_layers(component.config_limit)))
+        if model == 'runtime':
+            layers = pending_layers(component.config_limit)
+            if not layers or not self.layer_runtimes:
+                return max(1, len(layers))
+            mean = sum(self.layer_runtimes.values()) / len(self.layer_runtimes)
+            return sum(self.layer_runtimes.get((component.config_name, layer), mean)
+                       for layer in layers) / mean
+        return 1
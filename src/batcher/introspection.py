@@ -0,0 +1,109 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+An optional, read-only HTTP endpoint that reports the batcher's live state.
+
+The main loop publishes a new snapshot of the BatchManager state after each
+cycle.  Snapshots are never modified once published, so requests are served
+from whichever snapshot is current without any locking, and serving requests
+never blocks the main loop.
+
+Enable the endpoint by setting BATCHER_INTROSPECTION_PORT.  Paths:
+  /state                  The full snapshot, excluding the component index
+  /components/<id>        The batch and session for a single component
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import os
+import threading
+
+import ujson as json
+
+LOGGER = logging.getLogger(__name__)
+
+
+class IntrospectionHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        snapshot = self.server.snapshot
+        if snapshot is None:
+            self._respond(503, {'error': 'No state has been published yet'})
+            return
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/state':
+            self._respond(200, {key: value for key, value in snapshot.items() if key != 'component_index'})
+        elif path.startswith('/components/'):
+            component_id = path[len('/components/'):]
+            component = snapshot['component_index'].get(component_id)
+            if component is None:
+                message = 'Component {} is not tracked by the batcher'.format(component_id)
+                self._respond(404, {'error': message, 'generated_at': snapshot['generated_at']})
+            else:
+                self._respond(200, dict(component, id=component_id, generated_at=snapshot['generated_at']))
+        else:
+            self._respond(404, {'error': 'Unknown path {}'.format(path)})
+
+    def _respond(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        LOGGER.debug('%s - %s', self.address_string(), format % args)
+
+
+class IntrospectionServer(object):
+    def __init__(self, port, address='0.0.0.0'):
+        self.httpd = ThreadingHTTPServer((address, port), IntrospectionHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.snapshot = None
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='introspection', daemon=True)
+
+    @classmethod
+    def from_environment(cls):
+        """Returns a started server if BATCHER_INTROSPECTION_PORT is set, or None"""
+        port = int(os.environ.get('BATCHER_INTROSPECTION_PORT', 0))
+        if not port:
+            return None
+        server = cls(port)
+        server.start()
+        LOGGER.info('Serving batcher state on port {}'.format(port))
+        return server
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def publish(self, snapshot):
+        """Replaces the current snapshot.  The snapshot must not be modified after it is published."""
+        self.httpd.snapshot = snapshot
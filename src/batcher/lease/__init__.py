@@ -0,0 +1,123 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Leases are used to coordinate multiple batcher replicas.  A lease is a named,
+time limited claim held by a single holder; the holder must renew the lease
+before it expires or other replicas are free to take it.
+
+The storage of leases is pluggable.  Backends implement the LeaseBackend
+interface and are selected with the BATCHER_LEASE_BACKEND environment variable.
+Every replica must see the same leases, or each replica would hold every lease
+itself, so the file backend requires BATCHER_LEASE_DIRECTORY to be set to a
+directory shared by all replicas.  There is no default directory.
+Backends also store a state document alongside each lease, which can only be
+written by the current holder.  See batcher.standby.
+
+Leases are renewed by a LeaseRenewer thread several times per lease timeout,
+rather than once per cycle, so that a long cycle does not let a lease expire
+while its holder is still working.
+"""
+import logging
+import os
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LEASE_BACKEND = 'file'
+# Leases are renewed this many times per lease timeout
+RENEWALS_PER_TIMEOUT = 3
+
+
+class LeaseBackend(object):
+    """Interface for lease storage"""
+
+    def acquire(self, name, holder, ttl):
+        """
+        Acquires or renews the named lease for ttl seconds.
+        Returns True if the holder now holds the lease, or False if the lease is
+        held by another holder and has not yet expired.
+        """
+        raise NotImplementedError
+
+    def release(self, name, holder):
+        """Releases the named lease if it is held by holder"""
+        raise NotImplementedError
+
+    def holder(self, name):
+        """Returns the current holder of the named lease, or None if the lease is free or expired"""
+        raise NotImplementedError
+
+    def put_state(self, name, holder, state):
+        """
+        Stores a JSON serializable state document for the named lease.
+        Returns True if the state was stored, or False if holder does not currently hold the lease.
+        """
+        raise NotImplementedError
+
+    def get_state(self, name):
+        """Returns the last state document stored for the named lease, or None"""
+        raise NotImplementedError
+
+
+class LeaseRenewer(object):
+    """Calls renew from a daemon thread, every lease_timeout / RENEWALS_PER_TIMEOUT seconds, until stopped"""
+
+    def __init__(self, name, renew, lease_timeout):
+        self.name = name
+        self.renew = renew
+        self.interval = lease_timeout / RENEWALS_PER_TIMEOUT
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name='{}-lease-renewer'.format(self.name),
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.renew()
+            except Exception:
+                LOGGER.exception('Unable to renew the %s lease', self.name)
+
+
+def get_backend():
+    """Returns the lease backend selected through the environment"""
+    backend = os.environ.get('BATCHER_LEASE_BACKEND', DEFAULT_LEASE_BACKEND)
+    if backend == 'file':
+        directory = os.environ.get('BATCHER_LEASE_DIRECTORY')
+        if not directory:
+            raise ValueError('BATCHER_LEASE_DIRECTORY must be set to a directory shared by all replicas '
+                             'to use the file lease backend')
+        from .file import FileLeaseBackend
+        return FileLeaseBackend(directory)
+    raise ValueError('Unknown lease backend: {}'.format(backend))
@@ -0,0 +1,112 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+A lease backend that stores leases as files in a local directory.
+
+This is intended for testing, and for replicas that share a filesystem.  All
+reads and writes are serialized with an exclusive lock on the directory's lock
+file so that acquiring a lease is atomic across processes.
+"""
+import fcntl
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import ujson as json
+
+from . import LeaseBackend
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FileLeaseBackend(LeaseBackend):
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock_path = os.path.join(self.directory, '.lock')
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, name, suffix='.lease'):
+        return os.path.join(self.directory, name + suffix)
+
+    def _read(self, name, suffix='.lease'):
+        try:
+            with open(self._path(name, suffix), 'r') as lease_file:
+                return json.loads(lease_file.read())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            LOGGER.warning('Ignoring corrupt {} file for {}'.format(suffix, name))
+            return None
+
+    def _write(self, name, data, suffix='.lease'):
+        path = self._path(name, suffix)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as lease_file:
+            lease_file.write(json.dumps(data))
+        os.replace(tmp_path, path)
+
+    def _current_holder(self, name):
+        lease = self._read(name)
+        if lease and lease.get('expires', 0) > time.time():
+            return lease.get('holder')
+        return None
+
+    def acquire(self, name, holder, ttl):
+        with self._locked():
+            current_holder = self._current_holder(name)
+            if current_holder is not None and current_holder != holder:
+                return False
+            self._write(name, {'holder': holder, 'expires': time.time() + ttl})
+            return True
+
+    def release(self, name, holder):
+        with self._locked():
+            lease = self._read(name)
+            if lease and lease.get('holder') == holder:
+                os.remove(self._path(name))
+
+    def holder(self, name):
+        with self._locked():
+            return self._current_holder(name)
+
+    def put_state(self, name, holder, state):
+        with self._locked():
+            if self._current_holder(name) != holder:
+                return False
+            self._write(name, state, suffix='.state')
+            return True
+
+    def get_state(self, name):
+        with self._locked():
+            return self._read(name, suffix='.state')
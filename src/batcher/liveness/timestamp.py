@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2021-2022 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2021-2022, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -32,24 +32,26 @@ from datetime import datetime, timedelta
 
 from batcher.liveness import TIMESTAMP_PATH
 from batcher.cfs.options import Options
+from batcher.clock import WALL_CLOCK
 
 LOGGER = logging.getLogger(__name__)
 
 
 class Timestamp(object):
-    def __init__(self, path=TIMESTAMP_PATH, when=None):
+    def __init__(self, path=TIMESTAMP_PATH, when=None, clock=None):
         '''
         Creates a new timestamp representation to <path>; on initialization,
         this timestamp is written to disk in a persistent fashion.
 
         Newly initialized timestamps with a path reference to an existing file
-        overwrites the file in question.
+        overwrites the file in question.  The current time is read from <clock>.
         '''
         self.path = path
+        self.clock = clock or WALL_CLOCK
         with open(self.path, 'w') as timestamp_file:
             if not when:
                 # how?
-                timestamp_file.write(str(datetime.now().timestamp()))
+                timestamp_file.write(str(self.clock.time()))
             else:
                 timestamp_file.write(str(when.timestamp()))
 
@@ -57,7 +59,7 @@ class Timestamp(object):
         return 'Timestamp from %s; age: %s' % (self.value.strftime("%m/%d/%Y, %H:%M:%S"), self.age)
 
     @classmethod
-    def byref(cls, path):
+    def byref(cls, path, clock=None):
         """
         Creates a new instance of a Timestamp without initializing it to disk.
         This is useful if you simply want to check the existence of a timestamp
@@ -65,6 +67,7 @@ class Timestamp(object):
         """
         self = super().__new__(cls)
         self.path = path
+        self.clock = clock or WALL_CLOCK
         return self
 
     @property
@@ -85,7 +88,7 @@ class Timestamp(object):
         """
         How old this timestamp is, implemented as a timedelta object.
         """
-        return datetime.now() - self.value
+        return datetime.fromtimestamp(self.clock.time()) - self.value
 
     @property
     def options(self):
@@ -0,0 +1,135 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Logging helpers for hot paths.
+
+Messages logged through debug() are only formatted if they will be emitted, and
+per-component and per-session messages are sampled so that a cycle over
+thousands of components cannot flood the log.  Tracing can be turned on for
+specific component ids or session names with the batcher_trace option; traced
+messages are always emitted, at the logger's effective level, and are never
+sampled.
+
+Setting BATCHER_LOG_FORMAT=json emits each record as a single JSON object,
+including the component_id and session_name of the record where known.
+"""
+import logging
+import threading
+import time
+
+import ujson as json
+
+LOG_FORMAT = "%(asctime)-15s - %(process)d - %(thread)d - %(levelname)-7s - %(name)s - %(message)s"
+# At most SAMPLE_LIMIT messages from the same call site are emitted per SAMPLE_INTERVAL seconds
+SAMPLE_LIMIT = 50
+SAMPLE_INTERVAL = 10
+EXTRA_FIELDS = ('component_id', 'session_name', 'trace')
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON objects"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data)
+
+
+def get_formatter(log_format):
+    if log_format == 'json':
+        return JsonFormatter()
+    return logging.Formatter(LOG_FORMAT)
+
+
+class Sampler(object):
+    """Limits how many messages are allowed per key within each interval"""
+
+    def __init__(self, limit=SAMPLE_LIMIT, interval=SAMPLE_INTERVAL):
+        self.limit = limit
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.counts = {}
+
+    def allow(self, key):
+        """Returns a tuple of whether the message is allowed, and the counts suppressed in the last window"""
+        suppressed = {}
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= self.interval:
+                suppressed = {key: count - self.limit for key, count in self.counts.items()
+                              if count > self.limit}
+                self.counts = {}
+                self.window_start = now
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+        return count <= self.limit, suppressed
+
+
+_sampler = Sampler()
+_trace = frozenset()
+
+
+def set_trace(value):
+    """Sets the component ids and session names to trace from a comma-separated string"""
+    global _trace
+    trace = frozenset(item.strip() for item in (value or '').split(',') if item.strip())
+    if trace != _trace:
+        logging.getLogger(__name__).info('Tracing {}'.format(', '.join(sorted(trace)) or 'disabled'))
+        _trace = trace
+
+
+def traced(component_id=None, session_name=None):
+    return bool(_trace) and (component_id in _trace or session_name in _trace)
+
+
+def debug(logger, msg, *args, component_id=None, session_name=None):
+    """
+    Logs a debug message for a component or session.  Formatting is deferred until the
+    message is emitted, as with logger.debug(msg, *args).
+    """
+    extra = {'component_id': component_id, 'session_name': session_name}
+    if traced(component_id, session_name):
+        extra['trace'] = True
+        logger.log(max(logging.DEBUG, logger.getEffectiveLevel()), msg, *args, extra=extra)
+        return
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    allowed, suppressed = _sampler.allow(msg)
+    for key, count in suppressed.items():
+        logger.debug('Suppressed %d messages like "%s"', count, key)
+    if allowed:
+        logger.debug(msg, *args, extra=extra)
@@ -0,0 +1,174 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Tracking of how long components take to be configured.
+
+Each component's lifecycle is timed from when discovery first sees it pending,
+to when its batch is ready to send (full or overdue), to when the session is
+created, to when the session finishes.  These are aggregated per configuration
+into fixed-bucket histograms, so memory use does not grow with the number of
+components:
+  queue_wait       first seen pending -> batch ready
+  dispatch_delay   batch ready -> session created
+  session_runtime  session created -> session finished
+  total            first seen pending -> session finished
+The number of batches sent because they were full, because their window
+expired, or early by the predictive dispatch policy is also counted, so that
+latency can be weighed against the number of sessions created.
+The time taken by each phase of the main loop, and by each cycle as a whole, is
+also recorded, to check that the work budgets keep cycles short.  See
+batcher.budget.
+
+The aggregates are logged as JSON every BATCHER_METRICS_INTERVAL seconds and
+then reset, so each report covers a single interval.
+"""
+from bisect import bisect_left
+import logging
+import os
+import threading
+import time
+
+import ujson as json
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in seconds.  The last bucket is unbounded.
+BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 900, 1200, 1800, 2700, 3600, 7200, 14400, 28800, 86400)
+STAGES = ('queue_wait', 'dispatch_delay', 'session_runtime', 'total')
+# Why batches were sent.  See BatchManager.send_batches
+DISPATCH_REASONS = ('full', 'window', 'early')
+# Phases of a main loop cycle.  See batcher.__main__.run_cycle
+CYCLE_PHASES = ('check_status', 'update_batches', 'send_batches', 'total')
+CYCLE_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+PERCENTILES = (0.5, 0.9, 0.99)
+# Configurations beyond this many are aggregated together, to bound memory
+MAX_CONFIGURATIONS = 100
+OTHER = '(other)'
+DEFAULT_EXPORT_INTERVAL = 300
+
+
+class Histogram(object):
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        value = max(0.0, value)
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        """Estimates a percentile by interpolating within the bucket that contains it"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (target - seen) / count)
+            seen += count
+        return self.max
+
+    def summary(self):
+        summary = {'count': self.count, 'max': self.max,
+                   'mean': self.total / self.count if self.count else 0.0}
+        for fraction in PERCENTILES:
+            summary['p{}'.format(int(fraction * 100))] = self.percentile(fraction)
+        return summary
+
+
+class LatencyTracker(object):
+    def __init__(self, export_interval=DEFAULT_EXPORT_INTERVAL):
+        self.lock = threading.Lock()
+        self.export_interval = export_interval
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.dispatches = dict.fromkeys(DISPATCH_REASONS, 0)
+            self.cycles = {phase: Histogram(CYCLE_BUCKETS) for phase in CYCLE_PHASES}
+            self.window_start = time.time()
+
+    def _histograms(self, config_name):
+        if config_name not in self.histograms and len(self.histograms) >= MAX_CONFIGURATIONS:
+            config_name = OTHER
+        if config_name not in self.histograms:
+            self.histograms[config_name] = {stage: Histogram() for stage in STAGES}
+        return self.histograms[config_name]
+
+    def record_session(self, config_name, components, ready, created, finished=None):
+        """Records the lifecycle of a batch's components, once its session is created or finished"""
+        with self.lock:
+            histograms = self._histograms(config_name)
+            for component in components:
+                if component.first_seen is None:
+                    continue  # Rebuilt components were first seen by a previous batcher
+                if finished is None:
+                    histograms['queue_wait'].record(ready - component.first_seen)
+                    histograms['dispatch_delay'].record(created - ready)
+                else:
+                    histograms['session_runtime'].record(finished - created)
+                    histograms['total'].record(finished - component.first_seen)
+
+    def record_dispatch(self, reason):
+        with self.lock:
+            self.dispatches[reason] += 1
+
+    def record_cycle(self, durations):
+        """Records how long each phase of a main loop cycle took, given a dictionary of seconds per phase"""
+        with self.lock:
+            for phase, seconds in durations.items():
+                self.cycles[phase].record(seconds)
+
+    def report(self):
+        with self.lock:
+            return {
+                'window_start': self.window_start,
+                'dispatches': dict(self.dispatches),
+                'cycles': {phase: histogram.summary() for phase, histogram in self.cycles.items()
+                           if histogram.count},
+                'configurations': {
+                    config_name: {stage: histogram.summary() for stage, histogram in stages.items()}
+                    for config_name, stages in self.histograms.items()},
+            }
+
+    def export_if_due(self):
+        """Logs and resets the aggregates if the export interval has passed"""
+        if time.time() - self.window_start < self.export_interval:
+            return
+        report = self.report()
+        if report['configurations'] or any(report['dispatches'].values()):
+            LOGGER.info('Configuration latency: {}'.format(json.dumps(report)))
+        self.reset()
+
+
+latency = LatencyTracker(int(os.environ.get('BATCHER_METRICS_INTERVAL', DEFAULT_EXPORT_INTERVAL)))
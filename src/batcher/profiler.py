@@ -0,0 +1,193 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+An on-demand sampling profiler, for finding where the batcher spends its time
+in a running pod without attaching an external profiler.
+
+While profiling, a background thread samples the stacks of every other thread
+(the main loop, the liveness heartbeat, the session sweeper and the CFS call
+workers) every BATCHER_PROFILE_INTERVAL seconds using sys._current_frames.
+When the duration has passed, the samples are written in collapsed-stack
+format to batcher-profile-<time>.folded in BATCHER_PROFILE_DIR: one line per
+distinct stack, with the thread name as the root frame, frames separated by
+semicolons and the number of samples last.  This is the input format of
+flamegraph.pl and speedscope.
+
+Profiling is started either by setting the batcher_profile_duration option to
+a number of seconds, or by sending the process SIGUSR1, which profiles for
+BATCHER_PROFILE_DURATION seconds.  The option starts a profile each time it
+changes to a non-zero value, so it can be left set; setting it to another
+value (or to 0 and back) starts another profile.  Only one profile runs at a
+time.
+
+Sampling is only done while profiling, so there is no overhead otherwise.
+Taking a sample holds the GIL, so the overhead is the time spent sampling,
+which is logged with each profile.  Measured with a CPU-bound main loop and
+ten idle threads, each sample took about 0.2ms and the sampler managed about
+65 samples a second at the default interval of 10ms (it waits for the GIL), or
+about 1.3% of the main loop's time.  The change in main loop throughput was
+within run-to-run noise of a few percent.
+"""
+from collections import Counter
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from .clock import WALL_CLOCK
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_DURATION = 60
+DEFAULT_INTERVAL = 0.01
+DEFAULT_DIRECTORY = '/tmp'
+# Stacks deeper than this are truncated at the root, to bound the cost of each sample
+MAX_DEPTH = 100
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return '{}:{}'.format(os.path.basename(code.co_filename), code.co_name)
+
+
+def collapse(frame, thread_name):
+    """Returns the stack of a frame as a collapsed stack, rooted at the thread name"""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ';'.join(reversed(labels))
+
+
+class SamplingProfiler(object):
+    def __init__(self, directory=DEFAULT_DIRECTORY, interval=DEFAULT_INTERVAL,
+                 signal_duration=DEFAULT_DURATION, clock=None):
+        self.directory = directory
+        self.interval = interval
+        self.signal_duration = signal_duration
+        self.clock = clock or WALL_CLOCK
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = threading.Event()
+        self.requested_duration = 0
+        self.last_path = None
+        self.signalled = threading.Event()
+
+    @classmethod
+    def from_environment(cls):
+        return cls(directory=os.environ.get('BATCHER_PROFILE_DIR', DEFAULT_DIRECTORY),
+                   interval=float(os.environ.get('BATCHER_PROFILE_INTERVAL', DEFAULT_INTERVAL)),
+                   signal_duration=float(os.environ.get('BATCHER_PROFILE_DURATION', DEFAULT_DURATION)))
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def update(self, duration):
+        """Starts a profile when the batcher_profile_duration option changes to a non-zero value"""
+        if duration == self.requested_duration:
+            return
+        self.requested_duration = duration
+        if duration > 0:
+            self.start(duration)
+
+    def install_signal_handler(self, signum=signal.SIGUSR1):
+        """
+        Profiles for signal_duration seconds when the process receives signum.  This must be called from
+        the main thread.  The handler runs on the main thread, which may be inside start() holding the
+        lock, so it only sets an event, and a separate thread starts the profile.
+        """
+        threading.Thread(target=self._watch_signals, name='profiler-signal', daemon=True).start()
+        signal.signal(signum, self.handle_signal)
+
+    def handle_signal(self, signum, frame):
+        self.signalled.set()
+
+    def _watch_signals(self):
+        while True:
+            self.signalled.wait()
+            self.signalled.clear()
+            self.start(self.signal_duration)
+
+    def start(self, duration):
+        """Profiles all threads for duration seconds, unless a profile is already running"""
+        with self.lock:
+            if self.running:
+                LOGGER.warning('A profile is already running.  Not starting another')
+                return False
+            LOGGER.info('Profiling all threads for %s seconds', duration)
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, args=(duration,), name='profiler', daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Ends the running profile early.  The samples taken so far are still written"""
+        self.stopped.set()
+
+    def join(self, timeout=None):
+        thread = self.thread
+        if thread:
+            thread.join(timeout)
+
+    def _run(self, duration):
+        try:
+            stacks, samples, sample_time = self.sample(duration)
+            self.last_path = self.write(stacks)
+            LOGGER.info('Wrote %d samples of %d distinct stacks to %s.  '
+                        'Sampling took %.3fs, %.2fms per sample', samples, len(stacks), self.last_path,
+                        sample_time, 1000 * sample_time / samples if samples else 0)
+        except Exception:
+            LOGGER.exception('Unexpected error profiling')
+
+    def sample(self, duration):
+        """Returns the collapsed stacks sampled, the number of samples and the time spent sampling"""
+        stacks = Counter()
+        samples = 0
+        sample_time = 0.0
+        own_ident = threading.get_ident()
+        end = self.clock.time() + duration
+        while self.clock.time() < end and not self.stopped.wait(self.interval):
+            sample_start = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    stacks[collapse(frame, names.get(ident, str(ident)))] += 1
+            sample_time += time.perf_counter() - sample_start
+            samples += 1
+        return stacks, samples, sample_time
+
+    def write(self, stacks):
+        path = os.path.join(self.directory, 'batcher-profile-{}.folded'.format(
+            time.strftime('%Y%m%dT%H%M%S', time.gmtime(self.clock.time()))))
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write('{} {}\n'.format(stack, count))
+        return path
+
+
+profiler = SamplingProfiler.from_environment()
@@ -0,0 +1,168 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Sharding allows multiple batcher replicas to split the components in the system.
+
+Each replica has a home shard, identified by its index, and components are
+assigned to shards with a deterministic hash of either the component id or the
+component's desired configuration name.  Ownership of each shard is tracked
+with a lease, so that when a replica stops renewing its leases the surviving
+replicas take over its shard.  Each replica also holds a membership lease while
+it is alive; a replica holding another replica's home shard releases it as soon
+as that replica is alive again.
+
+Shards are taken over and handed back by the update made each cycle, while the
+leases already held are also renewed from a background thread, so that they do
+not expire during a long cycle.  See batcher.lease.
+"""
+import logging
+import os
+import re
+import socket
+import threading
+import zlib
+
+from . import lease
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LEASE_TIMEOUT = 120
+SHARD_BY_ID = 'id'
+SHARD_BY_CONFIG = 'config'
+
+
+class ShardManager(object):
+    """Tracks which shards this replica currently owns"""
+
+    def __init__(self, count, index, backend, shard_by=SHARD_BY_ID, lease_timeout=DEFAULT_LEASE_TIMEOUT,
+                 holder=None):
+        if not 0 <= index < count:
+            raise ValueError('Shard index {} is not valid for {} shards'.format(index, count))
+        if shard_by not in (SHARD_BY_ID, SHARD_BY_CONFIG):
+            raise ValueError('Unknown shard key: {}'.format(shard_by))
+        self.count = count
+        self.index = index
+        self.backend = backend
+        self.shard_by = shard_by
+        self.lease_timeout = lease_timeout
+        self.holder = holder or '{}-{}'.format(socket.gethostname(), os.getpid())
+        self.owned = set()
+        # Serializes updates with renewals from the background thread
+        self.lock = threading.Lock()
+        self.renewer = lease.LeaseRenewer('shard', self.renew, lease_timeout)
+
+    @classmethod
+    def from_environment(cls):
+        """Returns a ShardManager configured through the environment, or None if sharding is disabled"""
+        count = int(os.environ.get('BATCHER_SHARD_COUNT', 1))
+        if count <= 1:
+            return None
+        index = os.environ.get('BATCHER_SHARD_INDEX')
+        if index is None:
+            # Fall back to the ordinal of a StatefulSet pod name (e.g. cray-cfs-batcher-2)
+            match = re.search(r'-(\d+)$', socket.gethostname())
+            if not match:
+                raise ValueError('BATCHER_SHARD_INDEX must be set when sharding is enabled')
+            index = match.group(1)
+        return cls(count, int(index), lease.get_backend(),
+                   shard_by=os.environ.get('BATCHER_SHARD_BY', SHARD_BY_ID),
+                   lease_timeout=int(os.environ.get('BATCHER_LEASE_TIMEOUT', DEFAULT_LEASE_TIMEOUT)))
+
+    @staticmethod
+    def _shard_lease(shard):
+        return 'shard-{}'.format(shard)
+
+    @staticmethod
+    def _member_lease(shard):
+        return 'replica-{}'.format(shard)
+
+    def shard_of(self, value):
+        """Maps a string to a shard.  This must be stable across processes, so hash() is not used"""
+        return zlib.crc32(value.encode('utf-8')) % self.count
+
+    def shard_of_data(self, component_data):
+        """Returns the shard for raw component data, as returned by CFS"""
+        if self.shard_by == SHARD_BY_CONFIG:
+            return self.shard_of(component_data.get('desired_config', ''))
+        return self.shard_of(component_data['id'])
+
+    def shard_of_component(self, component):
+        if self.shard_by == SHARD_BY_CONFIG:
+            return self.shard_of(component.config_name)
+        return self.shard_of(component.id)
+
+    def shard_of_session(self, session_data):
+        """Sessions, and the batches rebuilt from them, are owned by the shard of their lowest component id"""
+        if self.shard_by == SHARD_BY_CONFIG:
+            return self.shard_of(session_data['configuration'].get('name', ''))
+        return self.shard_of(min(session_data['ansible'].get('limit', '').split(',')))
+
+    def owns_data(self, component_data):
+        return self.shard_of_data(component_data) in self.owned
+
+    def renew(self):
+        """
+        Renews the membership lease and the leases of the owned shards, without taking over or
+        handing back shards.  A shard whose lease was lost is released by the next update().
+        """
+        with self.lock:
+            self.backend.acquire(self._member_lease(self.index), self.holder, self.lease_timeout)
+            for shard in self.owned:
+                if not self.backend.acquire(self._shard_lease(shard), self.holder, self.lease_timeout):
+                    LOGGER.warning('Unable to renew the lease for shard %d', shard)
+
+    def update(self):
+        """
+        Renews this replica's leases and takes over or hands back shards as needed.
+        Returns a tuple of the sets of shards acquired and released by this update.
+        """
+        with self.lock:
+            return self._update()
+
+    def _update(self):
+        acquired = set()
+        released = set()
+        self.backend.acquire(self._member_lease(self.index), self.holder, self.lease_timeout)
+        for shard in range(self.count):
+            name = self._shard_lease(shard)
+            if shard != self.index and self.backend.holder(self._member_lease(shard)) is not None:
+                # The home replica for this shard is alive, so it should own the shard
+                if shard in self.owned:
+                    self.backend.release(name, self.holder)
+                    self.owned.discard(shard)
+                    released.add(shard)
+                continue
+            if self.backend.acquire(name, self.holder, self.lease_timeout):
+                if shard not in self.owned:
+                    self.owned.add(shard)
+                    acquired.add(shard)
+            elif shard in self.owned:
+                # The lease was lost, most likely because it was not renewed in time
+                self.owned.discard(shard)
+                released.add(shard)
+        if acquired:
+            LOGGER.info('Acquired shards: {}'.format(sorted(acquired)))
+        if released:
+            LOGGER.info('Released shards: {}'.format(sorted(released)))
+        return acquired, released
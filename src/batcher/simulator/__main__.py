@@ -0,0 +1,100 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+'''
+Offline batching planner.
+
+Usage:
+    python3 -m batcher.simulator --snapshot components.json \
+        --candidate '{"batch_size": 25, "batch_window": 60}' \
+        --candidate '{"batch_size": 50, "batch_window": 120}'
+
+The snapshot is a JSON list of components as returned by iter_components.
+Arrival times are an optional JSON object mapping component ids to the number
+of seconds after the start of the simulation at which each component becomes
+pending; components without an arrival time are pending from the start.
+'''
+import argparse
+import logging
+import sys
+
+import ujson as json
+
+from batcher.simulator import cfs
+from batcher.simulator.planner import simulate, DEFAULT_HORIZON
+
+COLUMNS = ['sessions_created', 'sessions_failed', 'mean_fill', 'wait_p50', 'wait_p90', 'wait_max',
+           'components_unconfigured', 'total_configuration_time', 'total_session_time']
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='batcher.simulator', description=__doc__.split('\n')[1])
+    parser.add_argument('--snapshot', required=True, help='JSON dump of iter_components output')
+    parser.add_argument('--arrivals', help='JSON object mapping component ids to arrival times in seconds')
+    parser.add_argument('--candidate', action='append', default=[],
+                        help='JSON object of CFS options to simulate.  May be repeated.')
+    parser.add_argument('--session-overhead', type=float, default=cfs.DEFAULT_SESSION_OVERHEAD,
+                        help='Seconds each session takes regardless of size')
+    parser.add_argument('--layer-time', type=float, default=cfs.DEFAULT_LAYER_TIME,
+                        help='Seconds each session takes per configuration layer')
+    parser.add_argument('--component-time', type=float, default=cfs.DEFAULT_COMPONENT_TIME,
+                        help='Seconds each session takes per component')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Probability that a component fails configuration in a session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--horizon', type=float, default=DEFAULT_HORIZON,
+                        help='Maximum number of simulated seconds')
+    parser.add_argument('--json', action='store_true', help='Output the full reports as JSON')
+    return parser.parse_args(argv)
+
+
+def load_json(path):
+    with open(path, 'r') as f:
+        return json.loads(f.read())
+
+
+def main(argv):
+    args = parse_args(argv)
+    component_data = load_json(args.snapshot)
+    arrivals = load_json(args.arrivals) if args.arrivals else {}
+    candidates = [json.loads(candidate) for candidate in args.candidate] or [{}]
+    reports = []
+    for candidate in candidates:
+        reports.append(simulate(component_data, candidate, arrivals=arrivals, horizon=args.horizon,
+                                session_overhead=args.session_overhead, layer_time=args.layer_time,
+                                component_time=args.component_time, failure_rate=args.failure_rate,
+                                seed=args.seed))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    for report in reports:
+        print('Options: {}'.format(json.dumps(report['options'])))
+        for column in COLUMNS:
+            value = report[column]
+            print('  {:<26} {}'.format(column, round(value, 1) if isinstance(value, float) else value))
+        print('  {:<26} {}'.format('fill_distribution', report['fill_distribution']))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main(sys.argv[1:])
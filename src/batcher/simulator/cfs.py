@@ -0,0 +1,298 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+An in-memory stand-in for the CFS API, driven by a virtual clock.
+
+SimulatedCFS provides the same functions that the batcher uses from
+batcher.cfs.components and batcher.cfs.sessions, and models session runtime as
+a fixed overhead plus a cost per configuration layer and per component.
+"""
+import copy
+import random
+import threading
+import uuid
+from contextlib import ExitStack
+from unittest import mock
+
+from requests.exceptions import HTTPError
+
+from batcher.cfs import components as cfs_components
+from batcher.cfs import sessions as cfs_sessions
+from batcher.cfs.options import options as cfs_options
+
+DEFAULT_SESSION_OVERHEAD = 120
+DEFAULT_LAYER_TIME = 60
+DEFAULT_COMPONENT_TIME = 0.5
+
+
+class SimulatedSession(object):
+    def __init__(self, name, config, config_limit, component_ids, start, end):
+        self.name = name
+        self.config = config
+        self.config_limit = config_limit
+        self.component_ids = component_ids
+        self.start = start
+        self.end = end
+        self.finished = False
+        self.succeeded = True
+        self.deleted = False
+
+
+class SimulatedCFS(object):
+    def __init__(self, component_data, clock, arrivals=None, retry_policy=3,
+                 session_overhead=DEFAULT_SESSION_OVERHEAD, layer_time=DEFAULT_LAYER_TIME,
+                 component_time=DEFAULT_COMPONENT_TIME, failure_rate=0.0, seed=0, session_retention=None,
+                 poison=()):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.components = {data['id']: copy.deepcopy(data) for data in component_data}
+        self.arrivals = arrivals or {}
+        self.retry_policy = retry_policy
+        self.session_overhead = session_overhead
+        self.layer_time = layer_time
+        self.component_time = component_time
+        self.failure_rate = failure_rate
+        # Sessions that include any of these components fail before configuring anything
+        self.poison = set(poison)
+        self.random = random.Random(seed)
+        self.sessions = {}
+        # Finished sessions are forgotten this many seconds after they end, if set, so that long
+        # simulations use a bounded amount of memory.  The counts below cover all sessions.
+        self.session_retention = session_retention
+        self.sessions_created = 0
+        self.sessions_failed = 0
+        # configured_at records when each component last had no pending layers
+        self.configured_at = {}
+        self.configurations = 0
+        # in_flight maps components to the session that is configuring them.  A component that is
+        # added to a second session while the first is still in flight is counted in duplicates.
+        self.in_flight = {}
+        self.duplicates = 0
+
+    """
+    Component state
+    """
+
+    def _arrived(self, component_id):
+        return self.arrivals.get(component_id, 0) <= self.clock.time()
+
+    @staticmethod
+    def _pending_layers(data):
+        return [i for i, layer in enumerate(data.get('desired_state', []))
+                if layer.get('status', '').lower() == 'pending']
+
+    def _status(self, data):
+        if not self._pending_layers(data):
+            return 'configured'
+        if data.get('error_count', 0) >= self.retry_policy:
+            return 'failed'
+        return 'pending'
+
+    def _visible(self, data):
+        """Components are only visible to the batcher as pending once they have arrived"""
+        if self._arrived(data['id']):
+            data = dict(data)
+        else:
+            data = copy.deepcopy(data)
+            for layer in data.get('desired_state', []):
+                if layer.get('status', '').lower() == 'pending':
+                    layer['status'] = 'applied'
+        data['configuration_status'] = self._status(data)
+        return data
+
+    def _record_state(self, component_id, layer_index, status, session_name):
+        data = self.components[component_id]
+        layer = data['desired_state'][layer_index]
+        # Like CFS, only the latest state of each current layer is kept
+        desired = set((desired_layer.get('commit'), desired_layer.get('playbook'))
+                      for desired_layer in data['desired_state'])
+        desired.discard((layer.get('commit'), layer.get('playbook')))
+        data['state'] = [state for state in data.get('state', [])
+                         if (state.get('commit'), state.get('playbook')) in desired]
+        data['state'].append({
+            'commit': layer.get('commit'),
+            'playbook': layer.get('playbook'),
+            'status': status,
+            'session_name': session_name,
+            'last_updated': str(self.clock.time())
+        })
+        if status in ('applied', 'skipped'):
+            layer['status'] = status
+        if not self._pending_layers(data):
+            if self.configured_at.get(component_id, -1) < self.arrivals.get(component_id, 0):
+                self.configurations += 1
+            self.configured_at[component_id] = self.clock.time()
+
+    def change_configuration(self, component_ids):
+        """Gives the components a new commit for their first layer, making them pending again"""
+        now = self.clock.time()
+        for component_id in component_ids:
+            data = self.components[component_id]
+            layer = data['desired_state'][0]
+            layer['commit'] = 'change-{:.0f}'.format(now)
+            layer['status'] = 'pending'
+            data['error_count'] = 0
+            self.arrivals[component_id] = now
+
+    def oldest_pending(self):
+        """The arrival time of the component that has been pending the longest, or None"""
+        arrivals = [self.arrivals.get(component_id, 0) for component_id, data in self.components.items()
+                    if self._arrived(component_id) and self._status(data) == 'pending']
+        return min(arrivals) if arrivals else None
+
+    def iter_components(self, **kwargs):
+        ids = kwargs.get('ids')
+        ids = set(ids.split(',')) if ids else None
+        for component_id, data in sorted(self.components.items()):
+            if ids is not None and component_id not in ids:
+                continue
+            if kwargs.get('enabled') and not data.get('enabled', True):
+                continue
+            data = self._visible(data)
+            if kwargs.get('status') and data['configuration_status'] != kwargs['status']:
+                continue
+            yield data
+
+    def get_component(self, id, **kwargs):
+        return self._visible(self.components.get(id, {}))
+
+    def patch_component(self, id, patch, deadline=None):
+        data = self.components[id]
+        if 'error_count' in patch:
+            data['error_count'] = patch['error_count']
+        new_state = patch.get('state_append')
+        if new_state:
+            for i, layer in enumerate(data.get('desired_state', [])):
+                if layer.get('commit') == new_state['commit'] and \
+                        layer.get('playbook') == new_state['playbook']:
+                    self._record_state(id, i, new_state['status'], new_state.get('session_name'))
+                    break
+        return True
+
+    """
+    Sessions
+    """
+
+    def new_session_name(self):
+        return 'batcher-' + str(uuid.UUID(int=self.random.getrandbits(128)))
+
+    def create_session(self, config, config_limit='', components=[], tags=None, name=None, deadline=None):
+        if name is None:
+            name = self.new_session_name()
+        n_layers = len(config_limit.split(',')) if config_limit else 1
+        duration = self.session_overhead + self.layer_time * n_layers + self.component_time * len(components)
+        start = self.clock.time()
+        with self.lock:  # Sessions are created from several threads.  See BatchManager.send_batches
+            self.sessions[name] = SimulatedSession(name, config, config_limit, list(components), start,
+                                                   start + duration)
+            self.sessions_created += 1
+            for component_id in components:
+                if component_id in self.in_flight:
+                    self.duplicates += 1
+                self.in_flight[component_id] = name
+        return True, name
+
+    def _end(self, session):
+        for component_id in session.component_ids:
+            if self.in_flight.get(component_id) == session.name:
+                del self.in_flight[component_id]
+
+    def prune_sessions(self):
+        """Forgets sessions that ended more than session_retention seconds ago"""
+        if self.session_retention is None:
+            return
+        cutoff = self.clock.time() - self.session_retention
+        for name in [name for name, session in self.sessions.items()
+                     if (session.finished or session.deleted) and session.end < cutoff]:
+            del self.sessions[name]
+
+    def _finish(self, session):
+        """Applies the results of a session to its components"""
+        session.finished = True
+        self._end(session)
+        if self.poison.intersection(session.component_ids):
+            session.succeeded = False
+            self.sessions_failed += 1
+            return
+        layers = [int(i) for i in session.config_limit.split(',')] if session.config_limit else []
+        for component_id in session.component_ids:
+            if self.random.random() < self.failure_rate:
+                session.succeeded = False
+                if layers:
+                    self._record_state(component_id, layers[0], 'failed', session.name)
+                continue
+            for i in layers:
+                self._record_state(component_id, i, 'applied', session.name)
+        if not session.succeeded:
+            self.sessions_failed += 1
+
+    def get_session(self, name, deadline=None):
+        session = self.sessions.get(name)
+        if session is None or session.deleted:
+            raise HTTPError(response=mock.Mock(status_code=404))
+        return {'name': name}
+
+    def get_session_status(self, name, deadline=None):
+        session = self.sessions.get(name)
+        if session is None or session.deleted:
+            return 'unknown', ''
+        if self.clock.time() < session.end:
+            return 'running', ''
+        if not session.finished:
+            self._finish(session)
+        return 'complete', 'true' if session.succeeded else 'false'
+
+    def delete_session(self, name, deadline=None):
+        if name in self.sessions:
+            self.sessions[name].deleted = True
+            self._end(self.sessions[name])
+
+    def get_sessions(self, parameters=None, deadline=None):
+        return {'sessions': [], 'next': None}
+
+    def iter_sessions(self, **kwargs):
+        return iter([])
+
+    """
+    Results
+    """
+
+    def done(self):
+        """True once every component has arrived and has no work left"""
+        return all(self._arrived(component_id) and self._status(data) != 'pending'
+                   for component_id, data in self.components.items())
+
+    def installed(self):
+        """Returns a context manager that routes the batcher's CFS calls to this simulation"""
+        stack = ExitStack()
+        for name in ('iter_components', 'get_component', 'patch_component'):
+            stack.enter_context(mock.patch.object(cfs_components, name, getattr(self, name)))
+        for name in ('new_session_name', 'create_session', 'get_session', 'get_session_status',
+                     'delete_session', 'get_sessions', 'iter_sessions'):
+            stack.enter_context(mock.patch.object(cfs_sessions, name, getattr(self, name)))
+        # The options are whatever the simulation has set.  See planner.candidate_options
+        stack.enter_context(mock.patch.object(cfs_options, '_read_options',
+                                              lambda: dict(cfs_options.options)))
+        stack.enter_context(mock.patch.object(cfs_options, '_patch_options', lambda obj: None))
+        return stack
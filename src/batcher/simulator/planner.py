@@ -0,0 +1,114 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Runs the batcher against a simulated CFS to compare candidate options.
+
+The real BatchManager and Batch logic is used, with CFS replaced by
+SimulatedCFS and the batcher running on a VirtualClock, so hours of batching
+complete in seconds.
+"""
+import logging
+from contextlib import contextmanager
+
+from batcher.batch import BatchManager
+from batcher.cfs.options import options, DEFAULTS
+from batcher.clock import VirtualClock
+from .cfs import SimulatedCFS
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_HORIZON = 7 * 24 * 60 * 60
+FILL_BUCKETS = 10
+
+
+@contextmanager
+def candidate_options(candidate):
+    """Temporarily replaces the cached CFS options with a candidate options set"""
+    original = options.options
+    options.options = dict(DEFAULTS, default_playbook='site.yml')
+    options.options.update(candidate)
+    try:
+        yield
+    finally:
+        options.options = original
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def simulate(component_data, candidate, arrivals=None, horizon=DEFAULT_HORIZON, **model):
+    """
+    Runs a single simulation of the batcher main loop until all components are configured, or
+    until the horizon (in simulated seconds) is reached, and returns a report dictionary.
+    Additional keyword arguments are passed to SimulatedCFS to describe the session runtime model.
+    """
+    clock = VirtualClock()
+    arrivals = arrivals or {}
+    with candidate_options(candidate):
+        cfs = SimulatedCFS(component_data, clock, arrivals=arrivals,
+                           retry_policy=options.default_batcher_retry_policy, **model)
+        with cfs.installed():
+            manager = BatchManager(clock=clock)
+            while clock.time() < horizon and not (cfs.done() and not manager.batches):
+                clock.sleep(options.batcher_check_interval)
+                manager.check_status()
+                if not options.disable:
+                    manager.update_batches()
+                    manager.send_batches()
+        return report(cfs, candidate, options.batch_size, clock.time())
+
+
+def report(cfs, candidate, batch_size, end_time):
+    sessions = sorted(cfs.sessions.values(), key=lambda session: session.start)
+    first_dispatch = {}
+    for session in sessions:
+        for component_id in session.component_ids:
+            first_dispatch.setdefault(component_id, session.start)
+    waits = [start - cfs.arrivals.get(component_id, 0) for component_id, start in first_dispatch.items()]
+    fill_distribution = [0] * FILL_BUCKETS
+    for session in sessions:
+        fill = len(session.component_ids) / batch_size
+        fill_distribution[min(FILL_BUCKETS - 1, int(fill * FILL_BUCKETS))] += 1
+    configured = [cfs.configured_at[component_id] for component_id in cfs.components
+                  if component_id in cfs.configured_at]
+    return {
+        'options': candidate,
+        'sessions_created': len(sessions),
+        'sessions_failed': len([session for session in sessions if not session.succeeded]),
+        'mean_fill': (sum(len(session.component_ids) for session in sessions) / batch_size / len(sessions)
+                      if sessions else 0.0),
+        'fill_distribution': fill_distribution,
+        'wait_p50': percentile(waits, 0.5),
+        'wait_p90': percentile(waits, 0.9),
+        'wait_max': max(waits) if waits else 0.0,
+        'components_configured': len(configured),
+        'components_unconfigured': len(cfs.components) - len(configured),
+        'total_configuration_time': max(configured) if configured else 0.0,
+        'total_session_time': sum(session.end - session.start for session in sessions),
+        'simulated_time': end_time,
+    }
@@ -0,0 +1,202 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Long-running soak tests of the batcher against a simulated CFS.
+
+The batcher main loop (see batcher.__main__.run_cycle) runs on a VirtualClock
+for days of simulated time, while configuration changes make a fraction of the
+components pending again at a steady rate.  Memory is sampled with tracemalloc
+and the run is checked against these invariants:
+  memory       traced memory levels off, growing by at most MAX_MEMORY_GROWTH
+               over the second half of the run
+  throughput   no component stays pending for longer than max_lag, and every
+               change made before the final max_lag has been configured
+  duplicates   no component is ever in two in-flight sessions at once
+
+Usage:
+    python3 -m batcher.simulator.soak --components 200 --hours 72
+"""
+import argparse
+import gc
+import logging
+import random
+import sys
+import tracemalloc
+
+import ujson as json
+
+from batcher.__main__ import run_cycle
+from batcher.batch import BatchManager
+from batcher.cfs.options import options
+from batcher.clock import VirtualClock
+from batcher.simulator.cfs import SimulatedCFS
+from batcher.simulator.planner import candidate_options
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_DURATION = 24 * 60 * 60
+DEFAULT_CHANGE_INTERVAL = 15 * 60
+DEFAULT_CHANGE_FRACTION = 0.1
+DEFAULT_MAX_LAG = 60 * 60
+SESSION_RETENTION = 60 * 60
+SAMPLES = 24
+MAX_MEMORY_GROWTH = 0.1
+
+
+def synthetic_components(n, configs=4):
+    return [{'id': 'x{}c0s{}b0n0'.format(3000 + i % configs, i), 'enabled': True, 'error_count': 0,
+             'desired_config': 'config-{}'.format(i % configs), 'tags': {}, 'state': [],
+             'desired_state': [{'commit': 'initial', 'playbook': 'site.yml', 'status': 'pending'}]}
+            for i in range(n)]
+
+
+def traced_memory():
+    """The memory traced by tracemalloc, excluding the records kept by this module"""
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+    return sum(stat.size for stat in snapshot.statistics('filename'))
+
+
+def soak(component_data, candidate, duration=DEFAULT_DURATION, change_interval=DEFAULT_CHANGE_INTERVAL,
+         change_fraction=DEFAULT_CHANGE_FRACTION, max_lag=DEFAULT_MAX_LAG, samples=SAMPLES, **model):
+    """
+    Runs the batcher main loop for duration simulated seconds and returns a report dictionary,
+    including any invariant violations.  Additional keyword arguments are passed to SimulatedCFS.
+    """
+    clock = VirtualClock()
+    changes = random.Random(model.get('seed', 0))
+    component_ids = sorted(data['id'] for data in component_data)
+    n_changes = max(1, int(len(component_ids) * change_fraction))
+    sample_interval = duration / samples
+    timeline = []
+    oldest_pending_age = 0.0
+    with candidate_options(candidate):
+        cfs = SimulatedCFS(component_data, clock, retry_policy=options.default_batcher_retry_policy,
+                           session_retention=SESSION_RETENTION, **model)
+        with cfs.installed():
+            tracemalloc.start()
+            manager = BatchManager(clock=clock)
+            next_change = change_interval
+            next_sample = sample_interval
+            while clock.time() < duration:
+                clock.sleep(options.batcher_check_interval)
+                if clock.time() >= next_change:
+                    cfs.change_configuration(changes.sample(component_ids, n_changes))
+                    next_change += change_interval
+                run_cycle(manager)
+                cfs.prune_sessions()
+                oldest_pending = cfs.oldest_pending()
+                if oldest_pending is not None:
+                    oldest_pending_age = max(oldest_pending_age, clock.time() - oldest_pending)
+                if clock.time() >= next_sample:
+                    gc.collect()
+                    timeline.append({
+                        'time': clock.time(),
+                        'memory': traced_memory(),
+                        'tracked_components': len(manager.tracked_ids),
+                        'batches': sum(len(batches) for batches in manager.batches.values()),
+                        'configurations': cfs.configurations,
+                    })
+                    next_sample += sample_interval
+            tracemalloc.stop()
+        stale = []
+        for component_id in component_ids:
+            changed = cfs.arrivals.get(component_id, 0)
+            if changed < clock.time() - max_lag and cfs.configured_at.get(component_id, -1) < changed:
+                stale.append(component_id)
+    return report(cfs, candidate, timeline, oldest_pending_age, stale, max_lag)
+
+
+def report(cfs, candidate, timeline, oldest_pending_age, stale, max_lag):
+    middle = timeline[len(timeline) // 2]['memory'] if timeline else 0
+    end = timeline[-1]['memory'] if timeline else 0
+    memory_growth = (end - middle) / middle if middle else 0.0
+    hours = timeline[-1]['time'] / 3600 if timeline else 0.0
+    violations = []
+    if memory_growth > MAX_MEMORY_GROWTH:
+        violations.append('Memory grew by {:.0%} over the second half of the run'.format(memory_growth))
+    if oldest_pending_age > max_lag:
+        violations.append('A component was pending for {:.0f} seconds'.format(oldest_pending_age))
+    if stale:
+        violations.append('{} components were not configured within {} seconds of a change'.format(
+            len(stale), max_lag))
+    if cfs.duplicates:
+        violations.append('{} components were added to a session while already in flight'.format(
+            cfs.duplicates))
+    return {
+        'options': candidate,
+        'simulated_hours': hours,
+        'sessions_created': cfs.sessions_created,
+        'sessions_failed': cfs.sessions_failed,
+        'configurations': cfs.configurations,
+        'configurations_per_hour': cfs.configurations / hours if hours else 0.0,
+        'oldest_pending_age': oldest_pending_age,
+        'memory_growth': memory_growth,
+        'memory_peak': max(sample['memory'] for sample in timeline) if timeline else 0,
+        'timeline': timeline,
+        'violations': violations,
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='batcher.simulator.soak', description=__doc__.split('\n')[1])
+    parser.add_argument('--components', type=int, default=200, help='Number of synthetic components')
+    parser.add_argument('--configurations', type=int, default=4, help='Number of distinct configurations')
+    parser.add_argument('--candidate', default='{}', help='JSON object of CFS options to simulate')
+    parser.add_argument('--hours', type=float, default=DEFAULT_DURATION / 3600,
+                        help='Number of simulated hours')
+    parser.add_argument('--change-interval', type=float, default=DEFAULT_CHANGE_INTERVAL,
+                        help='Seconds between configuration changes')
+    parser.add_argument('--change-fraction', type=float, default=DEFAULT_CHANGE_FRACTION,
+                        help='Fraction of components changed each time')
+    parser.add_argument('--max-lag', type=float, default=DEFAULT_MAX_LAG,
+                        help='Seconds a component may stay pending')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Probability that a component fails configuration in a session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Output the full report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    candidate = json.loads(args.candidate)
+    candidate.setdefault('logging_level', 'WARNING')
+    result = soak(synthetic_components(args.components, args.configurations), candidate,
+                  duration=args.hours * 3600, change_interval=args.change_interval,
+                  change_fraction=args.change_fraction, max_lag=args.max_lag,
+                  failure_rate=args.failure_rate, seed=args.seed)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            if key not in ('timeline', 'violations'):
+                print('{:<26} {}'.format(key, round(value, 2) if isinstance(value, float) else value))
+        for violation in result['violations']:
+            print('VIOLATION: {}'.format(violation))
+    return 1 if result['violations'] else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main(sys.argv[1:]))
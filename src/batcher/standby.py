@@ -0,0 +1,131 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Active/passive replicas, so that configuration continues soon after the active
+batcher is lost.
+
+With BATCHER_STANDBY set, each replica competes for the leader lease (see
+batcher.lease).  The replica holding the lease is active, and renews the lease
+from a background thread so that it does not expire during a long cycle, as
+well as at the start of each cycle.  At the end of each cycle it publishes its state alongside the
+lease: its batches, including the components in each, and its batching limits.
+Other replicas are standbys.  They follow the published state while polling
+for the lease, and the first to acquire it after it expires takes over with
+the last published state, rather than rebuilding state from CFS.
+
+Sessions created after the last published state would be unknown to the new
+active replica, so before creating sessions the active replica publishes its
+state again with the names of the sessions it is about to create.  This fails
+if the lease has been lost, in which case no sessions are created.  When a
+standby takes over, each of these sessions that exists is tracked, and the
+batches for the others are reopened and sent again.
+
+Standby replicas are intended for deployments without sharding.  See
+batcher.shard for running several active replicas.
+"""
+import logging
+import os
+import socket
+
+from . import lease
+from .clock import WALL_CLOCK
+
+LOGGER = logging.getLogger(__name__)
+
+LEADER_LEASE = 'leader'
+DEFAULT_LEASE_TIMEOUT = 30
+DEFAULT_POLL_INTERVAL = 2
+# Published state older than this is not trusted, since sessions may have been created since
+DEFAULT_MAX_STATE_AGE = 300
+
+
+class Replica(object):
+    def __init__(self, backend, holder=None, lease_timeout=DEFAULT_LEASE_TIMEOUT,
+                 poll_interval=DEFAULT_POLL_INTERVAL, max_state_age=DEFAULT_MAX_STATE_AGE, clock=None):
+        self.clock = clock or WALL_CLOCK
+        self.backend = backend
+        self.holder = holder or '{}-{}'.format(socket.gethostname(), os.getpid())
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.max_state_age = max_state_age
+        self.state = None  # The last state published by the active replica
+        self.renewer = lease.LeaseRenewer(LEADER_LEASE, self._renew_in_background, lease_timeout)
+
+    @classmethod
+    def from_environment(cls, clock=None):
+        """Returns a Replica configured through the environment, or None if standby is disabled"""
+        if os.environ.get('BATCHER_STANDBY', '').lower() not in ('1', 'true', 'yes'):
+            return None
+        lease_timeout = int(os.environ.get('BATCHER_LEADER_LEASE_TIMEOUT', DEFAULT_LEASE_TIMEOUT))
+        poll_interval = float(os.environ.get('BATCHER_STANDBY_POLL_INTERVAL', DEFAULT_POLL_INTERVAL))
+        return cls(lease.get_backend(), lease_timeout=lease_timeout, poll_interval=poll_interval, clock=clock)
+
+    def renew(self):
+        """Acquires or renews the leader lease.  Returns True if this replica is active"""
+        return self.backend.acquire(LEADER_LEASE, self.holder, self.lease_timeout)
+
+    def _renew_in_background(self):
+        if not self.renew():
+            LOGGER.warning('Unable to renew the leader lease.  It is held by another replica')
+
+    def follow(self):
+        """Reads the state published by the active replica"""
+        self.state = self.backend.get_state(LEADER_LEASE) or self.state
+        return self.state
+
+    def wait_for_leadership(self):
+        """
+        Follows the active replica until this replica acquires the leader lease.
+        Returns the state to restore, or None if the state must be rebuilt.
+        """
+        LOGGER.info('Waiting to become the active replica')
+        while not self.renew():
+            self.follow()
+            self.clock.sleep(self.poll_interval)
+        state = self.follow()
+        if state is None:
+            LOGGER.info('Now the active replica.  No state was published')
+            return None
+        age = self.clock.time() - state['published']
+        if age > self.max_state_age:
+            LOGGER.warning('Now the active replica.  The published state is %d seconds old, so state '
+                           'will be rebuilt', age)
+            return None
+        LOGGER.info('Now the active replica.  Taking over the state published %.1f seconds ago by %s',
+                    age, state['holder'])
+        return state
+
+    def publish(self, state):
+        """
+        Publishes the active replica's state for the standby replicas.  See BatchManager.export_state
+        Returns False if this replica no longer holds the leader lease.
+        """
+        state = dict(state, holder=self.holder, published=self.clock.time())
+        return self.backend.put_state(LEADER_LEASE, self.holder, state)
+
+    def record_dispatch(self, state):
+        """Publishes the state, including sessions about to be created, before they are created"""
+        if not self.renew():
+            return False
+        return self.publish(state)
@@ -0,0 +1,128 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Garbage collection of finished batcher sessions.
+
+Each batch creates a batcher-<uuid> session, and CFS keeps sessions until they
+are deleted, so the session list (and every rebuild that reads it) grows with
+uptime.  When the batcher_session_retention option is set to a number of
+seconds, SessionSweeper deletes completed batcher sessions that finished more
+than that long ago.  Only completed sessions that started before the
+retention are listed, using the CFS query filters, so a sweep does not read
+every session.  Sweeps run in a background thread every
+BATCHER_SWEEP_INTERVAL seconds and delete at most BATCHER_SWEEP_LIMIT sessions
+each, through the write budget of the CFS rate limiter.  See batcher.client.
+
+The retention is never less than MIN_RETENTION, so that the batcher has always
+checked the results of a session before it is deleted.
+"""
+from datetime import datetime, timezone
+import logging
+import os
+import threading
+
+from .cfs import sessions
+from .cfs.options import options
+from .clock import WALL_CLOCK
+
+LOGGER = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = int(os.environ.get('BATCHER_SWEEP_INTERVAL', 15 * 60))
+SWEEP_LIMIT = int(os.environ.get('BATCHER_SWEEP_LIMIT', 500))
+MIN_RETENTION = 15 * 60
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def completion_time(session):
+    """Returns when the session completed as a Unix time, or None if it has not or it is unknown"""
+    status = session.get('status', {}).get('session', {})
+    if status.get('status') != 'complete':
+        return None
+    try:
+        # Fractional seconds and timezone suffixes are ignored.  CFS records times in UTC.
+        completed = datetime.strptime(status.get('completion_time', '')[:19], TIME_FORMAT)
+    except ValueError:
+        return None
+    return completed.replace(tzinfo=timezone.utc).timestamp()
+
+
+def min_age(seconds):
+    """Returns a CFS age filter, in whole minutes, for sessions started at least this long ago"""
+    return '{}m'.format(int(seconds // 60))
+
+
+def expired_sessions(session_list, retention, now):
+    """Returns the names of the completed batcher sessions that finished more than retention seconds ago"""
+    expired = []
+    for session in session_list:
+        if not session.get('name', '').startswith('batcher-'):
+            continue
+        completed = completion_time(session)
+        if completed is not None and completed < now - retention:
+            expired.append(session['name'])
+    return expired
+
+
+class SessionSweeper(object):
+    def __init__(self, interval=SWEEP_INTERVAL, limit=SWEEP_LIMIT, clock=None):
+        self.interval = interval
+        self.limit = limit
+        self.clock = clock or WALL_CLOCK
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                LOGGER.exception('Unexpected error sweeping finished sessions')
+
+    def sweep(self):
+        """Deletes expired sessions if a retention is set, and returns the number deleted"""
+        retention = options.session_retention
+        if retention <= 0:
+            return 0
+        retention = max(retention, MIN_RETENTION)
+        # CFS only returns sessions that completed and started before the retention.  Sessions that started
+        # earlier but completed within the retention are filtered out by their completion time.
+        candidates = sessions.iter_sessions(status='complete', min_age=min_age(retention))
+        expired = expired_sessions(candidates, retention, self.clock.time())
+        if not expired:
+            return 0
+        if len(expired) > self.limit:
+            LOGGER.info('Deleting %d of %d finished sessions older than %d seconds.  The rest will be '
+                        'deleted by later sweeps.', self.limit, len(expired), retention)
+            expired = expired[:self.limit]
+        else:
+            LOGGER.info('Deleting %d finished sessions older than %d seconds', len(expired), retention)
+        sessions.delete_sessions(expired)
+        return len(expired)
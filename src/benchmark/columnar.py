@@ -0,0 +1,63 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Compares batching a discovery pass one component at a time with columnar
+ingestion (batcher_columnar_ingest), for a large number of new components.
+
+    python3 -m benchmark.columnar [n_components]
+"""
+import sys
+import time
+from unittest import mock
+
+from batcher import columnar
+from batcher.cfs.options import options
+from .payloads import synthetic_components, offline_manager
+
+
+def time_update(component_data, columnar_ingest):
+    manager = offline_manager()
+    with mock.patch('batcher.batch.components.iter_components', return_value=iter(component_data)), \
+            mock.patch.dict(options.options, batcher_columnar_ingest=columnar_ingest):
+        start = time.perf_counter()
+        manager.update_batches()
+        elapsed = time.perf_counter() - start
+    n_batches = sum(len(batches) for batches in manager.batches.values())
+    return elapsed, n_batches
+
+
+def main(n):
+    # Smaller payloads keep the memory needed for 100k components reasonable
+    component_data = synthetic_components(n, layers=4, state_history=2)
+    per_component, n_batches = time_update(component_data, False)
+    column, n_column_batches = time_update(component_data, True)
+    assert n_batches == n_column_batches
+    print('Batching {} new components into {} batches (NumPy {})'.format(
+        n, n_batches, 'available' if columnar.numpy is not None else 'not available'))
+    print('  per component: {:8.3f}s'.format(per_component))
+    print('  columnar:      {:8.3f}s'.format(column))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,64 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Measures the cost of discovery (BatchManager.update_batches) per pending
+component, for components that are already tracked and for new components.
+
+    python3 -m benchmark.discovery [n_components]
+"""
+import sys
+import time
+from unittest import mock
+
+from batcher.component import Component
+from .payloads import synthetic_components, offline_manager
+
+
+def time_update(manager, component_data):
+    with mock.patch('batcher.batch.components.iter_components', return_value=iter(component_data)):
+        start = time.perf_counter()
+        manager.update_batches()
+        return time.perf_counter() - start
+
+
+def main(n):
+    component_data = synthetic_components(n)
+    manager = offline_manager()
+    new = time_update(manager, component_data)
+    tracked = time_update(manager, component_data)
+
+    # The cost of the previous approach, which parsed every component before discarding tracked ones
+    start = time.perf_counter()
+    for data in component_data:
+        manager.add(Component(data))
+    parsed = time.perf_counter() - start
+
+    print('Discovery of {} pending components'.format(n))
+    print('  new components:         {:8.2f} us/component'.format(new / n * 1e6))
+    print('  tracked components:     {:8.2f} us/component'.format(tracked / n * 1e6))
+    print('  tracked, fully parsed:  {:8.2f} us/component'.format(parsed / n * 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,98 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Synthetic CFS data of a realistic size for benchmarks.
+"""
+from contextlib import ExitStack
+import random
+from unittest import mock
+
+from batcher.batch import BatchManager
+
+CONFIGURATIONS = ['compute-23.7', 'uan-23.7', 'ncn-worker-23.7', 'ncn-master-23.7']
+ROLES = ['Compute', 'Application', 'Management']
+
+
+def synthetic_component(i, rng, layers=12, state_history=24, pending_layers=None):
+    """Returns component data shaped like a CFS v3 component queried with config and state details"""
+    if pending_layers is None:
+        pending_layers = rng.randint(1, layers)
+    desired_state = []
+    for layer in range(layers):
+        desired_state.append({
+            'clone_url': 'https://api-gw-service-nmn.local/vcs/cray/layer-{}.git'.format(layer),
+            'commit': '{:040x}'.format(rng.getrandbits(160)),
+            'playbook': 'site-{}.yml'.format(layer),
+            'status': 'pending' if layer >= layers - pending_layers else 'applied',
+            'last_updated': '2026-01-01T00:00:00Z',
+            'session_name': 'batcher-{:032x}'.format(rng.getrandbits(128)),
+        })
+    state = []
+    for j in range(state_history):
+        state.append({
+            'clone_url': desired_state[j % layers]['clone_url'],
+            'commit': '{:040x}'.format(rng.getrandbits(160)),
+            'playbook': desired_state[j % layers]['playbook'],
+            'status': rng.choice(['applied', 'applied', 'applied', 'failed', 'skipped']),
+            'last_updated': '2026-01-01T00:{:02d}:{:02d}Z'.format(j // 60 % 60, j % 60),
+            'session_name': 'batcher-{:032x}'.format(rng.getrandbits(128)),
+        })
+    return {
+        'id': 'x{}c{}s{}b0n{}'.format(3000 + i // 1024, i // 256 % 4, i // 4 % 64, i % 4),
+        'enabled': True,
+        'error_count': rng.choice([0, 0, 0, 1, 2]),
+        'retry_policy': 3,
+        'desired_config': rng.choice(CONFIGURATIONS),
+        'configuration_status': 'pending',
+        'tags': {'role': rng.choice(ROLES), 'rack': str(i // 256), 'owner': rng.choice(['ops', 'dev'])},
+        'desired_state': desired_state,
+        'state': state,
+        'logs': 'ara.cmn.example.com/?status=failed&label=x{}'.format(i),
+    }
+
+
+def synthetic_components(n, seed=0, **kwargs):
+    rng = random.Random(seed)
+    return [synthetic_component(i, rng, **kwargs) for i in range(n)]
+
+
+def component_pool(n, distinct=1000, seed=0, **kwargs):
+    """
+    Returns n components of full size, with unique ids, that share the layer and state data of up to
+    distinct generated components.  This keeps the memory needed for 100k components reasonable.
+    """
+    templates = synthetic_components(min(n, distinct), seed=seed, **kwargs)
+    rng = random.Random(seed)
+    return [dict(templates[i % len(templates)], id='x{}c{}s{}b0n{}'.format(
+        3000 + i // 1024, i // 256 % 4, i // 4 % 64, i % 4),
+        tags={'role': rng.choice(ROLES), 'rack': str(i // 256), 'owner': rng.choice(['ops', 'dev'])})
+        for i in range(n)]
+
+
+def offline_manager():
+    """Returns a BatchManager that did not contact CFS to rebuild its state"""
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch('batcher.batch.sessions.get_sessions', return_value={}))
+        stack.enter_context(mock.patch('batcher.batch.sessions.iter_sessions', return_value=iter([])))
+        return BatchManager()
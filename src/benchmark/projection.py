@@ -0,0 +1,72 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Compares the bytes transferred and decoding time for a page of components
+with and without field projection.
+
+    python3 -m benchmark.projection [n_components]
+"""
+import sys
+import time
+
+import ujson as json
+
+from batcher.cfs.components import project_component
+from .payloads import synthetic_components
+
+REPEAT = 5
+
+
+def best_time(function):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(n):
+    component_data = synthetic_components(n)
+    full_body = json.dumps({'components': component_data, 'next': None}).encode('utf-8')
+    projected_body = json.dumps({'components': [project_component(data) for data in component_data],
+                                 'next': None}).encode('utf-8')
+    full_text = full_body.decode('utf-8')
+
+    text_time = best_time(lambda: json.loads(full_text))
+    full_time = best_time(lambda: json.loads(full_body))
+    local_time = best_time(lambda: [project_component(data) for data in json.loads(full_body)['components']])
+    server_time = best_time(lambda: json.loads(projected_body))
+
+    print('Query of {} components'.format(n))
+    print('  {:<34} {:>10} {:>12}'.format('', 'bytes', 'decode (ms)'))
+    print('  {:<34} {:>10} {:>12.1f}'.format('no projection, decoded from text', len(full_body),
+                                             text_time * 1e3))
+    print('  {:<34} {:>10} {:>12.1f}'.format('no projection', len(full_body), full_time * 1e3))
+    print('  {:<34} {:>10} {:>12.1f}'.format('local projection', len(full_body), local_time * 1e3))
+    print('  {:<34} {:>10} {:>12.1f}'.format('server projection', len(projected_body), server_time * 1e3))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
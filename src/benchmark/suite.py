@@ -0,0 +1,202 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Microbenchmarks for the batcher's hot paths, with regression checks.
+
+    python3 -m benchmark.suite [--sizes 1000,10000,100000] [--save-baseline FILE] [--baseline FILE]
+
+Each case is run at each size with full size synthetic components (12 layers,
+24 state records and varied tags, see payloads).  For each, the suite reports:
+  ops/s    operations per second, from the best of several timed runs
+  B/op     the peak memory allocated per operation, traced with tracemalloc in
+           a separate run, since tracing slows down the code being measured
+  kept/op  the memory still allocated per operation after the run
+
+With --baseline, results are compared with a baseline saved with
+--save-baseline, and cases that are slower or allocate more than the tolerance
+are flagged.  The exit status is 1 if there are any regressions.  Baselines are
+specific to the machine and Python version they were recorded with.
+"""
+import argparse
+import gc
+import platform
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+import ujson as json
+
+from batcher.batch import Batch
+from batcher.component import Component
+from .payloads import component_pool, offline_manager
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_TOLERANCE = 0.2
+# Each case is timed at least REPEAT times, and until the runs add up to MIN_TIME seconds
+REPEAT = 3
+MIN_TIME = 1.0
+
+
+def _add_all(manager, components):
+    for component in components:
+        manager.add(component)
+
+
+def _in_flight_manager(components):
+    manager = offline_manager()
+    _add_all(manager, components)
+    for batches in manager.batches.values():
+        for batch in batches:
+            batch.sent('batcher-benchmark')
+    return manager
+
+
+def component_init(component_data):
+    """Parsing component data.  One operation per component"""
+    return (lambda: [Component(data) for data in component_data]), len(component_data)
+
+
+def manager_add(component_data):
+    """Adding new components to batches, starting with no batches.  One operation per component"""
+    components = [Component(data) for data in component_data]
+    return (lambda: _add_all(offline_manager(), components)), len(components)
+
+
+def check_status(component_data):
+    """Status bookkeeping for in-flight batches whose sessions are still running.  One operation per batch"""
+    manager = _in_flight_manager([Component(data) for data in component_data])
+    return manager.check_status, sum(len(batches) for batches in manager.batches.values())
+
+
+def get_tags(component_data):
+    """Finding the tags common to the components of each batch.  One operation per batch"""
+    manager = _in_flight_manager([Component(data) for data in component_data])
+    batches = [batch for key_batches in manager.batches.values() for batch in key_batches]
+
+    def run():
+        for batch in batches:
+            batch._get_tags()
+    return run, len(batches)
+
+
+CASES = [component_init, manager_add, check_status, get_tags]
+
+
+def measure(case, component_data):
+    """Returns the results of a case for the given component data"""
+    run, ops = case(component_data)
+    times = []
+    # As with timeit, garbage collection is disabled while timing
+    gc.collect()
+    gc.disable()
+    try:
+        while len(times) < REPEAT or sum(times) < MIN_TIME:
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    start_size, _ = tracemalloc.get_traced_memory()
+    run()
+    end_size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'ops': ops,
+        'ops_per_sec': ops / max(min(times), 1e-9),
+        'peak_bytes_per_op': (peak - start_size) / ops,
+        'kept_bytes_per_op': (end_size - start_size) / ops,
+    }
+
+
+def run_suite(sizes, cases=CASES):
+    """Returns the results of each case at each size, keyed by case:size"""
+    results = {}
+    for n in sizes:
+        component_data = component_pool(n)
+        # Sessions are never really checked.  See Batch.safe_get_status
+        with mock.patch.object(Batch, 'safe_get_status', lambda batch, **kwargs: 'running'):
+            for case in cases:
+                results['{}:{}'.format(case.__name__, n)] = measure(case, component_data)
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Returns (key, metric, baseline value, value) for each result that regressed beyond the tolerance"""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if result['ops_per_sec'] < previous['ops_per_sec'] * (1 - tolerance):
+            regressions.append((key, 'ops_per_sec', previous['ops_per_sec'], result['ops_per_sec']))
+        # Allocations of a few bytes per operation are noise
+        if result['peak_bytes_per_op'] > max(previous['peak_bytes_per_op'] * (1 + tolerance),
+                                             previous['peak_bytes_per_op'] + 16):
+            regressions.append((key, 'peak_bytes_per_op', previous['peak_bytes_per_op'],
+                                result['peak_bytes_per_op']))
+    return regressions
+
+
+def print_results(results, regressions):
+    flagged = set(key for key, _, _, _ in regressions)
+    print('{:<24} {:>12} {:>10} {:>10}'.format('case', 'ops/s', 'B/op', 'kept/op'))
+    for key, result in results.items():
+        print('{:<24} {:>12.0f} {:>10.0f} {:>10.0f}{}'.format(
+            key, result['ops_per_sec'], result['peak_bytes_per_op'], result['kept_bytes_per_op'],
+            '  REGRESSION' if key in flagged else ''))
+    for key, metric, previous, value in regressions:
+        print('{}: {} went from {:.0f} to {:.0f}'.format(key, metric, previous, value))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='benchmark.suite', description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help='Comma-separated numbers of components')
+    parser.add_argument('--baseline', help='JSON file of previous results to check for regressions')
+    parser.add_argument('--save-baseline', help='JSON file to save the results to')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Fraction by which a result may be worse than the baseline')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_suite([int(n) for n in args.sizes.split(',')])
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file)['results'], args.tolerance)
+    print_results(results, regressions)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            json.dump({'python': platform.python_version(), 'results': results}, baseline_file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+
+from batcher.arrivals import ArrivalRates
+
+
+class ArrivalRatesTest(unittest.TestCase):
+    def test_steady_rate(self):
+        rates = ArrivalRates()
+        for i in range(100):
+            rates.observe({'key': 5}, i * 10)
+        self.assertAlmostEqual(rates.rate('key', 990), 0.5, places=2)
+        self.assertAlmostEqual(rates.expected('key', 990, 20), 10, places=0)
+
+    def test_quiet_period_caps_rate(self):
+        rates = ArrivalRates()
+        rates.observe({'key': 20}, 0)
+        rates.observe({}, 10)
+        rates.observe({}, 40)
+        self.assertLessEqual(rates.rate('key', 40), 1 / 40)
+
+    def test_idle_keys_forgotten(self):
+        rates = ArrivalRates()
+        rates.observe({'key': 1}, 0)
+        rates.observe({}, 3600)
+        self.assertNotIn('key', rates.snapshot(3600))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+
+from batcher.backoff import Backoff, RECENT_SESSIONS_SIZE
+from batcher.clock import VirtualClock
+
+
+class BackoffTest(unittest.TestCase):
+    def _record_failures(self, backoff, n=RECENT_SESSIONS_SIZE, key=None, ignored_keys=()):
+        for _ in range(n):
+            backoff.record(False, key=key)
+        backoff.update(ignored_keys=ignored_keys)
+
+    def test_backoff_after_failures(self):
+        backoff = Backoff('test')
+        self._record_failures(backoff, RECENT_SESSIONS_SIZE - 1)
+        self.assertFalse(backoff.active())
+        self._record_failures(backoff, 1)
+        self.assertTrue(backoff.active())
+
+    def test_success_resets(self):
+        backoff = Backoff('test')
+        self._record_failures(backoff)
+        backoff.record(True)
+        backoff.update()
+        self.assertFalse(backoff.active())
+        self.assertTrue(backoff.healthy)
+
+    def test_exponential(self):
+        clock = VirtualClock(1000)
+        backoff = Backoff('test', clock=clock)
+        self._record_failures(backoff)
+        first = backoff.current_backoff
+        clock.advance(first)
+        self._record_failures(backoff, 1)
+        self.assertEqual(backoff.current_backoff, 2 * first)
+
+    def test_min_keys(self):
+        backoff = Backoff('all configurations', min_keys=2)
+        self._record_failures(backoff, key='broken')
+        self.assertFalse(backoff.active())
+        for _ in range(RECENT_SESSIONS_SIZE // 2):
+            self._record_failures(backoff, 1, key='other')
+        self.assertTrue(backoff.active())
+
+    def test_one_key_does_not_halt_others(self):
+        # One broken configuration and a single transient failure from another
+        backoff = Backoff('all configurations', min_keys=2)
+        self._record_failures(backoff, RECENT_SESSIONS_SIZE - 1, key='broken')
+        self._record_failures(backoff, 1, key='other')
+        self.assertFalse(backoff.active())
+
+    def test_ignored_keys(self):
+        backoff = Backoff('all configurations', min_keys=2)
+        for _ in range(RECENT_SESSIONS_SIZE // 2):
+            self._record_failures(backoff, 1, key='broken')
+            self._record_failures(backoff, 1, key='other', ignored_keys={'other'})
+        self.assertFalse(backoff.active())
+
+
+if __name__ == "__main__":
+    unittest.main()
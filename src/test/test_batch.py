@@ -0,0 +1,381 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+from unittest import mock
+
+from requests.exceptions import ChunkedEncodingError, HTTPError
+
+from batcher.batch import Batch, BatchManager
+from batcher.cfs.options import options
+from batcher.clock import VirtualClock
+from batcher.component import Component
+
+from helpers import component_data
+
+
+class BatchCompletionTest(unittest.TestCase):
+    def setUp(self):
+        self.batch = Batch(Component(component_data('x1')))
+        self.batch.try_add(Component(component_data('x2')))
+        self.batch.session_name = 'batcher-test'
+
+    @mock.patch('batcher.batch.components')
+    def test_failed_session_single_fetch(self, mock_components):
+        failed_state = [{'status': 'failed', 'last_updated': '2026-01-01T00:00:00'}]
+        mock_components.get_components_by_id.return_value = [
+            component_data('x1', state=failed_state), component_data('x2')]
+        with mock.patch.object(Component, 'increment_error_count') as increment:
+            complete, success = self.batch.check_complete(status='failed')
+        self.assertTrue(complete)
+        self.assertFalse(success)
+        self.assertTrue(self.batch.ansible_failure)
+        increment.assert_not_called()
+        self.assertEqual(mock_components.get_components_by_id.call_count, 1)
+
+    @mock.patch('batcher.batch.components')
+    def test_complete_session_skips_pending(self, mock_components):
+        mock_components.get_components_by_id.return_value = [
+            component_data('x1', status='configured'), component_data('x2')]
+        with mock.patch.object(Component, 'set_status') as set_status:
+            complete, success = self.batch.check_complete(status='complete')
+        self.assertTrue(success)
+        set_status.assert_called_once_with('skipped', session_name='batcher-test', deadline=None)
+
+    @mock.patch('batcher.batch.sessions')
+    def test_manager_deletes_timed_out_sessions(self, mock_sessions):
+        manager = BatchManager()
+        for component_id in ('x1', 'x2'):
+            batch = Batch(Component(component_data(component_id)))
+            batch.session_name = 'batcher-' + component_id
+            batch.batch_start = 0
+            manager.batches[component_id].append(batch)
+        with mock.patch.object(Batch, 'safe_get_status', return_value='pending'):
+            manager.check_status()
+        self.assertFalse(manager.batches)
+        mock_sessions.delete_session.assert_not_called()
+        mock_sessions.delete_sessions.assert_called_once_with(['batcher-x1', 'batcher-x2'], deadline=mock.ANY)
+
+    def test_manager_fetches_finished_batches(self):
+        other = Batch(Component(component_data('x3')))
+        with mock.patch.object(Batch, 'fetch_components', side_effect=[[], Exception('error')]):
+            current_components = BatchManager._fetch_finished_components([self.batch, other])
+        self.assertEqual(len(current_components), 1)
+
+    @mock.patch('batcher.batch.components')
+    def test_rebuild_from_session(self, mock_components):
+        mock_components.get_components_by_id.side_effect = lambda ids, **kwargs: [
+            component_data(i) for i in ids]
+        session = {'name': 'batcher-old', 'configuration': {'name': 'compute', 'limit': ''},
+                   'ansible': {'limit': 'x1,x2'}}
+        batch = Batch.rebuild_from_session(session, clock=VirtualClock(100))
+        self.assertEqual(sorted(batch.component_ids), ['x1', 'x2'])
+        self.assertEqual(batch.batch_start, 100)
+
+
+class BatchManagerDiscoveryTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.manager = BatchManager()
+
+    @mock.patch('batcher.batch.components')
+    def test_tracked_components_not_parsed(self, mock_components):
+        mock_components.iter_components.side_effect = lambda **kwargs: iter(
+            [component_data('x1'), component_data('x2')])
+        self.manager.update_batches()
+        self.assertEqual(self.manager.tracked_ids, {'x1', 'x2'})
+        with mock.patch('batcher.batch.Component') as mock_component:
+            self.manager.update_batches()
+            mock_component.assert_not_called()
+
+
+class BatchManagerSendTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.manager = BatchManager()
+        for i in range(3):
+            data = component_data('x{}'.format(i))
+            data['desired_config'] = 'config-{}'.format(i)
+            self.manager.add(Component(data))
+        for batches in self.manager.batches.values():
+            batches[0].batch_window_start = 0  # Overdue
+
+    @mock.patch('batcher.batch.sessions')
+    def test_session_names_follow_batch_order(self, mock_sessions):
+        mock_sessions.new_session_name.side_effect = ['batcher-0', 'batcher-1', 'batcher-2']
+        mock_sessions.create_session.side_effect = lambda config, name, **kwargs: (
+            config != 'config-1', name)
+        self.manager.send_batches()
+        self.assertEqual(mock_sessions.create_session.call_count, 3)
+        session_names = {batches[0].config_name: batches[0].session_name
+                         for batches in self.manager.batches.values()}
+        self.assertEqual(session_names, {'config-0': 'batcher-0', 'config-1': '', 'config-2': 'batcher-2'})
+
+    @mock.patch('batcher.batch.sessions')
+    def test_failed_create_keeps_session_name(self, mock_sessions):
+        # A create that timed out may have created the session anyway, so it is not created under a new name
+        mock_sessions.new_session_name.side_effect = ['batcher-0', 'batcher-1', 'batcher-2']
+        mock_sessions.create_session.side_effect = lambda config, name, **kwargs: (
+            config != 'config-1', name)
+        self.manager.send_batches()
+        batch = self.manager.batches['config-1:0:'][0]
+        self.assertEqual(batch.attempted_session_name, 'batcher-1')
+        self.assertFalse(batch.try_add(Component(dict(component_data('x9'), desired_config='config-1'))))
+
+        mock_sessions.reset_mock()
+        mock_sessions.get_session.return_value = {'name': 'batcher-1'}
+        self.manager.send_batches()
+        mock_sessions.create_session.assert_not_called()
+        mock_sessions.new_session_name.assert_not_called()
+        self.assertEqual(batch.session_name, 'batcher-1')
+        self.assertEqual(batch.attempted_session_name, '')
+
+    @mock.patch('batcher.batch.sessions')
+    def test_create_exception_keeps_other_results(self, mock_sessions):
+        def create_session(config, name, **kwargs):
+            if config == 'config-1':
+                raise ChunkedEncodingError('Connection broken')
+            return True, name
+        mock_sessions.new_session_name.side_effect = ['batcher-0', 'batcher-1', 'batcher-2']
+        mock_sessions.create_session.side_effect = create_session
+        self.manager.send_batches()
+        results = {key: (batches[0].session_name, batches[0].attempted_session_name)
+                   for key, batches in self.manager.batches.items()}
+        self.assertEqual(results, {'config-0:0:': ('batcher-0', ''), 'config-1:0:': ('', 'batcher-1'),
+                                   'config-2:0:': ('batcher-2', '')})
+
+    @mock.patch('batcher.batch.sessions')
+    def test_failed_create_retried_with_session_name(self, mock_sessions):
+        mock_sessions.new_session_name.side_effect = ['batcher-0', 'batcher-1', 'batcher-2']
+        mock_sessions.create_session.side_effect = lambda config, name, **kwargs: (
+            config != 'config-1', name)
+        self.manager.send_batches()
+        mock_sessions.reset_mock()
+        mock_sessions.get_session.side_effect = HTTPError(response=mock.Mock(status_code=404))
+        mock_sessions.create_session.side_effect = lambda config, name, **kwargs: (True, name)
+        self.manager.send_batches()
+        self.assertEqual(mock_sessions.create_session.call_args.kwargs['name'], 'batcher-1')
+        self.assertEqual(self.manager.batches['config-1:0:'][0].session_name, 'batcher-1')
+
+    @mock.patch('batcher.batch.sessions')
+    def test_global_backoff(self, mock_sessions):
+        with mock.patch.object(BatchManager, 'backoff', return_value=True):
+            self.manager.send_batches()
+        mock_sessions.create_session.assert_not_called()
+
+
+class BatchManagerRebuildTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.manager = BatchManager()
+        # Simulate a rebuild still running in the background
+        self.manager.rebuilding = True
+        self.manager.rebuilding_ids = None
+        for component_id in ('x1', 'x2'):
+            self.manager.add(Component(component_data(component_id)))
+        for batches in self.manager.batches.values():
+            batches[0].batch_window_start = 0  # Overdue
+
+    @mock.patch('batcher.batch.sessions')
+    def test_no_dispatch_until_in_flight_known(self, mock_sessions):
+        self.manager.send_batches()
+        mock_sessions.create_session.assert_not_called()
+
+    @mock.patch('batcher.batch.sessions')
+    def test_in_flight_components_not_sent_again(self, mock_sessions):
+        mock_sessions.new_session_name.return_value = 'batcher-new'
+        mock_sessions.create_session.return_value = (True, 'batcher-new')
+        self.manager.rebuilt.put({'x1'})
+        self.manager.send_batches()
+        self.assertEqual(mock_sessions.create_session.call_args[1]['components'], ['x2'])
+        self.assertNotIn('x1', self.manager.tracked_ids)
+        self.assertIsNotNone(self.manager.first_dispatch)
+
+        rebuilt = Batch(Component(component_data('x1')))
+        rebuilt.session_name = 'batcher-old'
+        self.manager.rebuilt.put(rebuilt)
+        self.manager.rebuilt.put(rebuilt)  # Duplicates are ignored
+        self.manager.rebuilt.put(None)
+        self.manager._reconcile_rebuild()
+        self.assertFalse(self.manager.rebuilding)
+        self.assertIn('x1', self.manager.tracked_ids)
+        session_names = sorted(batch.session_name for batches in self.manager.batches.values()
+                               for batch in batches)
+        self.assertEqual(session_names, ['batcher-new', 'batcher-old'])
+
+
+class PredictiveDispatchTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.clock = VirtualClock(1000)
+        self.manager = BatchManager(clock=self.clock)
+
+    @mock.patch('batcher.batch.components')
+    def _discover(self, component_ids, mock_components):
+        mock_components.iter_components.return_value = iter([component_data(i) for i in component_ids])
+        self.manager.update_batches()
+
+    @mock.patch('batcher.batch.sessions')
+    def _send(self, mock_sessions):
+        mock_sessions.create_session.return_value = (True, 'batcher-new')
+        mock_sessions.new_session_name.return_value = 'batcher-new'
+        self.manager.send_batches()
+        return mock_sessions.create_session.call_count
+
+    def test_early_dispatch_after_arrivals_stop(self):
+        with mock.patch.dict(options.options, {'batch_window': 600, 'batcher_dispatch_policy': 'predictive'}):
+            self._discover(['x1', 'x2'])
+            self.assertEqual(self._send(), 0)
+            for _ in range(5):
+                self.clock.advance(10)
+                self._discover(['x1', 'x2'])
+                self.assertEqual(self._send(), 0)  # Arrivals were recent
+            self.clock.advance(600 - 60 - 10)
+            self._discover(['x1', 'x2'])
+            self.assertEqual(self._send(), 1)
+
+    def test_window_policy(self):
+        with mock.patch.dict(options.options, {'batch_window': 600, 'batcher_dispatch_policy': 'window'}):
+            self._discover(['x1', 'x2'])
+            self.clock.advance(590)
+            self._discover(['x1', 'x2'])
+            self.assertEqual(self._send(), 0)
+
+
+class WorkBudgetTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.clock = VirtualClock(1000)
+        self.manager = BatchManager(clock=self.clock)
+
+    @mock.patch('batcher.batch.components')
+    def test_discovery_resumes(self, mock_components):
+        mock_components.iter_components.side_effect = lambda **kwargs: iter(
+            [component_data('x{}'.format(i)) for i in range(5)])
+        with mock.patch.dict(options.options, {'batcher_discovery_budget': 2}):
+            self.manager.update_batches()
+            self.assertEqual(self.manager.tracked_ids, {'x0', 'x1'})
+            self.assertIsNone(self.manager.arrival_rates.last_pass)
+            self.clock.advance(10)
+            self.manager.update_batches()
+            self.manager.update_batches()
+        self.assertEqual(len(self.manager.tracked_ids), 5)
+        self.assertEqual(mock_components.iter_components.call_count, 1)
+        self.assertEqual(self.manager.arrival_rates.last_pass, 1000)  # When the pass started
+
+    def test_status_checks_round_robin(self):
+        for i in range(5):
+            batch = Batch(Component(component_data('x{}'.format(i))), clock=self.clock)
+            batch.session_name = 'batcher-{}'.format(i)
+            batch.batch_start = self.clock.time()
+            self.manager.batches[batch.session_name].append(batch)
+        checked = []
+        with mock.patch.dict(options.options, {'batcher_status_budget': 2}), \
+                mock.patch.object(Batch, 'safe_get_status', autospec=True,
+                                  side_effect=lambda batch, **kwargs: (
+                                      checked.append(batch.session_name) or 'running')):
+            for _ in range(3):
+                self.manager.check_status()
+                self.clock.advance(10)
+        self.assertEqual(checked, ['batcher-0', 'batcher-1', 'batcher-2', 'batcher-3',
+                                   'batcher-4', 'batcher-0'])
+        self.assertEqual(len(self.manager.batches), 5)
+
+
+class BatchCostTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.manager = BatchManager()
+
+    def _batch_sizes(self, n_layers):
+        for i in range(10):
+            data = component_data('x{}'.format(i))
+            layer = {'commit': 'abc', 'playbook': 'site.yml', 'status': 'pending'}
+            data['desired_state'] = [layer] * n_layers
+            self.manager.add(Component(data))
+        return sorted(len(batch.components) for batches in self.manager.batches.values() for batch in batches)
+
+    def test_layers_cost(self):
+        with mock.patch.dict(options.options, {'batcher_cost_model': 'layers', 'batcher_max_batch_cost': 10}):
+            self.assertEqual(self._batch_sizes(3), [1, 3, 3, 3])
+
+    def test_count_cost(self):
+        with mock.patch.dict(options.options, {'batch_size': 4, 'batcher_max_batch_cost': 10}):
+            self.assertEqual(self._batch_sizes(3), [2, 4, 4])
+
+
+class BisectionTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.manager = BatchManager()
+        for i in range(8):
+            self.manager.add(Component(component_data('x{}'.format(i))))
+        self.batch = self.manager.batches['compute:0:'][0]
+        self.batch.session_name = 'batcher-test'
+
+    def _finish(self, status, failed_ids=()):
+        """Finishes every batch and adds the components back, returning the new batch sizes"""
+        batches = self.manager.batches.pop('compute:0:')
+        for batch in batches:
+            batch.failed_ids = set(failed_ids) & set(batch.component_ids)
+            self.manager._bisect(batch, status)
+            self.manager._untrack(batch.components)
+        for batch in batches:
+            for component in batch.components:
+                self.manager.add(component)
+        return sorted(len(batch.components) for batch in self.manager.batches['compute:0:'])
+
+    def test_failed_batches_halved(self):
+        self.assertEqual(self._finish('failed'), [4, 4])
+        self.assertEqual(self._finish('failed'), [2, 2, 2, 2])
+        self.assertEqual(self._finish('complete'), [4, 4])
+        self.assertEqual(self._finish('complete'), [8])
+        self.assertEqual(self.manager.capacity_limits, {'compute:0': 8})
+        with mock.patch.dict(options.options, {'batch_size': 16}):
+            self._finish('complete')
+        self.assertFalse(self.manager.capacity_limits)
+
+    def test_failed_components_isolated(self):
+        self.assertEqual(self._finish('failed', failed_ids=['x3']), [1, 7])
+        isolated = [batch for batch in self.manager.batches['compute:0:'] if len(batch.components) == 1]
+        self.assertEqual(isolated[0].component_ids, ['x3'])
+        self.assertFalse(self.manager.capacity_limits)
+        self.assertEqual(self._finish('complete'), [8])
+
+    def test_all_failed_kept_together(self):
+        # When most of a batch fails, the configuration is more likely at fault than the components
+        self.assertEqual(self._finish('failed', failed_ids=['x{}'.format(i) for i in range(8)]), [8])
+        self.assertEqual(self._finish('failed', failed_ids=['x0', 'x1', 'x2', 'x3']), [8])
+        self.assertFalse(self.manager.isolated_ids)
+        self.assertFalse(self.manager.capacity_limits)
+
+
+if __name__ == "__main__":
+    unittest.main()
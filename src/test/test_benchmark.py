@@ -0,0 +1,51 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+from unittest import mock
+
+from benchmark import suite
+
+
+class SuiteTest(unittest.TestCase):
+    def test_run_suite(self):
+        with mock.patch.object(suite, 'MIN_TIME', 0):
+            results = suite.run_suite([50])
+        self.assertEqual(sorted(results), ['check_status:50', 'component_init:50', 'get_tags:50',
+                                           'manager_add:50'])
+        self.assertEqual(results['component_init:50']['ops'], 50)
+        self.assertEqual(results['get_tags:50']['ops'], results['check_status:50']['ops'])
+        self.assertGreater(results['manager_add:50']['ops_per_sec'], 0)
+
+    def test_compare(self):
+        baseline = {'case:1000': {'ops_per_sec': 1000, 'peak_bytes_per_op': 100},
+                    'other:1000': {'ops_per_sec': 1000, 'peak_bytes_per_op': 1}}
+        results = {'case:1000': {'ops_per_sec': 700, 'peak_bytes_per_op': 130},
+                   'other:1000': {'ops_per_sec': 900, 'peak_bytes_per_op': 10},
+                   'new:1000': {'ops_per_sec': 1, 'peak_bytes_per_op': 1000}}
+        self.assertEqual(suite.compare(results, baseline), [('case:1000', 'ops_per_sec', 1000, 700),
+                                                            ('case:1000', 'peak_bytes_per_op', 100, 130)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+
+from batcher.budget import Budget, Cursor
+from batcher.clock import VirtualClock
+
+
+class BudgetTest(unittest.TestCase):
+    def test_items(self):
+        budget = Budget(3)
+        self.assertEqual(list(budget.take(range(10))), [0, 1, 2])
+        self.assertTrue(budget.exhausted)
+
+    def test_unlimited(self):
+        budget = Budget()
+        self.assertEqual(len(list(budget.take(range(10)))), 10)
+        self.assertFalse(budget.exhausted)
+
+    def test_seconds(self):
+        clock = VirtualClock()
+        budget = Budget(seconds=5, clock=clock)
+        taken = []
+        for i in budget.take(range(10)):
+            taken.append(i)
+            clock.advance(2)
+        self.assertEqual(taken, [0, 1, 2])
+
+    def test_progress_guaranteed(self):
+        clock = VirtualClock()
+        budget = Budget(seconds=5, clock=clock)
+        clock.advance(10)  # The time was used up before any items were taken
+        self.assertEqual(list(budget.take('ab')), ['a'])
+
+
+class CursorTest(unittest.TestCase):
+    def test_resume(self):
+        clock = VirtualClock()
+        passes = []
+
+        def source():
+            passes.append(clock.time())
+            return iter(range(5))
+
+        cursor = Cursor(source, clock=clock)
+        self.assertEqual(list(cursor.take(Budget(3))), [0, 1, 2])
+        self.assertFalse(cursor.pass_complete)
+        clock.advance(10)
+        self.assertEqual(list(cursor.take(Budget(3))), [3, 4])
+        self.assertTrue(cursor.pass_complete)
+        self.assertEqual(cursor.pass_start, 0)
+        self.assertEqual(list(cursor.take(Budget(3))), [0, 1, 2])
+        self.assertEqual(passes, [0, 10])
+
+
+if __name__ == "__main__":
+    unittest.main()
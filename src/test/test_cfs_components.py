@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2022 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2022, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -22,7 +22,11 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #
 import unittest
-from batcher.cfs.components import ENDPOINT
+from unittest import mock
+
+from batcher.cfs import components
+from batcher.cfs.components import ENDPOINT, project_component
+from batcher.component import Component
 
 
 class InfrastructureTest(unittest.TestCase):
@@ -34,6 +38,59 @@ class InfrastructureTest(unittest.TestCase):
         self.assertTrue(True, "True is true!")
 
 
+class ProjectionTest(unittest.TestCase):
+    data = {
+        'id': 'x3000c0s1b0n0', 'enabled': True, 'error_count': 1, 'tags': {'role': 'compute'},
+        'desired_config': 'compute', 'configuration_status': 'pending', 'logs': 'unused',
+        'desired_state': [{'clone_url': 'url', 'commit': 'abc', 'playbook': 'site.yml', 'status': 'pending',
+                           'session_name': 'unused', 'last_updated': 'unused'}],
+        'state': [{'commit': 'old', 'status': 'applied', 'last_updated': '1'},
+                  {'commit': 'abc', 'status': 'failed', 'last_updated': '2', 'session_name': 'unused'}],
+    }
+
+    def test_projection_keeps_used_fields(self):
+        projected = project_component(self.data)
+        self.assertNotIn('logs', projected)
+        self.assertEqual(len(projected['state']), 1)
+        original, trimmed = Component(self.data, retain_desired_state=True), \
+            Component(projected, retain_desired_state=True)
+        for attribute in ('id', 'error_count', 'tags', 'config_name', 'config_limit', 'latest_status',
+                          'latest_timestamp', 'desired_state_hash', 'batch_key'):
+            self.assertEqual(getattr(original, attribute), getattr(trimmed, attribute))
+        self.assertEqual(trimmed.desired_state[0]['clone_url'], 'url')
+
+    def test_server_projection_parameter(self):
+        with mock.patch.object(components, 'PROJECTION', 'server'):
+            parameters = components._add_detail_parameters({})
+        self.assertIn('state.last_updated', parameters['fields'])
+        self.assertEqual(components._add_detail_parameters({}).get('fields'), None)
+
+
+class IdLookupTest(unittest.TestCase):
+    ids = ['x3000c0s{}b0n0'.format(i) for i in range(100)]
+
+    def test_chunks_bounded(self):
+        chunks = components.chunk_ids(self.ids, max_length=100)
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        self.assertEqual(','.join(chunks).split(','), self.ids)
+        self.assertEqual(components.chunk_ids([]), [])
+
+    def test_lookup_merges_chunks(self):
+        def iter_components(ids, **kwargs):
+            return iter([{'id': id} for id in ids.split(',') if id != self.ids[5]])
+        with mock.patch.object(components, 'ID_CHUNK_LENGTH', 100), \
+                mock.patch.object(components, 'iter_components', side_effect=iter_components) as query:
+            result = components.get_components_by_id(self.ids)
+        self.assertGreater(query.call_count, 1)
+        self.assertEqual([data['id'] for data in result], self.ids[:5] + self.ids[6:])
+
+    def test_lookup_failure_raises(self):
+        with mock.patch.object(components, 'ID_CHUNK_LENGTH', 100), \
+                mock.patch.object(components, 'iter_components', side_effect=TypeError):
+            with self.assertRaises(TypeError):
+                components.get_components_by_id(self.ids)
+
+
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
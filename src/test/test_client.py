@@ -0,0 +1,204 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import unittest
+from unittest import mock
+
+from requests.exceptions import ConnectionError, ReadTimeout
+from urllib3.exceptions import ConnectTimeoutError, ReadTimeoutError
+
+from batcher.client import (CallStats, DeadlineExceeded, TokenBucket, call_name, requests_retry_session,
+                            CREATE, LIMITERS, READ)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket('test', 10)
+        with mock.patch('batcher.client.time.sleep') as sleep:
+            for _ in range(10):
+                self.assertEqual(bucket.acquire(), 0.0)
+            self.assertGreater(bucket.acquire(), 0.0)
+            sleep.assert_called_once()
+        calls, waits, wait_time = bucket.pop_stats()
+        self.assertEqual((calls, waits), (11, 1))
+        self.assertEqual(bucket.pop_stats(), (0, 0, 0.0))
+
+    def test_wait_limited_by_end(self):
+        bucket = TokenBucket('test', 1)
+        bucket.acquire()
+        with mock.patch('batcher.client.time.sleep') as sleep:
+            self.assertIsNone(bucket.acquire(end=time.monotonic() + 0.5))
+            sleep.assert_not_called()
+            # No token was reserved, so the next caller does not wait longer
+            self.assertLessEqual(bucket.acquire(), 1.0)
+
+    def test_aimd(self):
+        bucket = TokenBucket('test', 10, target_latency=1)
+        bucket.observe(0.1, 429)
+        self.assertEqual(bucket.rate, 5)
+        # Decreases are limited to once per interval
+        bucket.observe(0.1, 503)
+        self.assertEqual(bucket.rate, 5)
+        bucket.observe(0.1, 200)
+        self.assertGreater(bucket.rate, 5)
+        for _ in range(1000):
+            bucket.observe(0.1, 200)
+        self.assertEqual(bucket.rate, 10)
+
+    def test_disabled(self):
+        bucket = TokenBucket('test', 0)
+        for _ in range(100):
+            self.assertEqual(bucket.acquire(), 0.0)
+
+    def test_session_uses_limiter(self):
+        response = mock.Mock(status_code=200)
+        with mock.patch('requests.Session.request', return_value=response), \
+                mock.patch.object(LIMITERS[READ], 'acquire') as acquire:
+            session = requests_retry_session()
+            self.assertIs(session.get('http://cray-cfs-api/v3/components'), response)
+            acquire.assert_called_once()
+
+    def test_each_attempt_throttled(self):
+        # Retries take a token and are observed, so that errors are not multiplied by unthrottled retries
+        response = mock.Mock(status_code=503, headers={})
+        with mock.patch('requests.Session.request', return_value=response) as request, \
+                mock.patch.object(LIMITERS[READ], 'acquire') as acquire, \
+                mock.patch.object(LIMITERS[READ], 'observe') as observe:
+            session = requests_retry_session(retries=2, backoff_factor=0)
+            self.assertIs(session.get('http://cray-cfs-api/v3/components'), response)
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(acquire.call_count, 3)
+        self.assertEqual([call.args[1] for call in observe.call_args_list], [503, 503, 503])
+
+
+class DeadlineTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = CallStats()
+        patcher = mock.patch('batcher.client.CALL_STATS', self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def test_call_name(self):
+        self.assertEqual(call_name('get', 'http://cray-cfs-api/v3/sessions/batcher-1?x=1'), 'GET sessions/*')
+        self.assertEqual(call_name('PATCH', 'http://cray-cfs-api/v3/components'), 'PATCH components')
+
+    def test_deadline_exceeded(self):
+        def slow_request(*args, **kwargs):
+            self.release.wait()
+
+        with mock.patch('requests.Session.request', side_effect=slow_request):
+            session = requests_retry_session(deadline=0.05)
+            with self.assertRaises(DeadlineExceeded) as context:
+                session.get('http://cray-cfs-api/v3/sessions/batcher-1')
+        self.assertIsInstance(context.exception, ConnectionError)
+        self.assertEqual(self.stats.pop_stats(), {'GET sessions/*': {'deadline_misses': 1}})
+
+    def test_no_attempts_after_deadline(self):
+        calls = []
+
+        def failing_request(*args, **kwargs):
+            calls.append(args)
+            self.release.wait()
+            raise ConnectionError(ConnectTimeoutError('timed out'))
+
+        with mock.patch('requests.Session.request', side_effect=failing_request):
+            session = requests_retry_session(deadline=0.05, retries=5, backoff_factor=0)
+            with self.assertRaises(DeadlineExceeded):
+                session.get('http://cray-cfs-api/v3/sessions/batcher-1')
+            self.release.set()
+            time.sleep(0.1)
+        self.assertEqual(len(calls), 1)
+
+    def test_queued_calls_cancelled(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        executor.submit(self.release.wait)  # Every worker is busy
+        response = mock.Mock(status_code=200, headers={})
+        with mock.patch('batcher.client._call_executor', executor), \
+                mock.patch('requests.Session.request', return_value=response) as request:
+            with self.assertRaises(DeadlineExceeded):
+                requests_retry_session(deadline=0.05).get('http://cray-cfs-api/v3/components')
+            self.release.set()
+            executor.shutdown()
+        request.assert_not_called()
+
+    def test_create_not_detached(self):
+        # Creating a session is not idempotent, so it is never left running after its deadline
+        threads = []
+
+        def timed_out_request(*args, **kwargs):
+            threads.append(threading.current_thread())
+            self.assertLessEqual(kwargs['timeout'][1], 5)
+            raise ReadTimeout(ReadTimeoutError(None, None, 'timed out'))
+
+        with mock.patch('requests.Session.request', side_effect=timed_out_request):
+            session = requests_retry_session(deadline=5, retries=5, backoff_factor=0)
+            with self.assertRaises(ConnectionError):
+                session.post('http://cray-cfs-api/v3/sessions', json={})
+        self.assertEqual(threads, [threading.current_thread()])  # Read timeouts are not retried
+
+    def test_throttled_call_deadline(self):
+        # A drained limiter must not hold a call past its deadline
+        bucket = TokenBucket('create', 1)
+        bucket.acquire()
+        with mock.patch.dict(LIMITERS, {CREATE: bucket}), \
+                mock.patch('requests.Session.request') as request:
+            start = time.monotonic()
+            with self.assertRaises(DeadlineExceeded):
+                requests_retry_session(deadline=0.2).post('http://cray-cfs-api/v3/sessions', json={})
+        self.assertLess(time.monotonic() - start, 0.2)
+        request.assert_not_called()
+        self.assertEqual(self.stats.pop_stats(), {'POST sessions': {'deadline_misses': 1}})
+
+    def test_errors_raised(self):
+        with mock.patch('requests.Session.request', side_effect=ValueError('error')):
+            with self.assertRaises(ValueError):
+                requests_retry_session().get('http://cray-cfs-api/v3/components')
+
+    def test_hedge_wins(self):
+        response = mock.Mock(status_code=200)
+        calls = []
+
+        def request(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                self.release.wait()  # The first request stalls
+            return response
+
+        for _ in range(20):
+            self.stats.record_latency(0.01)
+        with mock.patch('requests.Session.request', side_effect=request), \
+                mock.patch('batcher.client.HEDGE_READS', True):
+            session = requests_retry_session(deadline=5)
+            self.assertIs(session.get('http://cray-cfs-api/v3/components'), response)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.stats.pop_stats(), {'GET components': {'hedges': 1, 'hedge_wins': 1}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+from unittest import mock
+
+from batcher import columnar
+from batcher.batch import BatchManager
+from batcher.cfs.options import options
+from batcher.columnar import ComponentTable
+
+from helpers import component_data
+
+DATA = [component_data('x{}'.format(i), config=['compute', 'uan', 'ncn'][i % 3]) for i in range(40)]
+
+
+class ColumnarTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def batch(self, columnar_ingest, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        manager = BatchManager()
+        passes = [iter(DATA[:10]), iter(DATA)]
+        with mock.patch('batcher.batch.components.iter_components', side_effect=passes), \
+                mock.patch.dict(options.options, batch_size=4, batcher_columnar_ingest=columnar_ingest):
+            manager.update_batches()
+            manager.update_batches()
+        return {key: sorted(sorted(batch.component_ids) for batch in batches)
+                for key, batches in manager.batches.items()}, manager.tracked_ids
+
+    def test_same_batches_as_add(self):
+        expected = self.batch(False)
+        self.assertEqual(self.batch(True), expected)
+        with mock.patch.object(columnar, 'numpy', None):
+            self.assertEqual(self.batch(True), expected)
+
+    def test_table(self):
+        table = ComponentTable.load(DATA[:6])
+        self.assertEqual(len(table.keys.values), 3)
+        rows = table.untracked_rows({'x0'})
+        groups = list(table.groups(rows))
+        self.assertEqual(len(groups), 3)
+        self.assertEqual([table.ids[row] for row in groups[0][2]], ['x3'])
+
+    def test_duplicate_ids(self):
+        data = [component_data('x1'), component_data('x2', config='uan'), component_data('x1', config='ncn')]
+        table = ComponentTable.load(data)
+        self.assertEqual(list(table.untracked_rows(set())), [0, 1])
+        self.assertEqual(list(table.untracked_rows({'x1'})), [1])
+
+    @mock.patch('batcher.batch.sessions')
+    def test_duplicate_ids_batched_once(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        data = [component_data('x1'), component_data('x1', config='ncn')]
+        for columnar_ingest in (False, True):
+            manager = BatchManager()
+            with mock.patch('batcher.batch.components.iter_components', return_value=iter(data)), \
+                    mock.patch.dict(options.options, batch_size=4, batcher_columnar_ingest=columnar_ingest):
+                manager.update_batches()
+            batches = [batch for batches in manager.batches.values() for batch in batches]
+            self.assertEqual([batch.component_ids for batch in batches], [['x1']])
+            self.assertEqual([component.config_name for component in batches[0].components], ['compute'])
+
+
+if __name__ == "__main__":
+    unittest.main()
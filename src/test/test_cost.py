@@ -0,0 +1,54 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+from unittest import mock
+
+from batcher.cost import CostModel, pending_layers
+
+
+class CostModelTest(unittest.TestCase):
+    def test_pending_layers(self):
+        self.assertEqual(pending_layers('0,2,5'), [0, 2, 5])
+        self.assertEqual(pending_layers(''), [])
+
+    def test_count_and_layers(self):
+        costs = CostModel()
+        component = mock.Mock(config_name='compute', config_limit='0,1,2')
+        self.assertEqual(costs.cost(component, 'count'), 1)
+        self.assertEqual(costs.cost(component, 'layers'), 3)
+
+    def test_runtime(self):
+        costs = CostModel()
+        component = mock.Mock(config_name='compute', config_limit='0,1')
+        self.assertEqual(costs.cost(component, 'runtime'), 2)  # No history yet
+        costs.record('compute', '0', 100)
+        costs.record('compute', '1,2', 600)  # 300 seconds per layer
+        # Layer 0 is cheaper than the mean layer (233 seconds), and layer 1 is more expensive
+        self.assertAlmostEqual(costs.cost(component, 'runtime'), 400 / (700 / 3))
+        costs.record('compute', '0', 200)
+        self.assertAlmostEqual(costs.layer_runtimes[('compute', 0)], 130)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+from unittest import mock
+from urllib.request import urlopen
+from urllib.error import HTTPError
+
+import ujson as json
+
+from batcher.batch import BatchManager
+from batcher.component import Component
+from batcher.introspection import IntrospectionServer
+
+from helpers import component_data
+
+
+class IntrospectionTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.manager = BatchManager()
+        self.manager.add(Component(component_data('x1')))
+        self.manager.add(Component(component_data('x2')))
+        self.server = IntrospectionServer(0, address='127.0.0.1')
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def get(self, path):
+        with urlopen('http://127.0.0.1:{}{}'.format(self.server.port, path)) as response:
+            return json.loads(response.read())
+
+    def test_no_snapshot(self):
+        with self.assertRaises(HTTPError) as e:
+            self.get('/state')
+        self.assertEqual(e.exception.code, 503)
+
+    def test_state(self):
+        self.server.publish(self.manager.snapshot())
+        # Later changes do not affect the published snapshot
+        self.manager.add(Component(component_data('x3')))
+        state = self.get('/state')
+        self.assertEqual(state['tracked_components'], 2)
+        self.assertEqual(state['open_batches'][0]['component_ids'], ['x1', 'x2'])
+        self.assertFalse(state['backoff']['global']['active'])
+        self.assertNotIn('component_index', state)
+
+    def test_component_lookup(self):
+        self.server.publish(self.manager.snapshot())
+        component = self.get('/components/x1')
+        self.assertEqual(component['status'], 'waiting')
+        with self.assertRaises(HTTPError) as e:
+            self.get('/components/x9')
+        self.assertEqual(e.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
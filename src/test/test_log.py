@@ -0,0 +1,76 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import logging
+import unittest
+from unittest import mock
+
+import ujson as json
+
+from batcher import log
+
+
+class LogTest(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('batcher.test.log')
+        self.logger.setLevel(logging.INFO)
+        log.set_trace('')
+
+    def tearDown(self):
+        log.set_trace('')
+
+    def test_debug_disabled_is_not_formatted(self):
+        argument = mock.MagicMock()
+        with mock.patch.object(self.logger, '_log') as emit:
+            log.debug(self.logger, 'Component %s', argument, component_id='x1')
+        emit.assert_not_called()
+        argument.__str__.assert_not_called()
+
+    def test_traced_component(self):
+        log.set_trace('x1, batcher-abc')
+        with self.assertLogs(self.logger, level=logging.INFO) as logs:
+            log.debug(self.logger, 'Component %s', 'x1', component_id='x1')
+            log.debug(self.logger, 'Session %s', 'batcher-abc', session_name='batcher-abc')
+            log.debug(self.logger, 'Component %s', 'x2', component_id='x2')
+        self.assertEqual(len(logs.records), 2)
+        self.assertTrue(logs.records[0].trace)
+
+    def test_sampler(self):
+        sampler = log.Sampler(limit=2, interval=60)
+        self.assertEqual([sampler.allow('key')[0] for _ in range(3)], [True, True, False])
+        self.assertTrue(sampler.allow('other')[0])
+        sampler.window_start -= 60
+        allowed, suppressed = sampler.allow('key')
+        self.assertTrue(allowed)
+        self.assertEqual(suppressed, {'key': 1})
+
+    def test_json_formatter(self):
+        record = self.logger.makeRecord(self.logger.name, logging.INFO, __file__, 1, 'Component %s', ('x1',),
+                                        None, extra={'component_id': 'x1'})
+        data = json.loads(log.JsonFormatter().format(record))
+        self.assertEqual(data['message'], 'Component x1')
+        self.assertEqual(data['component_id'], 'x1')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+from unittest import mock
+
+from batcher.metrics import Histogram, LatencyTracker, MAX_CONFIGURATIONS, OTHER
+
+
+class HistogramTest(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.record(value)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max'], 100)
+        self.assertAlmostEqual(summary['mean'], 50.5)
+        self.assertTrue(30 <= summary['p50'] <= 60)
+        self.assertTrue(summary['p90'] <= summary['p99'] <= 100)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().summary()['p99'], 0.0)
+
+
+class LatencyTrackerTest(unittest.TestCase):
+    def test_record_session(self):
+        tracker = LatencyTracker()
+        components = [mock.Mock(first_seen=10.0), mock.Mock(first_seen=None)]
+        tracker.record_session('config', components, ready=40.0, created=45.0)
+        tracker.record_session('config', components, ready=40.0, created=45.0, finished=145.0)
+        stages = tracker.report()['configurations']['config']
+        self.assertEqual(stages['queue_wait']['count'], 1)
+        self.assertEqual(stages['queue_wait']['max'], 30.0)
+        self.assertEqual(stages['dispatch_delay']['max'], 5.0)
+        self.assertEqual(stages['session_runtime']['max'], 100.0)
+        self.assertEqual(stages['total']['max'], 135.0)
+
+    def test_configurations_bounded(self):
+        tracker = LatencyTracker()
+        for i in range(MAX_CONFIGURATIONS + 5):
+            tracker.record_session('config-{}'.format(i), [], ready=0, created=0)
+        configurations = tracker.report()['configurations']
+        self.assertEqual(len(configurations), MAX_CONFIGURATIONS + 1)
+        self.assertIn(OTHER, configurations)
+
+    def test_record_cycle(self):
+        tracker = LatencyTracker()
+        for i in range(100):
+            tracker.record_cycle({'check_status': 0.01, 'total': 0.5 if i < 99 else 30})
+        cycles = tracker.report()['cycles']
+        self.assertEqual(sorted(cycles), ['check_status', 'total'])
+        self.assertEqual(cycles['total']['count'], 100)
+        self.assertLessEqual(cycles['total']['p90'], 0.5)
+        self.assertEqual(cycles['total']['max'], 30)
+
+    def test_export_resets(self):
+        tracker = LatencyTracker(export_interval=0)
+        tracker.record_session('config', [mock.Mock(first_seen=0.0)], ready=1, created=2)
+        tracker.export_if_due()
+        self.assertEqual(tracker.report()['configurations'], {})
@@ -0,0 +1,73 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import time
+import unittest
+
+from batcher.cfs.paging import iter_pages
+
+
+def paged(n_pages, fail_at=None):
+    calls = []
+
+    def fetch(parameters):
+        page = parameters or 0
+        calls.append(page)
+        if page == fail_at:
+            raise ValueError('failed page')
+        next_parameters = page + 1 if page + 1 < n_pages else None
+        return {'items': [page], 'next': next_parameters}
+    return fetch, calls
+
+
+class PagingTest(unittest.TestCase):
+    def test_all_pages_in_order(self):
+        for depth in (0, 1, 3):
+            fetch, _ = paged(5)
+            pages = [data['items'][0] for data in iter_pages(fetch, None, depth=depth)]
+            self.assertEqual(pages, [0, 1, 2, 3, 4])
+
+    def test_error_raised_at_failed_page(self):
+        fetch, _ = paged(5, fail_at=2)
+        pages = []
+        with self.assertRaises(ValueError):
+            for data in iter_pages(fetch, None, depth=2):
+                pages.append(data['items'][0])
+        self.assertEqual(pages, [0, 1])
+
+    def test_empty_page_is_returned(self):
+        pages = list(iter_pages(lambda parameters: None, {}, depth=1))
+        self.assertEqual(pages, [None])
+
+    def test_prefetch_is_bounded(self):
+        fetch, calls = paged(100)
+        pages = iter_pages(fetch, None, depth=2)
+        next(pages)
+        # The first page is consumed, two are queued and one more is waiting to be queued
+        time.sleep(0.2)
+        self.assertLessEqual(len(calls), 4)
+        pages.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
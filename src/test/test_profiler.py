@@ -0,0 +1,95 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from batcher.profiler import SamplingProfiler, collapse
+
+
+def busy_worker(stop):
+    while not stop.wait(0.001):
+        pass
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_collapse(self):
+        stack = collapse(sys._getframe(), 'main')
+        self.assertTrue(stack.startswith('main;'))
+        self.assertTrue(stack.endswith(';test_profiler.py:test_collapse'))
+
+    def test_profile_all_threads(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_worker, args=(stop,), name='worker')
+        worker.start()
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SamplingProfiler(directory=directory, interval=0.001)
+            self.assertTrue(profiler.start(0.2))
+            self.assertFalse(profiler.start(0.2))  # Only one profile runs at a time
+            profiler.join()
+            stop.set()
+            worker.join()
+            self.assertEqual(os.path.dirname(profiler.last_path), directory)
+            with open(profiler.last_path) as f:
+                lines = f.read().splitlines()
+        stacks = dict(line.rsplit(' ', 1) for line in lines)
+        self.assertTrue(any(stack.startswith('worker;') and 'test_profiler.py:busy_worker' in stack
+                            for stack in stacks))
+        self.assertTrue(any(stack.startswith('MainThread;') for stack in stacks))
+        self.assertFalse(any(stack.startswith('profiler;') for stack in stacks))
+        self.assertTrue(all(int(count) > 0 for count in stacks.values()))
+
+    def test_signal(self):
+        previous = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous)
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SamplingProfiler(directory=directory, interval=0.001, signal_duration=0.05)
+            profiler.install_signal_handler(signal.SIGUSR1)
+            with profiler.lock:
+                # The handler runs on the main thread, so it must not need the lock that start() holds
+                os.kill(os.getpid(), signal.SIGUSR1)
+            for _ in range(200):
+                if profiler.last_path:
+                    break
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(profiler.last_path))
+
+    def test_update(self):
+        profiler = SamplingProfiler()
+        with mock.patch.object(profiler, 'start') as start:
+            profiler.update(0)
+            profiler.update(30)
+            profiler.update(30)  # The option is left set
+            profiler.update(0)
+            profiler.update(60)
+        self.assertEqual(start.call_args_list, [mock.call(30), mock.call(60)])
+
+
+if __name__ == "__main__":
+    unittest.main()
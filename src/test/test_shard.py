@@ -0,0 +1,120 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from batcher import lease
+from batcher.lease.file import FileLeaseBackend
+from batcher.shard import ShardManager
+from batcher.standby import Replica
+
+
+class FileLeaseBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backend = FileLeaseBackend(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_acquire_held_lease(self):
+        self.assertTrue(self.backend.acquire('lease', 'a', 60))
+        self.assertTrue(self.backend.acquire('lease', 'a', 60))
+        self.assertFalse(self.backend.acquire('lease', 'b', 60))
+        self.assertEqual(self.backend.holder('lease'), 'a')
+
+    def test_expired_lease(self):
+        self.assertTrue(self.backend.acquire('lease', 'a', -1))
+        self.assertIsNone(self.backend.holder('lease'))
+        self.assertTrue(self.backend.acquire('lease', 'b', 60))
+
+    def test_release(self):
+        self.backend.acquire('lease', 'a', 60)
+        self.backend.release('lease', 'b')
+        self.assertEqual(self.backend.holder('lease'), 'a')
+        self.backend.release('lease', 'a')
+        self.assertIsNone(self.backend.holder('lease'))
+
+    def test_directory_required(self):
+        # A pod-local default directory would let every replica hold every lease
+        environment = {'BATCHER_SHARD_COUNT': '2', 'BATCHER_SHARD_INDEX': '0', 'BATCHER_STANDBY': 'true'}
+        with mock.patch.dict(os.environ, environment):
+            os.environ.pop('BATCHER_LEASE_DIRECTORY', None)
+            with self.assertRaises(ValueError):
+                ShardManager.from_environment()
+            with self.assertRaises(ValueError):
+                Replica.from_environment()
+            os.environ['BATCHER_LEASE_DIRECTORY'] = self.directory.name
+            self.assertIsInstance(lease.get_backend(), FileLeaseBackend)
+
+
+class ShardManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backend = FileLeaseBackend(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_partition(self):
+        managers = [ShardManager(3, i, self.backend, holder=str(i)) for i in range(3)]
+        for manager in managers:
+            manager.update()
+        ids = ['x3000c0s{}b0n0'.format(i) for i in range(100)]
+        for component_id in ids:
+            owners = [m for m in managers if m.owns_data({'id': component_id})]
+            self.assertEqual(len(owners), 1)
+
+    def test_takeover_and_handback(self):
+        first = ShardManager(2, 0, self.backend, holder='0', lease_timeout=60)
+        second = ShardManager(2, 1, self.backend, holder='1', lease_timeout=60)
+        first.update()
+        self.assertEqual(first.owned, {0, 1})
+        acquired, released = second.update()
+        self.assertEqual(second.owned, set())
+        acquired, released = first.update()
+        self.assertEqual(released, {1})
+        acquired, released = second.update()
+        self.assertEqual(acquired, {1})
+        self.assertEqual(first.owned, {0})
+
+    def test_renewed_in_background(self):
+        first = ShardManager(2, 0, self.backend, holder='0', lease_timeout=0.3)
+        first.update()
+        first.renewer.start()
+        self.addCleanup(first.renewer.stop)
+        time.sleep(0.6)
+        self.assertEqual(self.backend.holder('shard-0'), '0')
+        self.assertEqual(self.backend.holder('shard-1'), '0')
+        self.assertEqual(self.backend.holder('replica-0'), '0')
+        first.renewer.stop()
+        time.sleep(0.4)
+        self.assertIsNone(self.backend.holder('shard-0'))
+
+
+if __name__ == "__main__":
+    unittest.main()
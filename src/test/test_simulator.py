@@ -0,0 +1,78 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+
+from batcher.simulator.planner import simulate
+from batcher.simulator.soak import soak, synthetic_components
+
+
+def component_data(n, config='compute', layers=1):
+    return [{'id': 'x3000c0s{}b0n0'.format(i), 'enabled': True, 'error_count': 0, 'desired_config': config,
+             'tags': {}, 'state': [],
+             'desired_state': [{'commit': str(j), 'playbook': 'site.yml', 'status': 'pending'}
+                               for j in range(layers)]}
+            for i in range(n)]
+
+
+class SimulatorTest(unittest.TestCase):
+    def test_full_batches(self):
+        report = simulate(component_data(10), {'batch_size': 5, 'batch_window': 60})
+        self.assertEqual(report['sessions_created'], 2)
+        self.assertEqual(report['fill_distribution'][-1], 2)
+        self.assertEqual(report['components_unconfigured'], 0)
+
+    def test_batch_window(self):
+        arrivals = {'x3000c0s0b0n0': 0, 'x3000c0s1b0n0': 1000}
+        report = simulate(component_data(2), {'batch_size': 5, 'batch_window': 60}, arrivals=arrivals)
+        self.assertEqual(report['sessions_created'], 2)
+        self.assertGreaterEqual(report['wait_max'], 60)
+        self.assertEqual(report['components_unconfigured'], 0)
+
+    def test_failing_component_isolated(self):
+        # Failed batches are split, so one component that breaks sessions doesn't hold back the rest
+        report = simulate(component_data(16), {'batch_size': 16, 'batch_window': 60},
+                          poison=['x3000c0s3b0n0'])
+        self.assertEqual(report['sessions_failed'], 3)
+        self.assertEqual(report['components_configured'], 12)
+
+    def test_failing_configuration_not_split(self):
+        # When every component fails, batches are retried whole rather than as single components
+        report = simulate(component_data(50), {'batch_size': 50, 'batch_window': 60}, failure_rate=1.0,
+                          horizon=6 * 60 * 60)
+        self.assertGreater(report['sessions_created'], 1)
+        self.assertEqual(report['fill_distribution'][-1], report['sessions_created'])
+
+
+class SoakTest(unittest.TestCase):
+    def test_soak(self):
+        report = soak(synthetic_components(20), {'logging_level': 'WARNING'}, duration=6 * 60 * 60,
+                      samples=6)
+        self.assertEqual(report['violations'], [])
+        self.assertEqual(len(report['timeline']), 6)
+        # 10% of the components change every 15 minutes
+        self.assertGreaterEqual(report['configurations'], 20 + 2 * 23)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from requests.exceptions import HTTPError
+import ujson as json
+
+from batcher.batch import Batch, BatchManager
+from batcher.clock import VirtualClock
+from batcher.component import Component
+from batcher.lease.file import FileLeaseBackend
+from batcher.standby import Replica
+
+from helpers import component_data
+
+
+def not_found(name):
+    raise HTTPError(response=mock.Mock(status_code=404))
+
+
+class ReplicaTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backend = FileLeaseBackend(self.directory.name)
+        self.clock = VirtualClock(1000)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_takeover(self):
+        active = Replica(self.backend, holder='a', clock=self.clock)
+        standby = Replica(self.backend, holder='b', clock=self.clock)
+        self.assertTrue(active.renew())
+        self.assertTrue(active.publish({'batches': []}))
+        self.assertFalse(standby.renew())
+        self.assertEqual(standby.follow()['holder'], 'a')
+
+        self.backend.release('leader', 'a')  # As if the lease expired
+        self.clock.advance(5)
+        state = standby.wait_for_leadership()
+        self.assertEqual(state['published'], 1000)
+        self.assertFalse(active.publish({'batches': []}))  # The old active replica is fenced off
+        self.assertFalse(active.record_dispatch({'batches': []}))
+
+    def test_renewed_in_background(self):
+        # The lease must outlast a cycle that takes longer than the lease timeout
+        active = Replica(self.backend, holder='a', lease_timeout=0.3, clock=self.clock)
+        standby = Replica(self.backend, holder='b', lease_timeout=0.3, clock=self.clock)
+        self.assertTrue(active.renew())
+        active.renewer.start()
+        self.addCleanup(active.renewer.stop)
+        time.sleep(0.6)
+        self.assertFalse(standby.renew())
+        active.renewer.stop()
+        time.sleep(0.4)
+        self.assertTrue(standby.renew())
+
+    def test_stale_state(self):
+        active = Replica(self.backend, holder='a', clock=self.clock)
+        active.renew()
+        active.publish({'batches': []})
+        self.backend.release('leader', 'a')
+        self.clock.advance(3600)
+        self.assertIsNone(Replica(self.backend, holder='b', clock=self.clock).wait_for_leadership())
+
+
+class RestoreTest(unittest.TestCase):
+    @mock.patch('batcher.batch.sessions')
+    def setUp(self, mock_sessions):
+        mock_sessions.iter_sessions.return_value = iter([])
+        self.clock = VirtualClock(1000)
+        self.manager = BatchManager(clock=self.clock)
+        for component_id in ('x1', 'x2', 'x3'):
+            self.manager.add(Component(component_data(component_id, config='config-' + component_id)))
+        self.batches = {batch.config_name: batch for batches in self.manager.batches.values()
+                        for batch in batches}
+        self.batches['config-x1'].sent('batcher-sent')
+
+    @mock.patch('batcher.batch.sessions')
+    def test_restore(self, mock_sessions):
+        mock_sessions.get_session.side_effect = lambda name, **kwargs: (
+            {} if name == 'batcher-created' else not_found(name))
+        state = self.manager.export_state(dispatching={self.batches['config-x2']: 'batcher-created',
+                                                       self.batches['config-x3']: 'batcher-failed'})
+        state = json.loads(json.dumps(state))
+        manager = BatchManager(clock=self.clock, restore_state=state)
+        mock_sessions.iter_sessions.assert_not_called()  # State is not rebuilt
+        self.assertEqual(manager.tracked_ids, {'x1', 'x2', 'x3'})
+        self.assertIsNotNone(manager.rebuilding_ids)
+        session_names = {batch.config_name: batch.session_name for batches in manager.batches.values()
+                         for batch in batches}
+        self.assertEqual(session_names, {'config-x1': 'batcher-sent', 'config-x2': 'batcher-created',
+                                         'config-x3': ''})
+        restored = manager.batches['config-x1:0:'][0]
+        self.assertEqual(restored.batch_start, 1000)
+        self.assertEqual(next(iter(restored.components)).batch_key, 'config-x1:0:')
+
+    def test_restore_in_another_process(self):
+        # State is restored by a different process, so it must not depend on per-process hash seeds
+        script = ('import sys, ujson\n'
+                  'from batcher.component import Component\n'
+                  'print(ujson.dumps(Component(ujson.loads(sys.argv[1])).state()))')
+        data = component_data('x1')
+        output = subprocess.run([sys.executable, '-c', script, json.dumps(data)], check=True,
+                                capture_output=True, text=True,
+                                env=dict(os.environ, PYTHONHASHSEED='random',
+                                         PYTHONPATH=os.pathsep.join(sys.path))).stdout
+        restored = Component.from_state(json.loads(output))
+        self.assertEqual(restored.desired_state_hash, Component(data).desired_state_hash)
+
+    @mock.patch('batcher.batch.sessions')
+    def test_no_dispatch_without_lease(self, mock_sessions):
+        self.manager.replica = mock.Mock()
+        self.manager.replica.record_dispatch.return_value = False
+        mock_sessions.new_session_name.side_effect = ['batcher-0', 'batcher-1', 'batcher-2']
+        for batch in self.batches.values():
+            batch.batch_window_start = 0  # Overdue
+        self.manager.send_batches()
+        self.manager.replica.record_dispatch.assert_called_once()
+        mock_sessions.create_session.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
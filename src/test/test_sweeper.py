@@ -0,0 +1,64 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+import unittest
+from unittest import mock
+
+from batcher.cfs.options import options
+from batcher.clock import VirtualClock
+from batcher.sweeper import SessionSweeper, completion_time, expired_sessions
+
+NOW = 1767268800  # 2026-01-01T12:00:00Z
+
+
+def session_data(name, status='complete', completed='2026-01-01T00:00:00Z'):
+    return {'name': name, 'status': {'session': {'status': status, 'completion_time': completed}}}
+
+
+class SweeperTest(unittest.TestCase):
+    def test_completion_time(self):
+        completed = session_data('batcher-1', completed='2026-01-01T12:00:00.123Z')
+        self.assertEqual(completion_time(completed), NOW)
+        self.assertIsNone(completion_time(session_data('batcher-1', status='running')))
+        self.assertIsNone(completion_time(session_data('batcher-1', completed='')))
+
+    def test_expired_sessions(self):
+        session_list = [session_data('batcher-old'), session_data('other-old'),
+                        session_data('batcher-new', completed='2026-01-01T11:30:00'),
+                        session_data('batcher-running', status='running')]
+        self.assertEqual(expired_sessions(session_list, 3600, NOW), ['batcher-old'])
+
+    @mock.patch('batcher.sweeper.sessions')
+    def test_sweep(self, mock_sessions):
+        mock_sessions.iter_sessions.side_effect = lambda **filters: iter(
+            [session_data('batcher-{}'.format(i)) for i in range(5)])
+        sweeper = SessionSweeper(limit=3, clock=VirtualClock(NOW))
+        self.assertEqual(sweeper.sweep(), 0)  # Sessions are kept by default
+        with mock.patch.dict(options.options, {'batcher_session_retention': 3600}):
+            self.assertEqual(sweeper.sweep(), 3)
+        mock_sessions.delete_sessions.assert_called_once_with(['batcher-0', 'batcher-1', 'batcher-2'])
+        mock_sessions.iter_sessions.assert_called_once_with(status='complete', min_age='60m')
+
+
+if __name__ == "__main__":
+    unittest.main()